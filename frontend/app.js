@@ -19,6 +19,22 @@ class App {
         this.apiKeyInput = document.getElementById('api-key');
 
         this.showFavoritesOnly = false;
+        this.thumbnailBaseUrl = null; // Local thumbnail server, see thumbnailUrl()
+
+        // Virtualized list state: all fetched items, but only the rows in view are in the DOM.
+        this.items = [];
+        this.nextCursor = null;
+        this.isLoadingPage = false;
+        // Starts from the clock so generations keep increasing across page reloads (the backend remembers the latest).
+        this.historyGeneration = Date.now();
+        this.searchDebounceMs = 120;
+        this.searchTimer = null;
+        this.pageSize = 50;
+        this.rowHeights = new Map(); // item id -> measured height (incl. margin)
+        this.estimatedRowHeight = 88;
+        this.overscanPx = 600;
+        this.renderedRange = null;
+        this.renderScheduled = false;
 
         this.init();
     }
@@ -27,6 +43,7 @@ class App {
         window.addEventListener('pywebviewready', async () => {
             console.log('pywebview ready');
             if (this.historyList) {
+                this.thumbnailBaseUrl = await window.pywebview.api.get_thumbnail_base_url();
                 await this.loadHistory();
                 this.setupMainListeners();
             } else if (this.backBtn) {
@@ -37,8 +54,16 @@ class App {
     }
 
     setupMainListeners() {
+        window.addEventListener('scroll', () => this.scheduleRender(), { passive: true });
+        window.addEventListener('resize', () => this.scheduleRender(true));
+        // Focus loss for auto-hide; the backend ignores it where it has a native focus watcher
+        window.addEventListener('blur', () => window.pywebview.api.notify_window_blur());
         if (this.searchInput) {
-            this.searchInput.addEventListener('input', () => this.loadHistory());
+            // Typing is debounced; a query sent while an older one runs cancels it on the backend.
+            this.searchInput.addEventListener('input', () => {
+                clearTimeout(this.searchTimer);
+                this.searchTimer = setTimeout(() => this.loadHistory(), this.searchDebounceMs);
+            });
         }
         if (this.settingsBtn) {
             this.settingsBtn.addEventListener('click', () => {
@@ -84,24 +109,105 @@ class App {
         });
     }
 
+    currentFilter() {
+        return this.showFavoritesOnly ? 'Favorites ★' : 'All Types';
+    }
+
     async loadHistory() {
-        const query = this.searchInput ? this.searchInput.value : '';
-        const filter = this.showFavoritesOnly ? 'Favorites ★' : 'All Types';
+        // Start over from the first page; responses of older generations are dropped.
+        clearTimeout(this.searchTimer);
+        const generation = ++this.historyGeneration;
+        this.nextCursor = null;
+        this.isLoadingPage = false;
+        const items = await this.fetchPage(null, generation);
+        if (items === null) return;
+        this.items = items;
+        this.renderHistory(true);
+    }
+
+    async loadMore() {
+        if (this.isLoadingPage || !this.nextCursor) return;
+        const generation = this.historyGeneration;
+        this.isLoadingPage = true;
+        const items = await this.fetchPage(this.nextCursor, generation);
+        this.isLoadingPage = false;
+        if (items === null) return;
+        this.items = this.items.concat(items);
+        this.renderHistory(true);
+    }
 
+    async fetchPage(cursor, generation) {
+        const query = this.searchInput ? this.searchInput.value : '';
         try {
-            const history = await window.pywebview.api.get_history(filter, query);
-            this.renderHistory(history);
+            const page = await window.pywebview.api.search_history(generation, cursor, this.pageSize, this.currentFilter(), query);
+            if (page.cancelled || generation !== this.historyGeneration) return null;
+            this.nextCursor = page.next_cursor;
+            return page.items;
         } catch (error) {
             console.error('Failed to load history:', error);
+            return null;
         }
     }
 
-    renderHistory(history) {
+    // Applies a batch of deltas pushed by the backend (see pyclip/ui_events.py)
+    // to the loaded items, then re-renders the visible window once.
+    applyEvents(events) {
         if (!this.historyList) return;
+        const hasQuery = this.searchInput && this.searchInput.value.trim() !== '';
+        const removeIds = (ids) => {
+            const idSet = new Set(ids);
+            this.items = this.items.filter(item => !idSet.has(item.id));
+            ids.forEach(id => this.rowHeights.delete(id));
+        };
 
-        this.historyList.innerHTML = '';
+        events.forEach(event => {
+            switch (event.type) {
+                case 'item_added': {
+                    // A new clip is non-favorite and may not match the active search;
+                    // those views pick it up on their next load instead.
+                    if (hasQuery || this.showFavoritesOnly) break;
+                    removeIds([event.item.id]);
+                    this.items.unshift(event.item);
+                    break;
+                }
+                case 'item_updated': {
+                    const item = this.items.find(i => i.id === event.id);
+                    if (!item) break;
+                    const { type, id, ...fields } = event;
+                    Object.assign(item, fields);
+                    if (this.showFavoritesOnly && !item.is_favorite) removeIds([item.id]);
+                    break;
+                }
+                case 'item_deleted':
+                    removeIds([event.id]);
+                    break;
+                case 'item_pruned':
+                    removeIds(event.ids);
+                    break;
+            }
+        });
+        this.renderHistory(true);
+    }
+
+    scheduleRender(force = false) {
+        if (force) this.renderedRange = null;
+        if (this.renderScheduled) return;
+        this.renderScheduled = true;
+        requestAnimationFrame(() => {
+            this.renderScheduled = false;
+            this.renderHistory();
+        });
+    }
 
-        if (history.length === 0) {
+    rowHeight(item) {
+        return this.rowHeights.get(item.id) || this.estimatedRowHeight;
+    }
+
+    renderHistory(force = false) {
+        if (!this.historyList) return;
+
+        if (this.items.length === 0) {
+            this.renderedRange = null;
             this.historyList.innerHTML = `
                 <div class="flex-1 flex-col items-center justify-center space-y-4 p-8 text-center">
                     <div class="flex h-20 w-20 items-center justify-center rounded-full bg-card-light dark:bg-card-dark mx-auto">
@@ -116,104 +222,185 @@ class App {
             return;
         }
 
-        history.forEach(item => {
-            const el = document.createElement('div');
-            el.className = 'group flex items-center gap-3 rounded-xl bg-card-light p-3 shadow-sm transition-all hover:shadow-md dark:bg-card-dark cursor-default';
+        // Find the slice of items that intersects the viewport (plus overscan).
+        const viewTop = window.scrollY - this.historyList.offsetTop - this.overscanPx;
+        const viewBottom = window.scrollY - this.historyList.offsetTop + window.innerHeight + this.overscanPx;
+        let start = 0;
+        let offset = 0;
+        while (start < this.items.length && offset + this.rowHeight(this.items[start]) < viewTop) {
+            offset += this.rowHeight(this.items[start]);
+            start++;
+        }
+        const topPadding = offset;
+        let end = start;
+        while (end < this.items.length && offset < viewBottom) {
+            offset += this.rowHeight(this.items[end]);
+            end++;
+        }
+        let bottomPadding = 0;
+        for (let i = end; i < this.items.length; i++) {
+            bottomPadding += this.rowHeight(this.items[i]);
+        }
 
-            let contentHtml = '';
-            let icon = 'description'; // default text icon
-            let previewText = item.preview || item.content || '';
+        // Fetch the next page before the user reaches the end of what is loaded.
+        if (end >= this.items.length - 10) {
+            this.loadMore();
+        }
 
-            if (item.data_type === 'IMAGE') {
-                icon = 'image';
-                const thumbSrc = item.thumbnail_path ? item.thumbnail_path.replace(/\\/g, '/') : '';
-                const safeThumbSrc = thumbSrc.startsWith('http') || thumbSrc.startsWith('file') ? thumbSrc : `file:///${thumbSrc}`;
+        const range = this.renderedRange;
+        if (!force && range && range.start === start && range.end === end) return;
+        this.renderedRange = { start, end };
+
+        const fragment = document.createDocumentFragment();
+        const topSpacer = document.createElement('div');
+        topSpacer.style.height = `${topPadding}px`;
+        fragment.appendChild(topSpacer);
+        const rows = [];
+        for (let i = start; i < end; i++) {
+            const el = this.createRow(this.items[i]);
+            rows.push([this.items[i], el]);
+            fragment.appendChild(el);
+        }
+        const bottomSpacer = document.createElement('div');
+        bottomSpacer.style.height = `${bottomPadding}px`;
+        fragment.appendChild(bottomSpacer);
+        this.historyList.replaceChildren(fragment);
+
+        // Remember real heights so later windows are positioned exactly.
+        rows.forEach(([item, el]) => {
+            this.rowHeights.set(item.id, el.offsetHeight + 8); // mb-2
+        });
+    }
 
-                contentHtml = `
-                    <div class="flex flex-col">
-                        ${thumbSrc ? `<img src="${safeThumbSrc}" alt="Thumbnail" class="mt-1 h-24 w-auto rounded-lg object-cover border border-slate-200 dark:border-slate-700">` : ''}
-                    </div>
-                `;
-                previewText = '[Image Content]';
-            } else if (item.data_type === 'FILES') {
-                icon = 'folder';
-                contentHtml = `<p class="line-clamp-4 break-all text-sm font-medium text-text-primary-light dark:text-text-primary-dark">${this.escapeHtml(item.preview || 'Files')}</p>`;
-            } else {
-                contentHtml = `<p class="line-clamp-4 break-all text-sm font-medium text-text-primary-light dark:text-text-primary-dark">${this.escapeHtml(item.preview || item.content)}</p>`;
-            }
+    createRow(item) {
+        const el = document.createElement('div');
+        el.className = 'group mb-2 flex items-center gap-3 rounded-xl bg-card-light p-3 shadow-sm transition-all hover:shadow-md dark:bg-card-dark cursor-default';
 
-            const timeAgo = 'Just now';
+        let contentHtml = '';
+        let icon = 'description'; // default text icon
+        let previewText = item.preview || '';
 
-            el.innerHTML = `
-                <div class="flex flex-1 items-start gap-3 overflow-hidden">
-                    <div class="flex h-10 w-10 shrink-0 items-center justify-center rounded-lg bg-background-light dark:bg-background-dark mt-1">
-                        <span class="material-symbols-outlined text-xl text-text-primary-light dark:text-text-primary-dark">${icon}</span>
-                    </div>
-                    <div class="flex min-w-0 flex-1 flex-col justify-center">
-                        ${contentHtml}
-                    </div>
-                </div>
-                <div class="flex shrink-0 items-center gap-1 opacity-0 transition-opacity group-hover:opacity-100 self-start mt-1">
-                    <button class="btn-favorite flex h-8 w-8 items-center justify-center rounded-full ${item.is_favorite ? 'text-primary' : 'text-text-secondary-light dark:text-text-secondary-dark'} hover:bg-zinc-100 dark:hover:bg-zinc-700">
-                        <span class="material-symbols-outlined text-xl ${item.is_favorite ? 'fill-1' : ''}">star</span>
-                    </button>
-                    <button class="btn-delete flex h-8 w-8 items-center justify-center rounded-full text-text-secondary-light dark:text-text-secondary-dark hover:bg-red-100 hover:text-red-500 dark:hover:bg-red-900/30 dark:hover:text-red-400">
-                        <span class="material-symbols-outlined text-xl">delete</span>
-                    </button>
+        if (item.data_type === 'IMAGE') {
+            icon = 'image';
+            const thumbSrc = item.is_pending ? '' : this.thumbnailUrl(item, 128);
+            const safeThumbSrc = this.escapeHtml(thumbSrc);
+
+            contentHtml = `
+                <div class="flex flex-col">
+                    ${thumbSrc ? `<img src="${safeThumbSrc}" alt="Thumbnail" class="mt-1 h-24 w-auto rounded-lg object-cover border border-slate-200 dark:border-slate-700">` : ''}
+                    ${item.is_pending ? `<p class="text-sm text-text-secondary-light dark:text-text-secondary-dark">${this.escapeHtml(item.preview)} · Saving...</p>` : ''}
                 </div>
             `;
+            previewText = '[Image Content]';
+        } else if (item.data_type === 'FILES') {
+            icon = 'folder';
+            contentHtml = `<p class="line-clamp-4 break-all text-sm font-medium text-text-primary-light dark:text-text-primary-dark">${item.preview ? this.highlightText(item.preview, item.match_ranges) : 'Files'}</p>`;
+        } else {
+            contentHtml = `<p class="line-clamp-4 break-all text-sm font-medium text-text-primary-light dark:text-text-primary-dark">${this.highlightText(item.preview, item.match_ranges)}</p>`;
+        }
 
-            // Force favorite button visible if favorite
-            if (item.is_favorite) {
-                el.querySelector('.opacity-0').classList.remove('opacity-0');
-            }
+        const timeAgo = 'Just now';
 
-            // Event listeners
-            el.querySelector('.btn-favorite').addEventListener('click', (e) => {
-                e.stopPropagation();
-                this.toggleFavorite(item.id);
-            });
-            el.querySelector('.btn-delete').addEventListener('click', (e) => {
-                e.stopPropagation();
-                this.deleteItem(item.id);
-            });
-            el.addEventListener('dblclick', () => this.pasteItem(item.id));
+        el.innerHTML = `
+            <div class="flex flex-1 items-start gap-3 overflow-hidden">
+                <div class="flex h-10 w-10 shrink-0 items-center justify-center rounded-lg bg-background-light dark:bg-background-dark mt-1">
+                    <span class="material-symbols-outlined text-xl text-text-primary-light dark:text-text-primary-dark">${icon}</span>
+                </div>
+                <div class="flex min-w-0 flex-1 flex-col justify-center">
+                    ${contentHtml}
+                </div>
+            </div>
+            <div class="flex shrink-0 items-center gap-1 opacity-0 transition-opacity group-hover:opacity-100 self-start mt-1">
+                <button class="btn-favorite flex h-8 w-8 items-center justify-center rounded-full ${item.is_favorite ? 'text-primary' : 'text-text-secondary-light dark:text-text-secondary-dark'} hover:bg-zinc-100 dark:hover:bg-zinc-700">
+                    <span class="material-symbols-outlined text-xl ${item.is_favorite ? 'fill-1' : ''}">star</span>
+                </button>
+                <button class="btn-delete flex h-8 w-8 items-center justify-center rounded-full text-text-secondary-light dark:text-text-secondary-dark hover:bg-red-100 hover:text-red-500 dark:hover:bg-red-900/30 dark:hover:text-red-400">
+                    <span class="material-symbols-outlined text-xl">delete</span>
+                </button>
+            </div>
+        `;
+
+        // Force favorite button visible if favorite
+        if (item.is_favorite) {
+            el.querySelector('.opacity-0').classList.remove('opacity-0');
+        }
 
-            // Hover Preview Logic
-            el.addEventListener('mouseenter', (e) => {
-                this.previewTimeout = setTimeout(() => {
-                    this.showPreview(e, item);
-                }, 800); // 800ms delay
-            });
-            el.addEventListener('mouseleave', () => {
-                clearTimeout(this.previewTimeout);
-                this.hidePreview();
-            });
-            el.addEventListener('mousemove', (e) => this.movePreview(e));
+        // Event listeners
+        el.querySelector('.btn-favorite').addEventListener('click', (e) => {
+            e.stopPropagation();
+            this.toggleFavorite(item.id);
+        });
+        el.querySelector('.btn-delete').addEventListener('click', (e) => {
+            e.stopPropagation();
+            this.deleteItem(item.id);
+        });
+        el.addEventListener('dblclick', () => this.pasteItem(item.id));
 
-            this.historyList.appendChild(el);
+        // Hover Preview Logic
+        el.addEventListener('mouseenter', (e) => {
+            this.previewTimeout = setTimeout(() => {
+                this.showPreview(e, item);
+            }, 800); // 800ms delay
+        });
+        el.addEventListener('mouseleave', () => {
+            clearTimeout(this.previewTimeout);
+            this.hidePreview();
         });
+        el.addEventListener('mousemove', (e) => this.movePreview(e));
+
+        // Images change height once loaded; re-measure so the window stays aligned.
+        const img = el.querySelector('img');
+        if (img) {
+            img.addEventListener('load', () => {
+                if (el.isConnected) this.rowHeights.set(item.id, el.offsetHeight + 8);
+            }, { once: true });
+        }
+
+        return el;
+    }
+
+    // Thumbnails come from the local server (cached, sized on demand); file:// is the fallback.
+    thumbnailUrl(item, size) {
+        if (this.thumbnailBaseUrl && item.content_hash) {
+            const digest = item.content_hash.split(':').pop();
+            return `${this.thumbnailBaseUrl}/${digest}?size=${size}`;
+        }
+        const path = item.thumbnail_path ? item.thumbnail_path.replace(/\\/g, '/') : '';
+        if (!path) return '';
+        return path.startsWith('http') || path.startsWith('file') ? path : `file:///${path}`;
     }
 
-    showPreview(e, item) {
+    async showPreview(e, item) {
         if (!this.previewTooltip || !this.previewContent) return;
+        if (item.data_type !== 'IMAGE' && (item.content_length || 0) < 50) return; // Don't show preview for short text
 
-        let content = item.content;
-        if (item.data_type === 'FILES') {
-            content = item.content; // Already a list of files
-        } else if (item.data_type === 'IMAGE') {
-            // Maybe show image dimensions or path?
-            content = `Image: ${item.content}`;
+        if (item.data_type === 'IMAGE' && !item.is_pending && this.thumbnailBaseUrl) {
+            this.previewItemId = item.id;
+            this.previewContent.innerHTML = `<img src="${this.escapeHtml(this.thumbnailUrl(item, 256))}" alt="Preview" class="max-h-64 w-auto rounded-lg">`;
+            this.previewTooltip.classList.remove('hidden');
+            this.movePreview(e);
+            return;
         }
 
-        if (!content || content.length < 50) return; // Don't show preview for short text
+        // The list only carries previews, so fetch just the part of the content the tooltip shows.
+        const previewLimit = 1000;
+        this.previewItemId = item.id;
+        const entry = await window.pywebview.api.get_entry_content(item.id, 0, previewLimit);
+        if (!entry || !entry.success || this.previewItemId !== item.id) return; // Mouse left while loading
+
+        let content = entry.content;
+        if (item.data_type === 'IMAGE') {
+            content = `Image: ${entry.content}`;
+        }
+        if (!content) return;
 
-        this.previewContent.textContent = content.substring(0, 1000) + (content.length > 1000 ? '...' : '');
+        this.previewContent.textContent = content + (entry.content_length > previewLimit ? '...' : '');
         this.previewTooltip.classList.remove('hidden');
         this.movePreview(e);
     }
 
     hidePreview() {
+        this.previewItemId = null;
         if (this.previewTooltip) {
             this.previewTooltip.classList.add('hidden');
         }
@@ -242,14 +429,12 @@ class App {
     }
 
     async toggleFavorite(id) {
-        await window.pywebview.api.toggle_favorite(id);
-        await this.loadHistory();
+        await window.pywebview.api.toggle_favorite(id); // The list is patched by the pushed item_updated event
     }
 
     async deleteItem(id) {
         if (confirm('Are you sure you want to delete this item?')) {
-            await window.pywebview.api.delete_item(id);
-            await this.loadHistory();
+            await window.pywebview.api.delete_item(id); // The list is patched by the pushed item_deleted event
         }
     }
 
@@ -287,6 +472,23 @@ class App {
         }
     }
 
+    // Wraps the [start, end) ranges reported by the backend search in <mark>
+    // tags, so the text never has to be re-scanned for the query here.
+    highlightText(text, ranges) {
+        if (!text) return '';
+        if (!ranges || ranges.length === 0) return this.escapeHtml(text);
+
+        let html = '';
+        let pos = 0;
+        ranges.forEach(([start, end]) => {
+            if (start < pos) return;
+            html += this.escapeHtml(text.substring(pos, start));
+            html += `<mark class="rounded bg-primary/20 text-inherit dark:bg-primary/40">${this.escapeHtml(text.substring(start, end))}</mark>`;
+            pos = end;
+        });
+        return html + this.escapeHtml(text.substring(pos));
+    }
+
     escapeHtml(text) {
         if (!text) return '';
         const div = document.createElement('div');
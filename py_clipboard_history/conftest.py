@@ -0,0 +1,28 @@
+import time
+
+import pytest
+
+from pyclip import config, database
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """A fresh database and image store under tmp_path."""
+    monkeypatch.setattr(config, 'DB_PATH', tmp_path / "clipboard.db")
+    monkeypatch.setattr(config, 'IMAGE_STORAGE_PATH', tmp_path / "images")
+    monkeypatch.setattr(config, 'LOCAL_MODEL_PATH', tmp_path / "tag_model.json")
+    database.init_db()
+    yield tmp_path
+    database.close_connections()
+
+def _wait_until(condition, timeout: float = 5.0, interval: float = 0.01) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(interval)
+    return condition()
+
+@pytest.fixture
+def wait_until():
+    """wait_until(condition, timeout=5.0): polls condition() until it is true or the timeout passes."""
+    return _wait_until
@@ -1,9 +1,8 @@
+from pyclip import startup  # First, so the startup timeline starts as early as possible
 import logging
 import ctypes
-import webview
 import os
-from logging.handlers import RotatingFileHandler
-from pyclip import app, config, database
+from pyclip import app, config, database, log_setup
 from pyclip.api import Api
 
 # --- High DPI Awareness --- #
@@ -13,27 +12,8 @@ except (AttributeError, OSError):
     logging.info("Not on Windows or DPI awareness not applicable.")
 
 def setup_logging():
-    """Configures rotating logging (5MB limit) for the application."""
-    config.LOG_FILE_PATH.parent.mkdir(exist_ok=True)
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    if logger.hasHandlers():
-        logger.handlers.clear()
-    formatter = logging.Formatter(
-        '%(asctime)s - %(levelname)s - [%(module)s.%(funcName)s] - %(message)s'
-    )
-    handler = RotatingFileHandler(
-        config.LOG_FILE_PATH,
-        maxBytes=5 * 1024 * 1024,  # 5 MB
-        backupCount=1,
-        encoding='utf-8'
-    )
-    file_handler = handler
-    file_handler.setFormatter(formatter)
-    stream_handler = logging.StreamHandler()
-    stream_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    logger.addHandler(stream_handler)
+    """Configures rotating logging (5MB limit) behind a background queue listener."""
+    log_setup.setup_logging()
 
 def main():
     """Main entry point for the PyClipboardHistory application."""
@@ -55,6 +35,7 @@ def main():
     except Exception as e:
         logging.critical(f"FATAL: Failed to initialize database: {e}")
         return
+    startup.mark('database_ready')
 
     try:
         # Initialize the controller (backend logic)
@@ -63,6 +44,9 @@ def main():
         # Initialize the API bridge
         api_bridge = Api(controller)
 
+        # The GUI toolkit is the slowest import; load it after the hotkey is live
+        import webview
+
         # Create the window
         # Note: We use a relative path for the URL. pywebview resolves this relative to the entry point.
         # Ensure 'frontend/index.html' exists relative to where you run python.
@@ -156,7 +140,11 @@ def main():
         threading.Thread(target=set_window_icon, daemon=True).start()
 
         # Start the webview loop
-        webview.start(debug=False) # debug=True enables DevTools (F12)
+        def on_gui_started():
+            startup.mark('gui_started')
+            startup.log_summary()
+
+        webview.start(on_gui_started, debug=False) # debug=True enables DevTools (F12)
 
     except Exception as e:
         logging.critical(f"An unexpected error occurred in the main application: {e}", exc_info=True)
@@ -164,6 +152,7 @@ def main():
     logging.info("="*50)
     logging.info("Application Closed.")
     logging.info("="*50)
+    log_setup.shutdown_logging()
 
 if __name__ == "__main__":
     main()
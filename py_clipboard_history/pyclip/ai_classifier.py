@@ -1,36 +1,48 @@
 
+import re
+import sys
 import logging
-import openai
+import threading
 from . import config as app_config
 
-# The google.generativeai library will be imported only if needed,
-# to avoid errors if it's not installed.
+# The openai and google.generativeai libraries are imported on first use: they
+# are slow to import, and not needed at all while AI tagging is disabled.
 
+# Clients are reused across requests (keyed by API key and base URL), so
+# connection pools and TLS sessions survive between classifications.
+_clients = {}
+_clients_lock = threading.Lock()
 
-def _build_prompt(text_content: str) -> str:
-    """Builds a standardized prompt for text classification."""
-    # Truncate content to avoid exceeding token limits
-    truncated_content = text_content[:2500]
-    
-    # Define the allowed tags for the model
+def _build_batch_prompt(text_contents: list[str]) -> str:
+    """Builds one prompt classifying several snippets, answered one numbered line per snippet."""
+    # Share the per-request budget between the snippets
+    limit = max(300, 2500 // len(text_contents))
     allowed_tags_str = ", ".join(app_config.ALLOWED_TAGS)
+    snippets = "\n".join(f"[{i}]\n---\n{text[:limit]}\n---" for i, text in enumerate(text_contents, 1))
 
-    prompt = f"""You are an expert content classifier. Your task is to analyze the following text and assign one or more relevant tags from a predefined list.
+    prompt = f"""You are an expert content classifier. Your task is to analyze each of the following {len(text_contents)} numbered texts and assign one or more relevant tags from a predefined list.
 
 RULES:
-1. Respond ONLY with the chosen tags, separated by a comma.
+1. Respond with exactly one line per text, in the form "<number>: <tags separated by a comma>", and nothing else.
 2. You MUST choose from this list of allowed tags: {allowed_tags_str}
 3. If no specific tag fits well, use the "General" tag.
 4. Analyze the content carefully. For code, identify the language. For text, identify its purpose (e.g., citation, note).
 
-TEXT TO CLASSIFY:
----
-{truncated_content}
----
+TEXTS TO CLASSIFY:
+{snippets}
 
 TAGS:"""
     return prompt
 
+def _parse_batch_response(response_text: str, count: int) -> list[list[str]]:
+    """Splits a numbered batch response into one tag list per snippet (empty where a line is missing)."""
+    lines = {}
+    for match in re.finditer(r"^\s*\[?(\d+)\]?\s*[:.)-]\s*(.+)$", response_text or "", re.MULTILINE):
+        lines[int(match.group(1))] = match.group(2)
+    if not lines and count == 1:
+        lines[1] = response_text
+    return [_parse_response(lines[i]) if i in lines else [] for i in range(1, count + 1)]
+
 def _parse_response(response_text: str) -> list[str]:
     """Cleans and parses the comma-separated string from the LLM response."""
     if not response_text:
@@ -47,63 +59,80 @@ def _parse_response(response_text: str) -> list[str]:
         
     return valid_tags
 
-def classify_with_openai(prompt: str, settings: dict) -> str:
+def _get_openai_client(settings: dict):
+    import openai
+    key = (settings.get('ai_api_key'), settings.get('ai_base_url') or None)
+    with _clients_lock:
+        client = _clients.get(('OpenAI',) + key)
+        if client is None:
+            client = openai.OpenAI(
+                api_key=key[0],
+                base_url=key[1], # None when the setting is an empty string
+                max_retries=0, # Retries are done by the tagging queue, with its own backoff
+            )
+            _clients[('OpenAI',) + key] = client
+        return client
+
+def _get_gemini_model(settings: dict):
+    import google.generativeai as genai
+    key = ('Gemini', settings.get('ai_api_key'), settings.get('ai_model_name'))
+    with _clients_lock:
+        model = _clients.get(key)
+        if model is None:
+            genai.configure(api_key=settings.get('ai_api_key'))
+            model = genai.GenerativeModel(settings.get('ai_model_name'))
+            _clients[key] = model
+        return model
+
+def classify_with_openai(prompt: str, settings: dict, max_tokens: int = 50) -> str:
     """Handles classification using the OpenAI API."""
-    client = openai.OpenAI(
-        api_key=settings.get('ai_api_key'), 
-        base_url=settings.get('ai_base_url') or None # Handles empty string
-    )
+    client = _get_openai_client(settings)
     response = client.chat.completions.create(
         model=settings.get('ai_model_name'),
         messages=[{"role": "user", "content": prompt}],
         temperature=0.0,
-        max_tokens=50,
+        max_tokens=max_tokens,
     )
     return response.choices[0].message.content
 
 def classify_with_gemini(prompt: str, settings: dict) -> str:
     """Handles classification using the Google Gemini API."""
     try:
-        import google.generativeai as genai
+        model = _get_gemini_model(settings)
     except ImportError:
         logging.critical("The 'google-generativeai' library is not installed. Please run 'pip install google-generativeai'")
         raise
 
-    genai.configure(api_key=settings.get('ai_api_key'))
-    model = genai.GenerativeModel(settings.get('ai_model_name'))
     response = model.generate_content(prompt)
     return response.text
 
-def classify_and_tag(text_content: str, settings: dict) -> list[str] | None:
+def is_configured(settings: dict) -> bool:
+    return all([settings.get('ai_provider'), settings.get('ai_api_key'), settings.get('ai_model_name')])
+
+def is_retryable(error: Exception) -> bool:
+    """True for errors worth retrying: rate limits, server errors and connection problems."""
+    openai = sys.modules.get('openai')  # Not imported means this can't be an OpenAI error
+    if openai and isinstance(error, openai.APIConnectionError):
+        return True
+    if openai and isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    # Other providers: retry anything but obvious programming errors
+    return not isinstance(error, (TypeError, ValueError, KeyError, ImportError))
+
+def classify_batch(text_contents: list[str], settings: dict) -> list[list[str]]:
     """
-    Classifies text using the configured AI provider and returns a list of tags.
+    Classifies several snippets with a single request. Returns one tag list per
+    snippet (empty if the model skipped it). Errors are raised so the caller
+    can retry.
     """
     provider = settings.get('ai_provider')
-    if not all([provider, settings.get('ai_api_key'), settings.get('ai_model_name')]):
-        logging.warning("AI classification skipped: provider, API key, or model name is missing in settings.")
-        return None
-
-    prompt = _build_prompt(text_content)
-    response_text = ""
-    
-    try:
-        if provider == "OpenAI":
-            logging.info(f"Classifying with OpenAI model: {settings.get('ai_model_name')}")
-            response_text = classify_with_openai(prompt, settings)
-
-        elif provider == "Gemini":
-            logging.info(f"Classifying with Gemini model: {settings.get('ai_model_name')}")
-            response_text = classify_with_gemini(prompt, settings)
-            
-        else:
-            logging.error(f"Unsupported AI provider in settings: {provider}")
-            return None
-
-        logging.info(f"AI response received: '{response_text}'")
-        tags = _parse_response(response_text)
-        logging.info(f"Parsed tags: {tags}")
-        return tags
-
-    except Exception as e:
-        logging.error(f"An error occurred during AI classification with {provider}: {e}", exc_info=False)
-        return None
+    prompt = _build_batch_prompt(text_contents)
+    logging.info(f"Classifying {len(text_contents)} snippets with {provider} model: {settings.get('ai_model_name')}")
+    if provider == "OpenAI":
+        response_text = classify_with_openai(prompt, settings, max_tokens=30 * len(text_contents) + 20)
+    elif provider == "Gemini":
+        response_text = classify_with_gemini(prompt, settings)
+    else:
+        raise ValueError(f"Unsupported AI provider in settings: {provider}")
+    logging.info(f"AI response received: '{response_text}'")
+    return _parse_batch_response(response_text, len(text_contents))
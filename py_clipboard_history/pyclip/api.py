@@ -1,6 +1,10 @@
+import time
 import logging
+import threading
 from . import database
-from . import clipboard_adapter
+from . import metrics
+from . import dib_cache
+from . import startup
 
 class Api:
     def __init__(self, main_app_instance):
@@ -11,6 +15,8 @@ class Api:
                                   to access settings and other core components.
         """
         self._app = main_app_instance
+        self._search_generation = 0
+        self._search_lock = threading.Lock()
 
     def get_history(self, filter_type: str = "All Types", search_query: str = "") -> list[dict]:
         """
@@ -20,19 +26,107 @@ class Api:
         :param filter_type: Can be "All Types", "Favorites ★", "TEXT", "IMAGE", "FILES".
         :param search_query: The text from the search box.
         :return: A list of dictionary objects, where each object represents a clipboard item.
+                 Items carry `content_length` but not the content itself; use get_entry_content.
         """
-        logging.info(f"API: get_history called with filter='{filter_type}', query='{search_query}'")
+        logging.debug("API: get_history called with filter='%s', query='%s'", filter_type, search_query)
         try:
-            history = database.get_history(filter_type=filter_type, search_query=search_query)
-            # Ensure data is JSON serializable
-            result = []
-            for item in history:
-                result.append(dict(item))
-            return result
+            # database.get_history already returns plain, JSON serializable dicts
+            with metrics.timer('api_get_history'):
+                return database.get_history(filter_type=filter_type, search_query=search_query)
         except Exception as e:
             logging.error(f"API Error in get_history: {e}")
             return []
 
+    def get_history_page(self, cursor: dict | None = None, page_size: int = 50,
+                         filter_type: str = "All Types", search_query: str = "") -> dict:
+        """
+        Retrieves one page of clipboard history.
+        Called by the frontend's virtualized list as the user scrolls.
+
+        :param cursor: The `next_cursor` from the previous page, or None for the first page.
+        :param page_size: Maximum number of items to return.
+        :param filter_type: Can be "All Types", "Favorites ★", "TEXT", "IMAGE", "FILES".
+        :param search_query: The text from the search box.
+        :return: A dictionary with `items` and `next_cursor` (None when there are no more pages).
+        """
+        logging.debug("API: get_history_page called with cursor=%s, filter='%s', query='%s'", cursor, filter_type, search_query)
+        try:
+            page_size = max(1, min(int(page_size), 500))
+            with metrics.timer('api_get_history_page'):
+                return database.get_history_page(cursor, page_size, filter_type, search_query)
+        except Exception as e:
+            logging.error(f"API Error in get_history_page: {e}")
+            return {"items": [], "next_cursor": None}
+
+    def search_history(self, generation: int, cursor: dict | None = None, page_size: int = 50,
+                       filter_type: str = "All Types", search_query: str = "") -> dict:
+        """
+        Like get_history_page, but tagged with the frontend's request generation.
+        A request with a newer generation interrupts any older one still running
+        (through an SQLite progress handler), and superseded requests come back
+        with `cancelled` set instead of results, so only the latest query renders.
+
+        :param generation: Increases with every new query typed; pages of the same query reuse it.
+        :return: A dictionary with `items`, `next_cursor`, `generation` and optionally `cancelled`.
+        """
+        with self._search_lock:
+            if generation < self._search_generation:
+                return {"items": [], "next_cursor": None, "generation": generation, "cancelled": True}
+            self._search_generation = generation
+
+        def is_cancelled():
+            return generation < self._search_generation
+
+        try:
+            page_size = max(1, min(int(page_size), 500))
+            with metrics.timer('api_search_history'):
+                page = database.get_history_page(cursor, page_size, filter_type, search_query, is_cancelled=is_cancelled)
+            if is_cancelled():
+                # Finished, but a newer query is already on its way
+                page = {"items": [], "next_cursor": None, "cancelled": True}
+            return {**page, "generation": generation}
+        except Exception as e:
+            logging.error(f"API Error in search_history: {e}")
+            return {"items": [], "next_cursor": None, "generation": generation}
+
+    def get_entry_content(self, item_id: int, offset: int = 0, length: int | None = None) -> dict:
+        """
+        Lazily loads the full content of an item, or a slice of it.
+        Called by the hover preview, which only needs the first part of large clips.
+
+        :param item_id: The database ID of the item.
+        :param offset: Character offset to start reading from (negative values count as 0).
+        :param length: Maximum number of characters to return, or None for the rest.
+        :return: A dictionary with `content` and the total `content_length`.
+        """
+        try:
+            # Negative values would mean different things to SQLite's substr() and to Python slicing
+            offset = max(0, int(offset or 0))
+            length = max(0, int(length)) if length is not None else None
+            with metrics.timer('api_get_entry_content'):
+                entry = database.get_entry_content(item_id, offset=offset, length=length)
+            if entry:
+                return {"success": True, **entry}
+            return {"success": False, "error": f"Item with ID {item_id} not found."}
+        except Exception as e:
+            logging.error(f"API Error in get_entry_content: {e}")
+            return {"success": False, "error": str(e)}
+
+    def get_storage_stats(self) -> dict:
+        """
+        Reports how much database space large-text compression saves.
+
+        :return: A dictionary with `compressed_entries`, `raw_bytes`, `stored_bytes` and `bytes_saved`.
+        """
+        try:
+            stats = database.get_storage_stats()
+            if stats is None:
+                return {"success": False, "error": "Could not read storage stats."}
+            return {"success": True, **stats}
+        except Exception as e:
+            logging.error(f"API Error in get_storage_stats: {e}")
+            return {"success": False, "error": str(e)}
+
     def paste_item(self, item_id: int) -> dict:
         """
         Copies the content of a specific item back to the system clipboard.
@@ -44,14 +138,102 @@ class Api:
         logging.info(f"API: paste_item called for ID {item_id}")
         try:
             full_entry = database.get_full_entry(item_id)
+            if full_entry and full_entry.get('is_pending'):
+                return {"success": False, "error": "Image is still being saved."}
             if full_entry:
-                clipboard_adapter.write_to_clipboard(full_entry)
+                start = time.perf_counter()
+                self._app.clipboard_backend.write(full_entry)
+                metrics.observe(f"paste_{full_entry['data_type'].lower()}", time.perf_counter() - start)
                 return {"success": True}
             return {"success": False, "error": f"Item with ID {item_id} not found."}
         except Exception as e:
             logging.error(f"API Error in paste_item: {e}")
             return {"success": False, "error": str(e)}
 
+    def get_thumbnail_base_url(self) -> str | None:
+        """
+        Returns the base URL of the local thumbnail server.
+        Thumbnails are requested as `<base_url>/<content hash digest>?size=<px>`.
+
+        :return: The base URL, or None if the server is not running.
+        """
+        return self._app.thumbnail_server.base_url
+
+    def get_paste_stats(self) -> dict:
+        """
+        Reports paste latency per data type and the DIB cache hit rate.
+
+        :return: A dictionary with `latency` (per type: count, p50_ms, p95_ms, max_ms) and `dib_cache`.
+        """
+        try:
+            latency = {data_type: metrics.summary(f"paste_{data_type}") for data_type in ('text', 'image', 'files')}
+            return {"success": True, "latency": latency, "dib_cache": dib_cache.stats()}
+        except Exception as e:
+            logging.error(f"API Error in get_paste_stats: {e}")
+            return {"success": False, "error": str(e)}
+
+    def get_tagging_stats(self) -> dict:
+        """
+        Reports AI tagging activity, including how many clips the local classifier tagged without the LLM.
+
+        :return: A dictionary with queue counters and `local` (rule_hits, model_hits, escalations, hit_rate).
+        """
+        try:
+            return {"success": True, **self._app.tagging_queue.stats()}
+        except Exception as e:
+            logging.error(f"API Error in get_tagging_stats: {e}")
+            return {"success": False, "error": str(e)}
+
+    def get_cache_stats(self) -> dict:
+        """
+        Reports hit/miss statistics of the in-memory caches.
+
+        :return: A dictionary with `recent_history`, `thumbnails` and `dib` cache stats.
+        """
+        try:
+            return {"success": True, "recent_history": database.get_recent_cache_stats(),
+                    "thumbnails": self._app.thumbnail_server.stats(), "dib": dib_cache.stats()}
+        except Exception as e:
+            logging.error(f"API Error in get_cache_stats: {e}")
+            return {"success": False, "error": str(e)}
+
+    def get_metrics(self, format: str = "json") -> dict:
+        """
+        Reports the hot-path timers (clipboard read, hashing, image encode, database,
+        search, bridge calls, AI classification) and counters.
+
+        :param format: "json" for per-timer count, p50/p95/max and totals, or "prometheus"
+                       for the text exposition format (also written to METRICS_DUMP_PATH).
+        :return: A dictionary with `metrics`, or `text` in prometheus format.
+        """
+        try:
+            if format == "prometheus":
+                return {"success": True, "text": metrics.prometheus_text()}
+            return {"success": True, "metrics": metrics.snapshot()}
+        except Exception as e:
+            logging.error(f"API Error in get_metrics: {e}")
+            return {"success": False, "error": str(e)}
+
+    def notify_window_blur(self) -> dict:
+        """
+        Reports that the window lost focus (the frontend's window blur event).
+        Only acted on where no native focus watcher is available.
+
+        :return: A dictionary indicating success.
+        """
+        watcher = self._app.focus_watcher
+        if watcher.uses_blur_events:
+            watcher.notify_focus_lost('blur')
+        return {"success": True}
+
+    def get_startup_report(self) -> dict:
+        """
+        Reports how long each startup phase took, measured from process start.
+
+        :return: A dictionary with `phases` (name, ms), `hotkey_ready_ms`, `target_ms` and `within_target`.
+        """
+        return {"success": True, **startup.report()}
+
     def toggle_favorite(self, item_id: int) -> dict:
         """
         Toggles the favorite status of an item.
@@ -62,7 +244,8 @@ class Api:
         """
         logging.info(f"API: toggle_favorite called for ID {item_id}")
         try:
-            database.toggle_favorite(item_id)
+            with metrics.timer('api_toggle_favorite'):
+                database.toggle_favorite(item_id)
             return {"success": True}
         except Exception as e:
             logging.error(f"API Error in toggle_favorite: {e}")
@@ -78,7 +261,8 @@ class Api:
         """
         logging.info(f"API: delete_item called for ID {item_id}")
         try:
-            database.delete_entry(item_id) 
+            with metrics.timer('api_delete_item'):
+                database.delete_entry(item_id)
             return {"success": True}
         except Exception as e:
             logging.error(f"API Error in delete_item: {e}")
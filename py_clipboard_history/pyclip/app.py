@@ -1,19 +1,21 @@
 import logging
 import json
 import threading
+import time
 import os
-import ctypes
-from datetime import datetime
-from PIL import Image
-from pystray import Icon as pystray_icon, Menu as pystray_menu, MenuItem as pystray_menu_item
-from pynput import keyboard
-from pynput.mouse import Controller as MouseController
-from screeninfo import get_monitors
 
 from . import database
 from . import config
-from . import ai_classifier
+from . import clipboard_adapter
+from . import blob_store
+from . import image_codec
+from . import metrics
+from . import startup
+from .log_setup import log_throttled
 from .clipboard_monitor import ClipboardMonitor
+from .ui_events import UiEventChannel
+from .display_geometry import DisplayGeometry, place_window
+from .focus_watcher import FocusWatcher, create_focus_watcher
 
 class ClipboardApp:
     def __init__(self):
@@ -23,17 +25,105 @@ class ClipboardApp:
         self.settings = {}
         self.window = None # Reference to pywebview window
         self.is_window_visible = True # Track visibility state
-        self.focus_monitor_thread = None  # 新增：失焦监听线程
-        self.focus_monitor_running = False  # 新增：控制监听线程运行
+        self.display_geometry = DisplayGeometry(config.DISPLAY_GEOMETRY_TTL_SECONDS)
+        self._window_hwnd = None
+        self._window_minimized = None # None until the window reports minimize/restore events
+        self._mouse = None
+        # Auto-hide on focus loss; blur events only until the platform watcher is set up in _start_deferred
+        self.focus_watcher = FocusWatcher(self.hide_window)
+        # Database changes are pushed to the frontend as batched deltas
+        self.ui_events = UiEventChannel()
+        database.add_change_listener(self.ui_events.publish)
+        self.clipboard_backend = clipboard_adapter.get_backend()
+        # The image pipeline, thumbnail server and tagging queue are created by
+        # _start_deferred, or on first use if something needs them sooner
+        self._subsystems_lock = threading.Lock()
+        self._image_pipeline = None
+        self._thumbnail_server = None
+        self._tagging_queue = None
+        self._metrics_stop = threading.Event()
 
         self.load_settings()
-        
-        self.start_monitoring()
-        self.setup_tray_icon()
+
+        # Only the hotkey and the monitor are started inline; the tray icon and
+        # the rest wait for a background thread so the hotkey is live sooner
         self.start_hotkey_listener()
+        startup.mark('hotkey_ready')
+        self.start_monitoring()
+        startup.mark('monitor_started')
+        threading.Thread(target=self._start_deferred, name="deferred-startup", daemon=True).start()
+
+    def _start_deferred(self):
+        """Starts the subsystems nothing waits for at launch."""
+        try:
+            for name in ('image_pipeline', 'thumbnail_server', 'tagging_queue'):
+                getattr(self, name)  # The properties create them
+            startup.mark('subsystems_ready')
+        except Exception as e:
+            logging.error(f"Failed to start background subsystems: {e}", exc_info=True)
+        try:
+            self.setup_tray_icon()
+            startup.mark('tray_ready')
+        except Exception as e:
+            logging.error(f"Failed to create tray icon: {e}", exc_info=True)
+        metrics.start_periodic_dump(self._metrics_stop)
+        watcher = create_focus_watcher(self.hide_window, self.get_window_handle)
+        previous, self.focus_watcher = self.focus_watcher, watcher
+        if self.is_window_visible:
+            watcher.arm()
+        previous.close()
+        # Warm what the first hotkey press and image capture would otherwise pay for
+        try:
+            self.display_geometry.get()
+            self._mouse_position()
+        except Exception as e:
+            logging.warning(f"Failed to pre-load display geometry: {e}")
+        try:
+            import PIL.Image
+        except ImportError:
+            pass
+        startup.mark('deferred_done')
+
+    @property
+    def image_pipeline(self):
+        with self._subsystems_lock:
+            if self._image_pipeline is None:
+                from .image_pipeline import ImagePersistencePipeline
+                self._image_pipeline = ImagePersistencePipeline(config.IMAGE_WORKERS, config.IMAGE_QUEUE_SIZE)
+            return self._image_pipeline
+
+    @property
+    def thumbnail_server(self):
+        with self._subsystems_lock:
+            if self._thumbnail_server is None:
+                from .thumbnail_server import ThumbnailServer
+                server = ThumbnailServer(config.THUMBNAIL_CACHE_BYTES)
+                server.start()
+                self._thumbnail_server = server
+            return self._thumbnail_server
+
+    @property
+    def tagging_queue(self):
+        with self._subsystems_lock:
+            if self._tagging_queue is None:
+                from .tagging_queue import TaggingQueue
+                from .local_classifier import LocalClassifier  # Loads the trained tag model from disk
+                self._tagging_queue = TaggingQueue(
+                    lambda: self.settings, config.AI_TAGGING_QUEUE_SIZE, config.AI_TAGGING_BATCH_SIZE,
+                    config.AI_TAGGING_BATCH_WAIT_SECONDS, config.AI_REQUESTS_PER_MINUTE, config.AI_REQUEST_BURST,
+                    config.AI_MAX_RETRIES, LocalClassifier(config.LOCAL_CLASSIFIER_MIN_CONFIDENCE)
+                )
+            return self._tagging_queue
 
     def set_window(self, window):
         self.window = window
+        self._window_hwnd = None
+        self.ui_events.set_window(window)
+        events = getattr(window, 'events', None)
+        if events is not None and hasattr(events, 'minimized') and hasattr(events, 'restored'):
+            self._window_minimized = False
+            events.minimized += lambda: setattr(self, '_window_minimized', True)
+            events.restored += lambda: setattr(self, '_window_minimized', False)
 
     def load_settings(self):
         DEFAULT_SETTINGS = {
@@ -65,7 +155,7 @@ class ClipboardApp:
             json.dump(self.settings, f, indent=4)
 
     def start_monitoring(self):
-        self.monitor_thread = ClipboardMonitor(self.on_new_clipboard_item)
+        self.monitor_thread = ClipboardMonitor(self.on_new_clipboard_item, self.clipboard_backend)
         self.monitor_thread.start()
 
     def on_new_clipboard_item(self, item):
@@ -77,48 +167,34 @@ class ClipboardApp:
             content = clip_data['data']
             new_id = database.add_entry(data_type=item_type, content=content, content_hash=content_hash)
             if new_id and self.settings.get('enable_ai_tagging'):
-                threading.Thread(target=self._run_ai_classification, args=(new_id, content), daemon=True).start()
+                self.tagging_queue.submit(new_id, content_hash, content)
         elif item_type == 'IMAGE':
-            image = clip_data['data']
+            clipboard_image = clip_data['data']
             try:
-                original_width, original_height = image.width, image.height
-                preview = f"[Image] {original_width}x{original_height} PNG"
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S%f')
-                full_size_path = config.IMAGE_STORAGE_PATH / f"img_{timestamp}.png"
-                thumb_path = config.IMAGE_STORAGE_PATH / "thumbnails" / f"thumb_{timestamp}.png"
-                thumb_image = image.copy()
-                thumb_image.thumbnail(config.THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
-                thumb_image.save(thumb_path, 'PNG')
-                image.save(full_size_path, 'PNG')
-                new_id = database.add_entry(data_type=item_type, content=str(full_size_path), content_hash=content_hash, preview=preview, thumbnail_path=str(thumb_path))
+                # The size comes from the image header; decoding and encoding
+                # happen on the image pipeline's worker threads.
+                original_width, original_height = clipboard_image.dimensions()
+                codec = image_codec.choose_codec(original_width, original_height)
+                full_size_path, _ = blob_store.blob_paths(content_hash, image_codec.extension(codec))
+                # Always inserted as pending, even if the blob exists: the pipeline reuses it
+                # once this row holds a reference, so a concurrent delete can't release it
+                preview = image_codec.preview(original_width, original_height, codec)
+                new_id = database.add_entry(data_type=item_type, content=str(full_size_path), content_hash=content_hash, preview=preview, is_pending=True)
+                if new_id:
+                    self.image_pipeline.submit(new_id, content_hash, clipboard_image, codec)
             except Exception as e:
-                logging.error(f"Failed to save image and thumbnail.", exc_info=True)
+                logging.error(f"Failed to queue image for saving.", exc_info=True)
         elif item_type == 'FILES':
             file_paths = clip_data['data']
             content = "\n".join(file_paths)
             if len(file_paths) == 1: preview = f"[File] {os.path.basename(file_paths[0])}"
             else: preview = f"[Files] {os.path.basename(file_paths[0])} (+{len(file_paths) - 1} more)"
             new_id = database.add_entry(data_type=item_type, content=content, content_hash=content_hash, preview=preview)
-        
-        if new_id and self.window:
-            # Notify frontend to reload history
-            try:
-                self.window.evaluate_js('if(window.app) window.app.loadHistory();')
-            except Exception as e:
-                logging.error(f"Failed to update frontend: {e}")
-
-    def _run_ai_classification(self, entry_id: int, text_content: str):
-        tags = ai_classifier.classify_and_tag(text_content, self.settings)
-        if tags:
-            database.update_entry_tags(entry_id, tags)
-            if self.window:
-                try:
-                    self.window.evaluate_js('if(window.app) window.app.loadHistory();')
-                except Exception as e:
-                    logging.error(f"Failed to update frontend after AI tagging: {e}")
+        # The frontend is updated through the item_added event pushed by self.ui_events
 
     def start_hotkey_listener(self):
         try:
+            from pynput import keyboard
             show_hotkey_str = "<ctrl>+<alt>+v"
             # show_hotkey_str = "<win>+v"
             key_map = {show_hotkey_str: self.toggle_window}
@@ -129,6 +205,8 @@ class ClipboardApp:
             logging.error(f"Failed to start global hotkey listener: {e}", exc_info=True)
 
     def setup_tray_icon(self):
+        from PIL import Image
+        from pystray import Icon as pystray_icon, Menu as pystray_menu, MenuItem as pystray_menu_item
         try:
             icon_image = Image.open(config.ICON_PATH)
         except FileNotFoundError:
@@ -142,168 +220,83 @@ class ClipboardApp:
 
     def hide_window(self):
         if self.window:
+            self.focus_watcher.disarm()
             self.window.hide()
             self.is_window_visible = False
 
     def show_window(self):
         if self.window:
-            # Get DPI scale
-            try:
-                hdc = ctypes.windll.user32.GetDC(0)
-                dpi = ctypes.windll.gdi32.GetDeviceCaps(hdc, 88) # LOGPIXELSX
-                ctypes.windll.user32.ReleaseDC(0, hdc)
-                scale = dpi / 96.0
-            except:
-                scale = 1.0
-
-            # Get mouse position (physical)
-            mouse = MouseController()
-            mx, my = mouse.position
-            
-            # Get window size (logical)
-            width = self.window.width or 420
-            height = self.window.height or 800
-            
-            # Convert mouse to logical for centering calculation relative to logical window size
-            # Target logical X = (Physical Mouse X / Scale) - (Logical Width / 2)
-            # This assumes pywebview's move() takes logical coordinates
-            
-            # However, screeninfo get_monitors() usually returns physical coordinates.
-            # So we should do boundary checks in physical space, then convert final to logical.
-            
-            physical_width = width * scale
-            physical_height = height * scale
-            
-            # Find which monitor the mouse is on (monitors are physical)
-            target_monitor = None
-            monitors = get_monitors()
-            for m in monitors:
-                if m.x <= mx < m.x + m.width and m.y <= my < m.y + m.height:
-                    target_monitor = m
-                    break
-            
-            if not target_monitor:
-                target_monitor = monitors[0] # Fallback
-                
-            # Calculate target physical position (center horizontally on mouse, top at mouse y)
-            # The user complained it was "too far", implying the previous logic placed it far away.
-            # Previous logic: new_x = mx - width/2. If mx=1000, width=420. new_x=790.
-            # If passed to move(790), and system scales it by 1.5 -> 1185.
-            # Mouse at 1000. Window at 1185. Gap of 185.
-            
-            target_physical_x = mx - (physical_width / 2)
-            target_physical_y = my
-            
-            # Boundary checks in physical space
-            # Right edge
-            if target_physical_x + physical_width > target_monitor.x + target_monitor.width:
-                target_physical_x = target_monitor.x + target_monitor.width - physical_width
-            # Left edge
-            if target_physical_x < target_monitor.x:
-                target_physical_x = target_monitor.x
-            # Bottom edge
-            if target_physical_y + physical_height > target_monitor.y + target_monitor.height:
-                target_physical_y = target_monitor.y + target_monitor.height - physical_height
-            # Top edge
-            if target_physical_y < target_monitor.y:
-                target_physical_y = target_monitor.y
-                
-            # Convert to logical coordinates for pywebview
-            final_logical_x = int(target_physical_x / scale)
-            final_logical_y = int(target_physical_y / scale)
-                
-            self.window.move(final_logical_x, final_logical_y)
-            self.window.show()
-            self.window.restore() # Ensure it's not minimized
-            self.is_window_visible = True
+            with metrics.timer('window_show'):
+                # Geometry and the mouse controller are cached; nothing here enumerates monitors or windows
+                scale, monitors = self.display_geometry.get()
+                mx, my = self._mouse_position()
+                width = self.window.width or 420
+                height = self.window.height or 800
+                x, y = place_window(mx, my, width, height, scale, monitors)
+                self.window.move(x, y)
+                self.window.show()
+                if self._window_minimized is not False:
+                    self.window.restore() # Ensure it's not minimized (always, if minimize events aren't available)
+                self.is_window_visible = True
             # 启动失焦监听
-            self.start_focus_monitor()
+            self.focus_watcher.arm()
+
+    def _mouse_position(self) -> tuple[int, int]:
+        """Physical cursor position."""
+        if self._mouse is None:
+            from pynput.mouse import Controller as MouseController
+            self._mouse = MouseController()
+        return self._mouse.position
 
     def get_window_handle(self):
-        """获取 pywebview 窗口的 Windows 句柄"""
+        """获取 pywebview 窗口的 Windows 句柄 (cached while the window exists)"""
         try:
             import win32gui
-            # 尝试通过窗口标题查找
-            def callback(hwnd, hwnds):
-                if win32gui.IsWindowVisible(hwnd):
-                    title = win32gui.GetWindowText(hwnd)
-                    if "PyClipboardHistory" in title:  # pywebview 窗口标题
-                        hwnds.append(hwnd)
-                return True
-            
-            hwnds = []
-            win32gui.EnumWindows(callback, hwnds)
-            return hwnds[0] if hwnds else None
-        except:
+            if self._window_hwnd and win32gui.IsWindow(self._window_hwnd):
+                return self._window_hwnd
+            hwnd = None
+            native = getattr(self.window, 'native', None)  # WinForms Form on the Windows backends
+            if native is not None and hasattr(native, 'Handle'):
+                hwnd = native.Handle.ToInt32()
+            if not hwnd:
+                hwnd = win32gui.FindWindow(None, getattr(self.window, 'title', None) or "PyClipboardHistory")
+            self._window_hwnd = hwnd or None
+            return self._window_hwnd
+        except Exception:
             return None
 
-    def start_focus_monitor(self):
-        """启动失焦监听线程"""
-        if not self.focus_monitor_running:
-            self.focus_monitor_running = True
-            self.focus_monitor_thread = threading.Thread(target=self._focus_monitor_loop, daemon=True)
-            self.focus_monitor_thread.start()
-            logging.info("Focus monitor started")
-
-    def stop_focus_monitor(self):
-        """停止失焦监听线程"""
-        self.focus_monitor_running = False
-        if self.focus_monitor_thread:
-            self.focus_monitor_thread.join(timeout=1.0)
-            self.focus_monitor_thread = None
-            logging.info("Focus monitor stopped")
-
-    def _focus_monitor_loop(self):
-        """失焦监听循环（轮询方式）"""
-        import time
-        try:
-            import win32gui
-        except ImportError:
-            logging.error("pywin32 not installed, focus monitor disabled")
-            return
-
-        last_check_visible = self.is_window_visible
-        window_hwnd = None
-
-        while self.focus_monitor_running:
-            try:
-                if self.is_window_visible and self.window:
-                    # 如果窗口可见，检查是否失去焦点
-                    if window_hwnd is None:
-                        window_hwnd = self.get_window_handle()
-                    
-                    if window_hwnd:
-                        foreground_hwnd = win32gui.GetForegroundWindow()
-                        if foreground_hwnd != window_hwnd:
-                            # 窗口失去焦点，隐藏窗口
-                            logging.info("Window lost focus, hiding...")
-                            self.hide_window()
-                            self.stop_focus_monitor()  # 隐藏后停止监听
-                            window_hwnd = None  # 重置句柄
-                else:
-                    # 窗口不可见，重置句柄
-                    window_hwnd = None
-                
-                last_check_visible = self.is_window_visible
-                time.sleep(0.2)  # 每 200ms 检查一次
-            except Exception as e:
-                logging.error(f"Focus monitor error: {e}")
-                time.sleep(1.0)  # 错误时等待更长时间
-
     def toggle_window(self):
         if self.window:
             if self.is_window_visible:
                 self.hide_window()
             else:
+                start = time.perf_counter()
                 self.show_window()
+                elapsed = time.perf_counter() - start
+                metrics.observe('hotkey_to_visible', elapsed)
+                if elapsed > config.WINDOW_SHOW_BUDGET_SECONDS:
+                    log_throttled(logging.WARNING, 'slow_window_show',
+                                  f"Showing the window took {elapsed * 1000:.1f}ms (budget {config.WINDOW_SHOW_BUDGET_SECONDS * 1000:.1f}ms).")
 
     def quit_application(self):
         if self.hotkey_listener and self.hotkey_listener.is_alive():
             self.hotkey_listener.stop()
         if self.monitor_thread and self.monitor_thread.is_alive():
             self.monitor_thread.stop()
-        self.stop_focus_monitor()  # 停止失焦监听
+        self.focus_watcher.close()  # 停止失焦监听
+        # Only the subsystems that were started; the properties would create them
+        for subsystem in (self._image_pipeline, self._thumbnail_server, self._tagging_queue):
+            if subsystem is not None:
+                subsystem.stop()
+        self.ui_events.close()
+        self._metrics_stop.set()
+        if metrics.enabled:
+            try:
+                metrics.dump()
+            except OSError as e:
+                logging.warning(f"Failed to write metrics dump: {e}")
         if self.tray_icon:
             self.tray_icon.stop()
+        database.close_connections()
         if self.window:
             self.window.destroy()
\ No newline at end of file
@@ -0,0 +1,346 @@
+"""
+Headless benchmark for the capture, search and list paths.
+
+Each history size runs in its own subprocess against a throwaway storage
+directory, so peak RSS is per size and runs never touch the real history:
+
+    python -m pyclip.benchmark --sizes 1000 10000 100000 --out bench.json
+    python -m pyclip.benchmark --compare before.json after.json
+
+A run seeds a synthetic history (text/image/file mix, fixed seed), then
+measures capture-to-commit latency by feeding the clipboard monitor through
+the in-memory backend, search latency (p50/p99) per query length, the JSON
+size of list payloads and the peak RSS of the process. Image captures also go
+through the image pipeline when Pillow is installed.
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import sqlite3
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+
+from . import config
+
+WORDS = ("error request response config value update build deploy server client cache "
+         "python import return class function query select table index commit branch merge "
+         "meeting notes draft review invoice address report summary schedule project").split()
+TEXT_SHARE, IMAGE_SHARE = 0.7, 0.15  # The rest are FILES rows
+QUERY_LENGTHS = (2, 4, 8, 16)
+
+def _percentile(samples: list[float], p: float) -> float | None:
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 3)
+
+def _peak_rss_kb() -> int | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset // 1024
+        except (ImportError, AttributeError):
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # bytes on macOS, KB elsewhere
+
+def _random_text(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.6:
+        length = rng.randint(3, 30)  # A sentence or two
+    elif kind < 0.95:
+        length = rng.randint(30, 400)  # A snippet of code or a paragraph
+    else:
+        length = rng.randint(2000, 12000)  # A log or file dump
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+def seed_history(rows: int, rng: random.Random):
+    """Bulk-inserts a synthetic history of `rows` entries spread over the last 90 days."""
+    from . import database, hashing, blob_store
+
+    now = time.time()
+    batch = []
+    for i in range(rows):
+        roll = rng.random()
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now - (rows - i) * 90 * 86400 / rows))
+        if roll < TEXT_SHARE:
+            content = _random_text(rng) + f" #{i}"
+            preview = content[:config.PREVIEW_MAX_LEN]
+            batch.append(("TEXT", content, preview, None, hashing.content_hash(content.encode()), timestamp))
+        elif roll < TEXT_SHARE + IMAGE_SHARE:
+            content_hash = hashing.content_hash(f"image {i}".encode())
+            full_path, thumb_path = (str(p) for p in blob_store.blob_paths(content_hash))
+            preview = f"[Image] {rng.randint(200, 2560)}x{rng.randint(200, 1440)} PNG"
+            batch.append(("IMAGE", full_path, preview, thumb_path, content_hash, timestamp))
+        else:
+            paths = [f"C:\\Users\\bench\\{rng.choice(WORDS)}_{i}_{n}.txt" for n in range(rng.randint(1, 4))]
+            content = "\n".join(paths)
+            batch.append(("FILES", content, f"[Files] {len(paths)} items", None,
+                          hashing.content_hash(content.encode()), timestamp))
+    with database._get_pool().writer() as conn:
+        cursor = conn.cursor()
+        for data_type, content, preview, thumb_path, content_hash, timestamp in batch:
+            # Large text is stored the way add_entry stores it: compressed, with a searchable excerpt
+            compress = data_type == 'TEXT' and len(content) > config.TEXT_COMPRESSION_THRESHOLD
+            cursor.execute(
+                "INSERT INTO clipboard_history (data_type, content, content_length, preview, thumbnail_path, content_hash, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (data_type, content[:config.TEXT_SEARCH_EXCERPT_LEN] if compress else content, len(content),
+                 preview, thumb_path, content_hash, timestamp)
+            )
+            if compress:
+                database._compress_text_content(cursor, cursor.lastrowid, content)
+    database._recent_cache.invalidate()
+
+def _synthetic_screenshot(rng: random.Random):
+    """A PNG-encoded ClipboardImage with flat blocks and text-like noise, or None without Pillow."""
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        return None
+    from .clipboard_adapter import ClipboardImage
+    image = Image.new("RGB", (1280, 800), "white")
+    draw = ImageDraw.Draw(image)
+    for _ in range(20):
+        x, y = rng.randint(0, 1200), rng.randint(0, 760)
+        draw.rectangle((x, y, x + rng.randint(20, 300), y + rng.randint(10, 120)),
+                       fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    for line in range(0, 800, 18):
+        draw.text((10, line), " ".join(rng.choice(WORDS) for _ in range(12)), fill="black")
+    with io.BytesIO() as buffer:
+        image.save(buffer, "PNG")
+        return ClipboardImage(buffer.getvalue(), "PNG")
+
+def measure_capture(rng: random.Random, captures: int) -> dict:
+    """Feeds clips through the fake clipboard and the monitor; times clipboard change -> row committed."""
+    from . import database, blob_store, hashing, image_codec
+    from .clipboard_adapter import ClipboardImage
+    from .clipboard_fake import FakeClipboardBackend
+    from .clipboard_monitor import ClipboardMonitor
+    from .image_pipeline import ImagePersistencePipeline
+
+    backend = FakeClipboardBackend()
+    pipeline = ImagePersistencePipeline(config.IMAGE_WORKERS, config.IMAGE_QUEUE_SIZE)
+    started, committed, persisted = {}, {}, {}
+    done = threading.Event()
+
+    def on_change(event_type, payload):
+        if event_type == 'item_added':
+            committed[payload['item']['content_hash']] = time.perf_counter()
+        elif event_type == 'item_updated' and payload.get('is_pending') == 0:
+            persisted[payload['id']] = time.perf_counter()
+            done.set()
+    database.add_change_listener(on_change)
+
+    pending_ids = {}
+    def on_new_item(item):
+        # Mirrors ClipboardApp.on_new_clipboard_item without the UI and tagging
+        clip_data, content_hash = item['data'], item['hash']
+        if clip_data['type'] == 'IMAGE':
+            width, height = clip_data['data'].dimensions()
+            codec = image_codec.choose_codec(width, height)
+            full_path, _ = blob_store.blob_paths(content_hash, image_codec.extension(codec))
+            new_id = database.add_entry('IMAGE', str(full_path), content_hash, image_codec.preview(width, height, codec),
+                                        is_pending=True)
+            if new_id:
+                pending_ids[new_id] = content_hash
+                pipeline.submit(new_id, content_hash, clip_data['data'], codec)
+        elif clip_data['type'] == 'FILES':
+            database.add_entry('FILES', "\n".join(clip_data['data']), content_hash, "[Files]")
+        else:
+            database.add_entry('TEXT', clip_data['data'], content_hash)
+
+    monitor = ClipboardMonitor(on_new_item, backend)
+    monitor.start()
+    image = _synthetic_screenshot(rng)
+    image_hashes = []
+    for i in range(captures):
+        if image is not None and i % 10 == 5:
+            # A fresh buffer each time (trailing bytes after IEND are ignored), so it is not deduplicated away
+            clip_image = ClipboardImage(image.raw + i.to_bytes(4, 'little'), 'PNG')
+            content_hash = hashing.hash_clip_data({'type': 'IMAGE', 'data': clip_image})
+            image_hashes.append(content_hash)
+            started[content_hash] = time.perf_counter()
+            backend.set_image(clip_image)
+        else:
+            text = _random_text(rng) + f" capture {i}"
+            started[hashing.hash_clip_data({'type': 'TEXT', 'data': text})] = time.perf_counter()
+            backend.set_text(text)
+        time.sleep(config.CHANGE_POLL_INTERVAL_SECONDS * 2)
+    deadline = time.time() + 30
+    while len(persisted) < len(image_hashes) and time.time() < deadline:
+        done.wait(0.5)
+        done.clear()
+    monitor.stop()
+    pipeline.stop()
+
+    commit_latency = [committed[h] - t for h, t in started.items() if h in committed]
+    persist_latency = [persisted[i] - started[h] for i, h in pending_ids.items() if i in persisted and h in started]
+    return {
+        'captures': captures,
+        'committed': len(commit_latency),
+        'commit_p50_ms': _percentile(commit_latency, 0.5),
+        'commit_p99_ms': _percentile(commit_latency, 0.99),
+        'image_persist_p50_ms': _percentile(persist_latency, 0.5),
+        'image_persist_p99_ms': _percentile(persist_latency, 0.99),
+        'poll_interval_ms': config.CHANGE_POLL_INTERVAL_SECONDS * 1000,
+    }
+
+def measure_search(rng: random.Random, repeats: int) -> dict:
+    """Search latency per query length, through database.get_history_page."""
+    from . import database
+
+    results = {}
+    for length in QUERY_LENGTHS:
+        samples = []
+        for _ in range(repeats):
+            words, query = [], ""
+            while len(query) < length:
+                words.append(rng.choice(WORDS))
+                query = " ".join(words)
+            query = query[:length].strip()
+            start = time.perf_counter()
+            database.get_history_page(None, 50, None, query)
+            samples.append(time.perf_counter() - start)
+        results[str(length)] = {'p50_ms': _percentile(samples, 0.5), 'p99_ms': _percentile(samples, 0.99)}
+    return results
+
+def measure_list(repeats: int) -> dict:
+    """Latency and JSON payload size of the list as the frontend requests it through the Api."""
+    from .api import Api
+
+    api = Api(None)
+    results = {}
+    cases = {
+        'first_page': dict(cursor=None, filter_type="All Types", search_query=""),
+        'text_filter': dict(cursor=None, filter_type="TEXT", search_query=""),
+        'search': dict(cursor=None, filter_type="All Types", search_query="error"),
+    }
+    for name, kwargs in cases.items():
+        samples, payload_bytes = [], 0
+        for _ in range(repeats):
+            start = time.perf_counter()
+            payload = json.dumps(api.get_history_page(page_size=50, **kwargs))
+            samples.append(time.perf_counter() - start)
+            payload_bytes = len(payload.encode('utf-8'))
+        results[name] = {'p50_ms': _percentile(samples, 0.5), 'p99_ms': _percentile(samples, 0.99),
+                         'payload_bytes': payload_bytes}
+    return results
+
+def run_size(rows: int, seed: int, captures: int, repeats: int) -> dict:
+    """Runs every measurement against a fresh history of `rows` entries. Meant to run in its own process."""
+    from . import database
+
+    with tempfile.TemporaryDirectory(prefix="pyclip-bench-", ignore_cleanup_errors=True) as storage:
+        storage = Path(storage)
+        config.DB_PATH = storage / "clipboard.db"
+        config.IMAGE_STORAGE_PATH = storage / "images"
+        config.LOCAL_MODEL_PATH = storage / "tag_model.json"
+        config.MAX_HISTORY_ITEMS = rows + captures + 1  # Pruning would skew the sizes
+        try:
+            rng = random.Random(seed)
+            database.init_db()
+            start = time.perf_counter()
+            seed_history(rows, rng)
+            seed_seconds = time.perf_counter() - start
+
+            result = {
+                'rows': rows,
+                'seed_seconds': round(seed_seconds, 2),
+                'capture': measure_capture(rng, captures),
+                'search': measure_search(rng, repeats),
+                'list': measure_list(repeats),
+            }
+        finally:
+            # Closing the last connection checkpoints the WAL into the database file
+            database.close_connections()
+        wal_path = config.DB_PATH.with_name(config.DB_PATH.name + "-wal")
+        result['db_bytes'] = sum(p.stat().st_size for p in (config.DB_PATH, wal_path) if p.exists())
+    result['peak_rss_kb'] = _peak_rss_kb()
+    return result
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def _flatten(prefix: str, value, out: dict):
+    if isinstance(value, dict):
+        for key, sub in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else key, sub, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+
+def compare(before_path: str, after_path: str):
+    """Prints every numeric metric side by side with its relative change."""
+    before, after = ({}, {})
+    _flatten("", json.loads(Path(before_path).read_text())['results'], before)
+    _flatten("", json.loads(Path(after_path).read_text())['results'], after)
+    print(f"{'metric':<48} {'before':>12} {'after':>12} {'change':>8}")
+    for key in sorted(set(before) | set(after)):
+        old, new = before.get(key), after.get(key)
+        change = f"{(new - old) / old * 100:+.1f}%" if old and new is not None else ""
+        print(f"{key:<48} {old if old is not None else '-':>12} {new if new is not None else '-':>12} {change:>8}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pyclip.benchmark", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--captures", type=int, default=40)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--out", default="benchmark.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    parser.add_argument("--run-size", type=int, help=argparse.SUPPRESS)  # Internal: one size, JSON on stdout
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+    if args.run_size is not None:
+        print(json.dumps(run_size(args.run_size, args.seed, args.captures, args.repeats)))
+        return 0
+
+    results = {}
+    for rows in args.sizes:
+        print(f"Benchmarking {rows} rows...", file=sys.stderr)
+        proc = subprocess.run(
+            [sys.executable, "-m", "pyclip.benchmark", "--run-size", str(rows), "--seed", str(args.seed),
+             "--captures", str(args.captures), "--repeats", str(args.repeats)],
+            capture_output=True, text=True, cwd=Path(__file__).parent.parent
+        )
+        if proc.returncode != 0:
+            print(proc.stderr, file=sys.stderr)
+            return 1
+        results[str(rows)] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    Path(args.out).write_text(json.dumps(report, indent=2))
+    print(f"Wrote {args.out}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
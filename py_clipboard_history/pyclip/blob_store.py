@@ -0,0 +1,138 @@
+"""
+Content-addressed storage for captured images.
+
+Each distinct image is stored once, named after its content hash and sharded by
+the first two hex digits:
+
+    images/blobs/ab/abcdef....webp       full-size image (see image_codec)
+    images/thumbnails/ab/abcdef....png   thumbnail, always PNG
+    images/dib/ab/abcdef....dib          cached raw DIB for pasting (see dib_cache)
+
+History rows reference a blob through their `content_hash`; a blob is only
+removed once no IMAGE row references that hash any more (see
+database._collect_unreferenced_images). `python -m pyclip.blob_store` verifies
+the store and garbage-collects orphaned files.
+"""
+import os
+import sys
+import logging
+import argparse
+from pathlib import Path
+
+from . import config
+from . import hashing
+
+def blobs_dir() -> Path:
+    return Path(config.IMAGE_STORAGE_PATH) / "blobs"
+
+def thumbnails_dir() -> Path:
+    return Path(config.IMAGE_STORAGE_PATH) / "thumbnails"
+
+def dib_dir() -> Path:
+    return Path(config.IMAGE_STORAGE_PATH) / "dib"
+
+def _digest(content_hash: str) -> str:
+    # Strip the algorithm prefix ("b2:") so the digest is a valid file name
+    return content_hash.rsplit(':', 1)[-1]
+
+def blob_paths(content_hash: str, extension: str = "png") -> tuple[Path, Path]:
+    """Returns the (full-size, thumbnail) paths for a content hash."""
+    digest = _digest(content_hash)
+    return blobs_dir() / digest[:2] / f"{digest}.{extension}", thumbnails_dir() / digest[:2] / f"{digest}.png"
+
+def hash_for_path(path) -> str:
+    """The content hash a blob path was named after."""
+    return hashing.HASH_PREFIX + Path(path).stem
+
+def blob_files(content_hash: str) -> list[Path]:
+    """All files currently stored for a content hash, whatever their extension."""
+    digest = _digest(content_hash)
+    files = []
+    for root in (blobs_dir(), thumbnails_dir(), dib_dir()):
+        files.extend((root / digest[:2]).glob(f"{digest}.*"))
+    return files
+
+def is_blob_path(path) -> bool:
+    """True if `path` points into the content-addressed blob directory."""
+    try:
+        return Path(path).resolve().is_relative_to(blobs_dir().resolve())
+    except (TypeError, ValueError, OSError):
+        return False
+
+def find_blob(content_hash: str) -> Path | None:
+    """The stored full-size image for a content hash, whatever codec wrote it."""
+    digest = _digest(content_hash)
+    return next((blobs_dir() / digest[:2]).glob(f"{digest}.*"), None)
+
+def exists(content_hash: str) -> bool:
+    """True if both the full-size image and the thumbnail are already stored."""
+    _, thumb_path = blob_paths(content_hash)
+    return find_blob(content_hash) is not None and thumb_path.exists()
+
+def write_atomic(path: Path, save):
+    """
+    Calls save(tmp_path) and moves the result into place, so concurrent writers
+    of the same blob never leave a half-written file behind.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{id(save):x}.tmp")
+    try:
+        save(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+def collect_garbage(referenced_hashes: set[str], referenced_paths: set[str], dry_run: bool = False) -> dict:
+    """
+    Removes image files that no history row references: blobs whose hash is not
+    in `referenced_hashes`, and legacy files (from before the blob store) whose
+    path is not in `referenced_paths`. Returns a report of what was found.
+    """
+    referenced_digests = {_digest(h) for h in referenced_hashes if h}
+    referenced_paths = {str(Path(p).resolve()) for p in referenced_paths if p}
+    orphaned, freed_bytes = [], 0
+    storage_root = Path(config.IMAGE_STORAGE_PATH)
+    if not storage_root.exists():
+        return {'orphaned_files': [], 'freed_bytes': 0}
+
+    for path in storage_root.rglob("*"):
+        if not path.is_file() or path.suffix == ".tmp":
+            continue
+        if path.is_relative_to(blobs_dir()) or path.is_relative_to(dib_dir()) or path.parent.parent == thumbnails_dir():
+            is_orphan = path.stem not in referenced_digests
+        else:
+            is_orphan = str(path.resolve()) not in referenced_paths
+        if is_orphan:
+            orphaned.append(str(path))
+            freed_bytes += path.stat().st_size
+            if not dry_run:
+                path.unlink(missing_ok=True)
+
+    logging.info(f"Blob store GC: {len(orphaned)} orphaned files, {freed_bytes} bytes{' (dry run)' if dry_run else ''}.")
+    return {'orphaned_files': orphaned, 'freed_bytes': freed_bytes}
+
+def main(argv=None):
+    """Command-line entry point: verify the image store and optionally remove orphans."""
+    from . import database
+
+    parser = argparse.ArgumentParser(prog="python -m pyclip.blob_store",
+                                     description="Verify the image store and garbage-collect orphaned files.")
+    parser.add_argument("command", choices=["verify", "gc"],
+                        help="'verify' only reports; 'gc' also deletes orphaned files")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    database.init_db()
+    report = database.verify_image_store(dry_run=(args.command == "verify"))
+    print(f"Missing files:  {len(report['missing_files'])}")
+    for path in report['missing_files']:
+        print(f"  {path}")
+    print(f"Orphaned files: {len(report['orphaned_files'])} ({report['freed_bytes']} bytes)")
+    for path in report['orphaned_files']:
+        print(f"  {path}")
+    database.close_connections()
+    return 1 if report['missing_files'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
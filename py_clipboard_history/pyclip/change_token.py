@@ -0,0 +1,51 @@
+import logging
+from abc import ABC, abstractmethod
+
+from . import config
+from .log_setup import log_throttled
+
+class ChangeTokenSource(ABC):
+    """
+    A cheap way to tell whether the clipboard may have changed, without
+    opening it. The monitor only reads the clipboard when the token changes.
+    """
+    @abstractmethod
+    def current_token(self):
+        """Returns an opaque value that changes whenever the clipboard changes."""
+
+    def wait_for_change(self, last_token, stop_event, poll_interval: float):
+        """
+        Blocks until the token differs from `last_token` or `stop_event` is set,
+        and returns the new token. If the token cannot be read, returns
+        `last_token` after POLLING_INTERVAL_SECONDS, so the caller falls back to
+        a full read per interval. Sources with a real notification mechanism
+        can override this; the default polls `current_token()`.
+        """
+        while not stop_event.is_set():
+            try:
+                token = self.current_token()
+            except Exception as e:
+                # Unknown state: back off to a plain full read every POLLING_INTERVAL_SECONDS,
+                # keeping the last known token so a recovered source doesn't force another read
+                log_throttled(logging.ERROR, 'change_token_failed', f"Failed to read clipboard change token: {e}")
+                stop_event.wait(max(poll_interval, config.POLLING_INTERVAL_SECONDS))
+                return last_token
+            if token != last_token:
+                return token
+            stop_event.wait(poll_interval)
+        return last_token
+
+class BackendTokenSource(ChangeTokenSource):
+    """
+    Reads the token from a ClipboardBackend's change_token(). A backend can set
+    `token_poll_interval` when sampling its token is itself expensive.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+
+    def current_token(self):
+        return self.backend.change_token()
+
+    def wait_for_change(self, last_token, stop_event, poll_interval: float):
+        poll_interval = max(poll_interval, getattr(self.backend, 'token_poll_interval', 0))
+        return super().wait_for_change(last_token, stop_event, poll_interval)
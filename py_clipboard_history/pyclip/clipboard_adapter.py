@@ -1,105 +1,104 @@
-import win32clipboard
-import logging
-from PIL import Image
 import io
+import os
+import sys
+import shutil
+import logging
+from typing import Protocol, runtime_checkable
 
-# Add new supported formats
-CF_UNICODETEXT = 13
-CF_DIB = 8 # Device-Independent Bitmap
-CF_HDROP = 15 # File Drop Handle
-
-def _image_to_dib(image: Image.Image):
-    """Converts a Pillow Image object to a DIB (bytes)."""
-    # When saving as BMP, Pillow writes a file header. We need to strip it.
-    # The DIB format is essentially a BMP file without the initial 14-byte BITMAPFILEHEADER.
-    with io.BytesIO() as buffer:
-        image.save(buffer, "BMP")
-        # The DIB starts after the 14-byte file header
-        return buffer.getvalue()[14:]
+from . import config
 
-def read_clipboard():
+class ClipboardImage:
     """
-    Reads the clipboard, prioritizing Image > Files > Text.
+    An image read from the clipboard, kept as the raw buffer the clipboard
+    handed us ('DIB' on Windows, 'PNG' on Linux). The monitor hashes `raw`
+    directly; the pixels are only decoded by decode(), once the item is known to be new.
     """
-    try:
-        win32clipboard.OpenClipboard()
-        
-        # Priority 1: Image (DIB)
-        if win32clipboard.IsClipboardFormatAvailable(CF_DIB):
-            dib_data = win32clipboard.GetClipboardData(CF_DIB)
-            try:
-                file_header = b'BM' + (len(dib_data) + 14).to_bytes(4, 'little') + b'\x00\x00\x00\x00' + (14 + 40).to_bytes(4, 'little')
-                bmp_data = file_header + dib_data
-                image = Image.open(io.BytesIO(bmp_data))
-                logging.info("Read IMAGE from clipboard.")
-                return {'type': 'IMAGE', 'data': image}
-            except Exception as e:
-                logging.error(f"Failed to parse DIB data from clipboard: {e}")
+    __slots__ = ('raw', 'format', '_image')
 
-        # Priority 2: Files (HDROP)
-        if win32clipboard.IsClipboardFormatAvailable(CF_HDROP):
-            file_paths = win32clipboard.GetClipboardData(CF_HDROP)
-            if file_paths:
-                logging.info(f"Read FILES from clipboard: {file_paths}")
-                return {'type': 'FILES', 'data': list(file_paths)}
+    def __init__(self, raw: bytes, format: str, image=None):
+        self.raw = raw
+        self.format = format
+        self._image = image
 
-        # Priority 3: Text
-        if win32clipboard.IsClipboardFormatAvailable(CF_UNICODETEXT):
-            text_data = win32clipboard.GetClipboardData(CF_UNICODETEXT)
-            if text_data:
-                logging.info("Read TEXT from clipboard.")
-                return {'type': 'TEXT', 'data': text_data}
-        
-        logging.info("No supported format found on clipboard.")
-        return None
+    @classmethod
+    def from_image(cls, image):
+        """Wraps an already decoded PIL image (used by the in-memory backend)."""
+        return cls(image.tobytes(), 'PIL', image)
 
-    except Exception as e:
-        logging.error(f"Could not open or read clipboard: {e}")
-        return None
-    finally:
-        try:
-            win32clipboard.CloseClipboard()
-        except Exception as e:
-            logging.error(f"Error closing clipboard: {e}")
+    def dimensions(self) -> tuple[int, int]:
+        """Returns (width, height) from the image header, without decoding the pixels."""
+        if self.format == 'DIB' and len(self.raw) >= 12:
+            header_size = int.from_bytes(self.raw[0:4], 'little')
+            if header_size == 12:  # BITMAPCOREHEADER
+                return int.from_bytes(self.raw[4:6], 'little'), int.from_bytes(self.raw[6:8], 'little')
+            width = int.from_bytes(self.raw[4:8], 'little', signed=True)
+            height = int.from_bytes(self.raw[8:12], 'little', signed=True)
+            return abs(width), abs(height)  # Negative height means a top-down DIB
+        if self.format == 'PNG' and self.raw[12:16] == b'IHDR':
+            return int.from_bytes(self.raw[16:20], 'big'), int.from_bytes(self.raw[20:24], 'big')
+        return self.decode().size
 
-def write_to_clipboard(clip_data):
+    def decode(self):
+        """Returns the PIL image, decoding the raw buffer on first use."""
+        if self._image is None:
+            from PIL import Image
+            if self.format == 'DIB':
+                # A DIB is a BMP file without its 14-byte BITMAPFILEHEADER
+                file_header = b'BM' + (len(self.raw) + 14).to_bytes(4, 'little') + b'\x00\x00\x00\x00' + (14 + 40).to_bytes(4, 'little')
+                self._image = Image.open(io.BytesIO(file_header + self.raw))
+            else:
+                self._image = Image.open(io.BytesIO(self.raw))
+            self._image.load()
+        return self._image
+
+@runtime_checkable
+class ClipboardBackend(Protocol):
     """
-    Writes data back to the clipboard. Supports TEXT, IMAGE, and FILES (as text).
+    The platform clipboard, as seen by the monitor and the API.
+
+    read() returns {'type': 'TEXT' | 'IMAGE' | 'FILES', 'data': ...} or None,
+    write() takes a full history entry (with 'data_type' and 'content'), and
+    change_token() returns a cheap value that changes whenever the clipboard does.
     """
-    if not clip_data or 'data_type' not in clip_data or 'content' not in clip_data:
-        logging.warning(f"write_to_clipboard called with invalid data: {clip_data}")
-        return
+    def read(self) -> dict | None: ...
 
-    try:
-        win32clipboard.OpenClipboard()
-        win32clipboard.EmptyClipboard()
-        
-        data_type = clip_data['data_type']
-        content = clip_data['content']
+    def write(self, clip_data: dict) -> None: ...
+
+    def change_token(self): ...
+
+def get_backend(name: str | None = None) -> ClipboardBackend:
+    """
+    Creates the clipboard backend named by `name` (or config.CLIPBOARD_BACKEND).
+    "auto" picks Win32 on Windows, then Wayland or X11 command-line tools on Linux,
+    and falls back to the in-memory fake when no real clipboard is reachable.
+    """
+    name = (name or config.CLIPBOARD_BACKEND).lower()
 
-        if data_type == 'TEXT':
-            win32clipboard.SetClipboardData(CF_UNICODETEXT, content)
-            logging.info("Wrote TEXT to clipboard.")
+    if name == "auto":
+        if sys.platform == "win32":
+            name = "win32"
+        elif os.environ.get("WAYLAND_DISPLAY") and shutil.which("wl-paste") and shutil.which("wl-copy"):
+            name = "wayland"
+        elif os.environ.get("DISPLAY") and shutil.which("xclip"):
+            name = "x11"
+        else:
+            logging.warning("No system clipboard available, using the in-memory clipboard backend.")
+            name = "memory"
 
-        elif data_type == 'IMAGE':
-            try:
-                with Image.open(content) as image:
-                    dib_data = _image_to_dib(image)
-                    win32clipboard.SetClipboardData(CF_DIB, dib_data)
-                    # Also write the path as text for fallback
-                    win32clipboard.SetClipboardData(CF_UNICODETEXT, content)
-                    logging.info(f"Wrote IMAGE to clipboard from path: {content}")
-            except FileNotFoundError:
-                logging.error(f"Image file not found for pasting: {content}")
-                win32clipboard.SetClipboardData(CF_UNICODETEXT, f"[Image not found]: {content}")
-            except Exception as e:
-                logging.error(f"Failed to write image to clipboard: {e}")
-        
-        elif data_type == 'FILES':
-            # For simplicity, write the file paths as a newline-separated text string.
-            # Writing actual CF_HDROP is much more complex.
-            win32clipboard.SetClipboardData(CF_UNICODETEXT, content)
-            logging.info("Wrote FILES to clipboard as plain text.")
+    if name == "win32":
+        from .clipboard_win32 import Win32ClipboardBackend
+        backend = Win32ClipboardBackend()
+    elif name == "wayland":
+        from .clipboard_linux import WaylandClipboardBackend
+        backend = WaylandClipboardBackend()
+    elif name == "x11":
+        from .clipboard_linux import X11ClipboardBackend
+        backend = X11ClipboardBackend()
+    elif name == "memory":
+        from .clipboard_fake import FakeClipboardBackend
+        backend = FakeClipboardBackend()
+    else:
+        raise ValueError(f"Unknown clipboard backend: {name}")
 
-    except Exception as e:
-        logging.error(f"Could not open or write to clipboard: {e}")
\ No newline at end of file
+    logging.info(f"Using clipboard backend: {type(backend).__name__}")
+    return backend
@@ -0,0 +1,71 @@
+import threading
+
+from . import image_codec
+from .clipboard_adapter import ClipboardImage
+
+class FakeClipboardBackend:
+    """
+    An in-memory clipboard for headless runs and load tests.
+
+    Content is set with set_text()/set_image()/set_files() or replayed from a
+    script with play(); every change bumps the change token like a real clipboard.
+    Writes from the app are recorded in `written`.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current = None
+        self._sequence = 0
+        self.written = []
+        self.read_count = 0
+
+    def _set(self, clip_data: dict | None):
+        with self._lock:
+            self._current = clip_data
+            self._sequence += 1
+
+    def set_text(self, text: str):
+        self._set({'type': 'TEXT', 'data': text})
+
+    def set_image(self, image):
+        """Accepts a ClipboardImage, or a PIL image which is wrapped in one."""
+        if not isinstance(image, ClipboardImage):
+            image = ClipboardImage.from_image(image)
+        self._set({'type': 'IMAGE', 'data': image})
+
+    def set_files(self, file_paths: list[str]):
+        self._set({'type': 'FILES', 'data': list(file_paths)})
+
+    def clear(self):
+        self._set(None)
+
+    def play(self, script, interval: float = 0.0, stop_event: threading.Event | None = None):
+        """
+        Applies each {'type', 'data'} item of `script` in turn, waiting
+        `interval` seconds between changes.
+        """
+        stop_event = stop_event or threading.Event()
+        for clip_data in script:
+            if stop_event.is_set():
+                break
+            self._set(dict(clip_data))
+            if interval:
+                stop_event.wait(interval)
+
+    def change_token(self):
+        return self._sequence
+
+    def read(self):
+        with self._lock:
+            self.read_count += 1
+            return dict(self._current) if self._current else None
+
+    def write(self, clip_data):
+        self.written.append(clip_data)
+        data_type = clip_data.get('data_type')
+        content = clip_data.get('content')
+        if data_type == 'IMAGE':
+            self._set({'type': 'IMAGE', 'data': ClipboardImage(image_codec.read_as_png(content), 'PNG')})
+        elif data_type == 'FILES':
+            self._set({'type': 'FILES', 'data': content.split("\n")})
+        else:
+            self._set({'type': 'TEXT', 'data': content})
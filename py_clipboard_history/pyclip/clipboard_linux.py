@@ -0,0 +1,170 @@
+import time
+import logging
+import threading
+import subprocess
+from urllib.parse import unquote, urlparse
+
+from . import config
+from . import image_codec
+from .clipboard_adapter import ClipboardImage
+
+_TEXT_TYPES = ("text/plain;charset=utf-8", "UTF8_STRING", "text/plain", "STRING")
+
+def _parse_uri_list(data: bytes) -> list[str]:
+    """Turns a text/uri-list payload into local file paths."""
+    paths = []
+    for line in data.decode('utf-8', errors='ignore').splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        uri = urlparse(line)
+        if uri.scheme == 'file':
+            paths.append(unquote(uri.path))
+    return paths
+
+class CommandLineClipboardBackend:
+    """
+    Clipboard access through command-line tools (wl-clipboard or xclip).
+    Subclasses provide the command lines; reading prefers Image > Files > Text
+    like the Win32 backend.
+    """
+    timeout = 2.0
+
+    def _list_types_cmd(self) -> list[str]:
+        raise NotImplementedError
+
+    def _read_cmd(self, mime_type: str) -> list[str]:
+        raise NotImplementedError
+
+    def _write_cmd(self, mime_type: str) -> list[str]:
+        raise NotImplementedError
+
+    def _run(self, cmd: list[str]) -> bytes | None:
+        try:
+            result = subprocess.run(cmd, capture_output=True, timeout=self.timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logging.error(f"Clipboard command {cmd[0]} failed: {e}")
+            return None
+        if result.returncode != 0:
+            return None
+        return result.stdout
+
+    def _write(self, mime_type: str, data: bytes):
+        # The tools fork a process that keeps owning the selection, so don't wait on its output
+        subprocess.run(self._write_cmd(mime_type), input=data, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, timeout=self.timeout, check=True)
+
+    def read(self):
+        types_output = self._run(self._list_types_cmd())
+        if types_output is None:
+            return None
+        types = set(types_output.decode('utf-8', errors='ignore').split())
+
+        # Priority 1: Image
+        if "image/png" in types:
+            png_data = self._run(self._read_cmd("image/png"))
+            if png_data:
+                logging.debug("Read IMAGE from clipboard.")
+                return {'type': 'IMAGE', 'data': ClipboardImage(png_data, 'PNG')}
+
+        # Priority 2: Files
+        if "text/uri-list" in types:
+            file_paths = _parse_uri_list(self._run(self._read_cmd("text/uri-list")) or b'')
+            if file_paths:
+                logging.debug("Read %d FILES from clipboard.", len(file_paths))
+                return {'type': 'FILES', 'data': file_paths}
+
+        # Priority 3: Text
+        for text_type in _TEXT_TYPES:
+            if text_type in types:
+                text_data = self._run(self._read_cmd(text_type))
+                if text_data:
+                    logging.debug("Read TEXT from clipboard.")
+                    return {'type': 'TEXT', 'data': text_data.decode('utf-8', errors='replace')}
+                break
+
+        logging.debug("No supported format found on clipboard.")
+        return None
+
+    def write(self, clip_data):
+        if not clip_data or 'data_type' not in clip_data or 'content' not in clip_data:
+            logging.warning(f"write_to_clipboard called with invalid data: {clip_data}")
+            return
+
+        data_type = clip_data['data_type']
+        content = clip_data['content']
+        try:
+            if data_type == 'IMAGE':
+                try:
+                    # Stored images may be WebP or QOI; the clipboard always gets PNG
+                    self._write("image/png", image_codec.read_as_png(content))
+                    logging.info(f"Wrote IMAGE to clipboard from path: {content}")
+                except FileNotFoundError:
+                    logging.error(f"Image file not found for pasting: {content}")
+                    self._write("text/plain", f"[Image not found]: {content}".encode('utf-8'))
+            else:
+                # FILES are written as newline-separated text, as on Windows
+                self._write("text/plain", content.encode('utf-8'))
+                logging.info(f"Wrote {data_type} to clipboard.")
+        except (OSError, subprocess.SubprocessError) as e:
+            logging.error(f"Could not write to clipboard: {e}")
+
+class WaylandClipboardBackend(CommandLineClipboardBackend):
+    """
+    wl-clipboard backend. Change notifications come from a long-running
+    `wl-paste --watch` process; if the compositor does not support it the
+    token falls back to changing every POLLING_INTERVAL_SECONDS.
+    """
+    def __init__(self):
+        self._changes = 0
+        self._watcher = None
+        try:
+            self._watcher = subprocess.Popen(["wl-paste", "--watch", "echo"], stdout=subprocess.PIPE,
+                                             stderr=subprocess.DEVNULL)
+            threading.Thread(target=self._watch, daemon=True).start()
+        except OSError as e:
+            logging.warning(f"Could not start wl-paste --watch, polling instead: {e}")
+
+    def _watch(self):
+        for _ in self._watcher.stdout:
+            self._changes += 1
+        logging.warning("wl-paste --watch exited, polling the clipboard instead.")
+
+    def change_token(self):
+        if self._watcher is not None and self._watcher.poll() is None:
+            return self._changes
+        return ('interval', int(time.monotonic() / config.POLLING_INTERVAL_SECONDS))
+
+    def _list_types_cmd(self):
+        return ["wl-paste", "--list-types"]
+
+    def _read_cmd(self, mime_type):
+        return ["wl-paste", "--no-newline", "--type", mime_type]
+
+    def _write_cmd(self, mime_type):
+        return ["wl-copy", "--type", mime_type]
+
+class X11ClipboardBackend(CommandLineClipboardBackend):
+    """
+    xclip backend. X11 has no change counter, so the token is the selection
+    TIMESTAMP (set when a new owner takes the clipboard), sampled at most once
+    per POLLING_INTERVAL_SECONDS since each sample spawns a process.
+    """
+    def __init__(self):
+        self.token_poll_interval = config.POLLING_INTERVAL_SECONDS
+
+    def change_token(self):
+        timestamp = self._run(["xclip", "-selection", "clipboard", "-o", "-t", "TIMESTAMP"])
+        if timestamp is None:
+            # Empty clipboard or an owner that does not answer TIMESTAMP
+            return ('interval', int(time.monotonic() / config.POLLING_INTERVAL_SECONDS))
+        return timestamp
+
+    def _list_types_cmd(self):
+        return ["xclip", "-selection", "clipboard", "-o", "-t", "TARGETS"]
+
+    def _read_cmd(self, mime_type):
+        return ["xclip", "-selection", "clipboard", "-o", "-t", mime_type]
+
+    def _write_cmd(self, mime_type):
+        return ["xclip", "-selection", "clipboard", "-i", "-t", mime_type]
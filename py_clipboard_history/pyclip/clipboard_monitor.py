@@ -1,53 +1,61 @@
 import threading
 import time
 import logging
-import hashlib
 
 from . import clipboard_adapter
 from . import config
+from . import hashing
+from . import metrics
+from .change_token import ChangeTokenSource, BackendTokenSource
 
 class ClipboardMonitor(threading.Thread):
-    """A thread that monitors the clipboard for changes at regular intervals."""
-    def __init__(self, on_new_item_callback):
+    """
+    A thread that monitors the clipboard for changes.
+
+    Each tick only checks a cheap change token (the clipboard sequence number on
+    Windows); the clipboard is opened and read only when that token changes.
+    """
+    def __init__(self, on_new_item_callback, backend: clipboard_adapter.ClipboardBackend,
+                 token_source: ChangeTokenSource | None = None):
         super().__init__(daemon=True)
         self.on_new_item_callback = on_new_item_callback
+        self.backend = backend
+        self.token_source = token_source or BackendTokenSource(backend)
         self._stop_event = threading.Event()
         self._last_hash = None
+        self._last_token = None
 
     def run(self):
         """The main loop for the monitoring thread."""
         logging.info("Clipboard monitor thread started.")
         while not self._stop_event.is_set():
             try:
-                clip_data = clipboard_adapter.read_clipboard()
+                self._last_token = self.token_source.wait_for_change(
+                    self._last_token, self._stop_event, config.CHANGE_POLL_INTERVAL_SECONDS
+                )
+                if self._stop_event.is_set():
+                    break
+
+                with metrics.timer('clipboard_read'):
+                    clip_data = self.backend.read()
 
                 if clip_data:
-                    data_to_hash = b''
                     item_type = clip_data.get('type')
-
-                    if item_type == 'TEXT':
-                        data_to_hash = clip_data.get('data', '').encode('utf-8', errors='ignore')
-                    elif item_type == 'IMAGE':
-                        # For images, hash their raw byte content
-                        data_to_hash = clip_data.get('data').tobytes()
-                    elif item_type == 'FILES':
-                        data_to_hash = "\n".join(clip_data.get('data', [])).encode('utf-8', errors='ignore')
-
-                    if not data_to_hash:
+                    # Images are hashed over the raw clipboard buffer, without decoding
+                    with metrics.timer(f'clipboard_hash_{item_type.lower()}' if item_type else 'clipboard_hash'):
+                        current_hash = hashing.hash_clip_data(clip_data)
+                    if not current_hash:
                         continue
 
-                    current_hash = hashlib.md5(data_to_hash).hexdigest()
-                    
                     if current_hash != self._last_hash:
                         self._last_hash = current_hash
-                        logging.info(f"New clipboard content detected (type: {item_type}, hash: {current_hash[:8]}...).")
+                        metrics.increment('captures')
+                        logging.info(f"New clipboard content detected (type: {item_type}, hash: {current_hash[:11]}...).")
                         # Pass both the data and its hash to the main thread
                         # Pass both the data and its hash to the main thread
                         # Since we are no longer using Tkinter, we call the callback directly.
                         # The callback implementation in app.py must handle thread safety (e.g. via pywebview's evaluate_js)
                         self.on_new_item_callback({'data': clip_data, 'hash': current_hash})
-                
-                self._stop_event.wait(config.POLLING_INTERVAL_SECONDS)
 
             except Exception as e:
                 logging.error(f"Error in clipboard monitor loop: {e}", exc_info=True)
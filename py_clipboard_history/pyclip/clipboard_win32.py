@@ -0,0 +1,124 @@
+import logging
+import io
+
+from . import dib_cache
+from .clipboard_adapter import ClipboardImage
+
+# Add new supported formats
+CF_UNICODETEXT = 13
+CF_DIB = 8 # Device-Independent Bitmap
+CF_HDROP = 15 # File Drop Handle
+
+def _image_to_dib(image):
+    """Converts a Pillow Image object to a DIB (bytes)."""
+    # When saving as BMP, Pillow writes a file header. We need to strip it.
+    # The DIB format is essentially a BMP file without the initial 14-byte BITMAPFILEHEADER.
+    with io.BytesIO() as buffer:
+        image.save(buffer, "BMP")
+        # The DIB starts after the 14-byte file header; slice the buffer's view so it is copied once
+        return bytes(buffer.getbuffer()[14:])
+
+class Win32ClipboardBackend:
+    """Clipboard access through pywin32 (CF_DIB, CF_HDROP and CF_UNICODETEXT)."""
+    def __init__(self):
+        import win32clipboard
+        self._clipboard = win32clipboard
+
+    def change_token(self):
+        """The clipboard sequence number, incremented by Windows on every change."""
+        return self._clipboard.GetClipboardSequenceNumber()
+
+    def read(self):
+        """
+        Reads the clipboard, prioritizing Image > Files > Text.
+        """
+        win32clipboard = self._clipboard
+        try:
+            win32clipboard.OpenClipboard()
+
+            # Priority 1: Image (DIB)
+            if win32clipboard.IsClipboardFormatAvailable(CF_DIB):
+                dib_data = win32clipboard.GetClipboardData(CF_DIB)
+                if dib_data:
+                    # Decoding is deferred to ClipboardImage.decode(), after dedup
+                    logging.debug("Read IMAGE from clipboard.")
+                    return {'type': 'IMAGE', 'data': ClipboardImage(dib_data, 'DIB')}
+
+            # Priority 2: Files (HDROP)
+            if win32clipboard.IsClipboardFormatAvailable(CF_HDROP):
+                file_paths = win32clipboard.GetClipboardData(CF_HDROP)
+                if file_paths:
+                    logging.debug("Read %d FILES from clipboard.", len(file_paths))
+                    return {'type': 'FILES', 'data': list(file_paths)}
+
+            # Priority 3: Text
+            if win32clipboard.IsClipboardFormatAvailable(CF_UNICODETEXT):
+                text_data = win32clipboard.GetClipboardData(CF_UNICODETEXT)
+                if text_data:
+                    logging.debug("Read TEXT from clipboard.")
+                    return {'type': 'TEXT', 'data': text_data}
+
+            logging.debug("No supported format found on clipboard.")
+            return None
+
+        except Exception as e:
+            logging.error(f"Could not open or read clipboard: {e}")
+            return None
+        finally:
+            try:
+                win32clipboard.CloseClipboard()
+            except Exception as e:
+                logging.error(f"Error closing clipboard: {e}")
+
+    def write(self, clip_data):
+        """
+        Writes data back to the clipboard. Supports TEXT, IMAGE, and FILES (as text).
+        """
+        if not clip_data or 'data_type' not in clip_data or 'content' not in clip_data:
+            logging.warning(f"write_to_clipboard called with invalid data: {clip_data}")
+            return
+
+        win32clipboard = self._clipboard
+        try:
+            win32clipboard.OpenClipboard()
+            win32clipboard.EmptyClipboard()
+
+            data_type = clip_data['data_type']
+            content = clip_data['content']
+
+            if data_type == 'TEXT':
+                win32clipboard.SetClipboardData(CF_UNICODETEXT, content)
+                logging.info("Wrote TEXT to clipboard.")
+
+            elif data_type == 'IMAGE':
+                try:
+                    content_hash = clip_data.get('content_hash')
+                    dib_data = dib_cache.read(content_hash)
+                    if dib_data is None:
+                        from PIL import Image
+                        with Image.open(content) as image:
+                            dib_data = _image_to_dib(image)
+                        dib_cache.store(content_hash, dib_data)
+                    win32clipboard.SetClipboardData(CF_DIB, dib_data)
+                    # Also write the path as text for fallback
+                    win32clipboard.SetClipboardData(CF_UNICODETEXT, content)
+                    logging.info(f"Wrote IMAGE to clipboard from path: {content}")
+                except FileNotFoundError:
+                    logging.error(f"Image file not found for pasting: {content}")
+                    win32clipboard.SetClipboardData(CF_UNICODETEXT, f"[Image not found]: {content}")
+                except Exception as e:
+                    logging.error(f"Failed to write image to clipboard: {e}")
+
+            elif data_type == 'FILES':
+                # For simplicity, write the file paths as a newline-separated text string.
+                # Writing actual CF_HDROP is much more complex.
+                win32clipboard.SetClipboardData(CF_UNICODETEXT, content)
+                logging.info("Wrote FILES to clipboard as plain text.")
+
+        except Exception as e:
+            logging.error(f"Could not open or write to clipboard: {e}")
+        finally:
+            try:
+                win32clipboard.CloseClipboard()
+            except Exception as e:
+                logging.error(f"Error closing clipboard: {e}")
@@ -0,0 +1,26 @@
+import zlib
+
+# zstd is optional; without it large text is stored zlib-compressed.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+def compress_text(text: str) -> tuple[str, bytes]:
+    """Compresses text with the best available codec. Returns (codec, data)."""
+    raw = text.encode('utf-8')
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=3).compress(raw)
+    return 'zlib', zlib.compress(raw, 6)
+
+def decompress_text(codec: str, data: bytes) -> str:
+    """Reverses compress_text()."""
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Entry is zstd-compressed but the zstandard package is not installed.")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == 'zlib':
+        raw = zlib.decompress(data)
+    else:
+        raise ValueError(f"Unknown compression codec: {codec}")
+    return raw.decode('utf-8')
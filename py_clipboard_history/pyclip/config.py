@@ -32,8 +32,64 @@ FILE_ICON_PATH = ASSETS_DIR / "file_icon.png"
 # --- Image Storage ---
 IMAGE_STORAGE_PATH = STORAGE_DIR / "images"
 
+# --- Clipboard ---
+# "auto", "win32", "wayland", "x11" or "memory" (in-memory fake for headless runs)
+CLIPBOARD_BACKEND = os.environ.get("PYCLIP_CLIPBOARD_BACKEND", "auto")
+
 # --- Constants ---
 MAX_HISTORY_ITEMS = 200 # Default, will be overridden by settings
+PRUNE_SLACK_RATIO = 0.05 # Prune in batches once history is 5% over the cap
 THUMBNAIL_SIZE = (256, 256)
+THUMBNAIL_VARIANT_SIZES = (64, 128, 256) # Sizes the thumbnail server renders on demand
+THUMBNAIL_CACHE_BYTES = 16 * 1024 * 1024 # In-memory LRU of rendered thumbnail variants
+IMAGE_CODEC = "auto" # Storage codec for full-size images: "auto", "png", "webp" or "qoi"
+IMAGE_CODEC_SMALL = "webp" # Used by "auto" up to IMAGE_CODEC_LARGE_PIXELS
+IMAGE_CODEC_LARGE = "png" # Used by "auto" above it, where lossless WebP gets slow to encode
+IMAGE_CODEC_LARGE_PIXELS = 4_000_000
+PNG_COMPRESS_LEVEL = 1 # zlib level 0-9; Pillow's default (6) is several times slower for screenshots
+WEBP_LOSSLESS_EFFORT = 50 # 0-100, lossless WebP encoder effort
+DIB_CACHE_MAX_BYTES = 256 * 1024 * 1024 # Raw DIBs kept for fast image paste on Windows; 0 disables
+IMAGE_WORKERS = 2 # Threads encoding captured images to disk
+IMAGE_QUEUE_SIZE = 8 # Images waiting to be encoded before the oldest is dropped
 PREVIEW_MAX_LEN = 120
-POLLING_INTERVAL_SECONDS = 1
+RECENT_CACHE_SIZE = 200 # Newest list rows kept in memory for the unfiltered first page
+TEXT_COMPRESSION_THRESHOLD = 32 * 1024 # Text longer than this (in characters) is stored compressed
+TEXT_SEARCH_EXCERPT_LEN = 8 * 1024 # Leading characters of compressed text kept searchable
+POLLING_INTERVAL_SECONDS = 1 # Full-read fallback when no change token is available
+CHANGE_POLL_INTERVAL_SECONDS = 0.05 # How often the cheap change token is checked
+
+# --- AI Tagging ---
+ALLOWED_TAGS = [
+    "Code", "Python", "JavaScript", "SQL", "Shell", "JSON", "Log", "URL", "Email",
+    "Path", "Command", "Citation", "Note", "Todo", "Address", "Number", "Color", "General", "Uncategorized",
+]
+AI_TAGGING_QUEUE_SIZE = 64 # Clips waiting for tags before the oldest is dropped
+AI_TAGGING_BATCH_SIZE = 8 # Snippets classified per API request
+AI_TAGGING_BATCH_WAIT_SECONDS = 2.0 # How long the worker waits to fill a batch
+AI_REQUESTS_PER_MINUTE = 20 # Token bucket rate for classification requests (0 = no limit)
+AI_REQUEST_BURST = 3 # Requests allowed back to back before the rate applies
+AI_MAX_RETRIES = 4 # Retries of a failed batch, with exponential backoff
+LOCAL_CLASSIFIER_MIN_CONFIDENCE = 0.9 # Local model predictions below this go to the LLM
+LOCAL_MODEL_PATH = STORAGE_DIR / "tag_model.json" # Naive Bayes model trained from LLM-tagged history
+LOCAL_MODEL_MIN_SAMPLES = 50 # Tagged clips needed before the model is trained
+LOCAL_MODEL_MAX_SAMPLES = 5000
+LOCAL_MODEL_RETRAIN_EVERY = 50 # Retrain after this many new LLM results
+
+# --- Metrics ---
+METRICS_ENABLED = os.environ.get("PYCLIP_METRICS", "1") != "0" # Hot-path timers; PYCLIP_METRICS=0 turns them into no-ops
+METRICS_DUMP_PATH = STORAGE_DIR / "metrics.prom" # Prometheus text format, e.g. for node_exporter's textfile collector
+METRICS_DUMP_INTERVAL_SECONDS = 60 # 0 disables the periodic dump
+
+# --- Logging ---
+LOG_LEVEL = os.environ.get("PYCLIP_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("PYCLIP_LOG_FORMAT", "text") # "json" writes one structured record per line
+LOG_THROTTLE_SECONDS = 30 # Minimum gap between repeats of a rate-limited hot-path message
+
+# --- Startup ---
+STARTUP_TARGET_SECONDS = 1.0 # Goal from process start to a live hotkey, see python -m pyclip.startup
+
+# --- Window ---
+WINDOW_SHOW_BUDGET_SECONDS = 1 / 60 # Hotkey-to-visible goal (one frame); slower shows are logged
+DISPLAY_GEOMETRY_TTL_SECONDS = 5 # Monitor layout cache lifetime where no display-change token exists
+FOCUS_POLL_MIN_SECONDS = 0.05 # Focus-loss polling fallback: interval right after the window is shown...
+FOCUS_POLL_MAX_SECONDS = 0.5 # ...growing to this while the window keeps focus
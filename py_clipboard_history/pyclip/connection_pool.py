@@ -0,0 +1,154 @@
+import sqlite3
+import logging
+import threading
+import queue
+from contextlib import contextmanager
+
+# Pragmas applied to every connection. WAL lets the readers run while the
+# writer holds its transaction, so the monitor thread never blocks the UI.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -8000",       # ~8 MB page cache
+    "PRAGMA mmap_size = 67108864",     # 64 MB memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA foreign_keys = ON",
+)
+
+class ConnectionPool:
+    """
+    Keeps one long-lived writer connection and a small pool of reader
+    connections for a single SQLite database.
+
+    Writes are serialized through a lock; readers are handed out from a
+    LIFO queue so the most recently used (warmest) connection is reused first.
+    """
+    def __init__(self, db_path, max_readers: int = 4, timeout: float = 5.0):
+        self.db_path = db_path
+        self.max_readers = max_readers
+        self.timeout = timeout
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'connections_opened': 0,
+            'writer_acquired': 0,
+            'writer_reused': 0,
+            'reader_acquired': 0,
+            'reader_reused': 0,
+            'reader_waits': 0,
+        }
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _open(self, read_only: bool = False) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+        self._count('connections_opened')
+        logging.debug(f"Opened {'reader' if read_only else 'writer'} connection to {self.db_path}")
+        return conn
+
+    @contextmanager
+    def writer(self, on_commit=None):
+        """
+        Yields the shared writer connection, committing on success and rolling
+        back on error. on_commit() runs after the commit, before the next
+        writer can start, so it sees the commits in order.
+        """
+        with self._writer_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool has been closed.")
+            self._count('writer_acquired')
+            if self._writer is None:
+                self._writer = self._open()
+            else:
+                self._count('writer_reused')
+            try:
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+            if on_commit is not None:
+                on_commit()
+
+    @contextmanager
+    def reader(self):
+        """Yields a pooled read-only connection, returning it to the pool afterwards."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool has been closed.")
+        self._count('reader_acquired')
+        conn = None
+        try:
+            conn = self._readers.get_nowait()
+            self._count('reader_reused')
+        except queue.Empty:
+            with self._reader_lock:
+                if self._reader_count < self.max_readers:
+                    self._reader_count += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    conn = self._open(read_only=True)
+                except sqlite3.Error:
+                    with self._reader_lock:
+                        self._reader_count -= 1
+                    raise
+            else:
+                self._count('reader_waits')
+                try:
+                    conn = self._readers.get(timeout=self.timeout)
+                except queue.Empty:
+                    # Callers handle sqlite3.Error, the same as a busy database
+                    raise sqlite3.OperationalError("timed out waiting for a reader connection") from None
+                self._count('reader_reused')
+        try:
+            yield conn
+        finally:
+            # End any implicit read transaction so the WAL can be checkpointed.
+            if conn.in_transaction:
+                conn.rollback()
+            if self._closed:
+                conn.close()
+            else:
+                self._readers.put(conn)
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the connection reuse counters."""
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+        snapshot['open_readers'] = self._reader_count
+        snapshot['writer_open'] = self._writer is not None
+        return snapshot
+
+    def close(self):
+        """Closes every pooled connection. Safe to call more than once."""
+        self._closed = True
+        with self._writer_lock:
+            if self._writer is not None:
+                try:
+                    self._writer.execute("PRAGMA optimize")
+                    self._writer.close()
+                except sqlite3.Error as e:
+                    logging.error(f"Error closing writer connection: {e}")
+                self._writer = None
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._reader_lock:
+            self._reader_count = 0
+        logging.info(f"Connection pool closed. Stats: {self._stats}")
@@ -1,12 +1,111 @@
-
+import re
 import sqlite3
 import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
 from . import config
+from . import hashing
+from . import blob_store
+from . import compression
+from . import metrics
+from .log_setup import log_throttled
+from .connection_pool import ConnectionPool
+from .history_cache import RecentHistoryCache
+
+_pool = None
+_pool_closed = False  # Set by close_connections(); late callers get an error instead of a new pool
+_pool_lock = threading.Lock()
+_fts_enabled = False
+_change_listeners = []
+
+# Search ranking: bm25() is negative (lower is better), so each day of age
+# adds this much to the score and pushes older matches down.
+FTS_RECENCY_WEIGHT = 0.1
+# SQLite VM steps between checks whether a running search was superseded.
+SEARCH_PROGRESS_STEPS = 1000
+# Control characters used to mark matches in highlight() output.
+_HL_START, _HL_END = '\x02', '\x03'
+
+# Columns returned for list views. Full `content` is deliberately left out;
+# it is loaded on demand through get_entry_content().
+LIST_COLUMNS = ("id", "preview", "tags", "data_type", "thumbnail_path", "is_favorite", "timestamp", "content_length", "is_pending", "content_hash")
+
+# Columns needed to release the files of a deleted row
+_DELETED_ROW_COLUMNS = "id, data_type, content, thumbnail_path, content_hash"
+
+def _list_columns(prefix: str = "") -> str:
+    return ", ".join(prefix + column for column in LIST_COLUMNS)
+
+# Write-through cache of the newest list rows, updated by _notify()
+_recent_cache = RecentHistoryCache(LIST_COLUMNS, config.RECENT_CACHE_SIZE)
+
+def _get_pool() -> ConnectionPool:
+    """Returns the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool_closed:
+                raise sqlite3.ProgrammingError("Database connections are closed (application shutting down).")
+            if _pool is None:
+                _pool = ConnectionPool(config.DB_PATH)
+    return _pool
+
+def close_connections():
+    """Closes all pooled connections. Called on application shutdown; only init_db() reopens them."""
+    global _pool, _pool_closed
+    with _pool_lock:
+        _pool_closed = True
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def get_connection_stats() -> dict:
+    """Returns connection reuse counters for the active pool."""
+    return _get_pool().stats()
+
+def add_change_listener(callback):
+    """
+    Registers callback(event_type, payload), called after each committed change,
+    in commit order, while the writer is still held: it must not block.
+    Event types: 'item_added' {'item'}, 'item_updated' {'id', ...changed fields},
+    'item_deleted' {'id'} and 'item_pruned' {'ids'}.
+    """
+    _change_listeners.append(callback)
+
+def _notify(event_type: str, payload: dict):
+    _recent_cache.apply(event_type, payload)
+    for callback in list(_change_listeners):
+        try:
+            callback(event_type, payload)
+        except Exception as e:
+            logging.error(f"Change listener failed for '{event_type}': {e}")
+
+@contextmanager
+def _notifying_writer():
+    """
+    The pool's writer, yielding (conn, changes). Append (event_type, payload)
+    to `changes`; they are passed to _notify() once the transaction commits,
+    before the writer is released, so the recent cache and the listeners see
+    concurrent writes in commit order.
+    """
+    changes = []
+
+    def publish():
+        for event_type, payload in changes:
+            _notify(event_type, payload)
+    with _get_pool().writer(on_commit=publish) as conn:
+        yield conn, changes
 
 def init_db():
+    global _pool_closed
+    with _pool_lock:
+        _pool_closed = False
     try:
-        with sqlite3.connect(config.DB_PATH) as conn:
+        with _get_pool().writer() as conn:
             cursor = conn.cursor()
+            # One explicit transaction: sqlite3 would otherwise autocommit each DDL statement
+            cursor.execute("BEGIN")
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS clipboard_history (
                     id INTEGER PRIMARY KEY,
@@ -28,16 +127,321 @@ def init_db():
             columns = [info[1] for info in cursor.fetchall()]
             if 'content_hash' not in columns:
                 cursor.execute("ALTER TABLE clipboard_history ADD COLUMN content_hash TEXT")
+            # Store the content length so list queries never touch the content itself
+            if 'content_length' not in columns:
+                cursor.execute("ALTER TABLE clipboard_history ADD COLUMN content_length INTEGER")
+                cursor.execute("UPDATE clipboard_history SET content_length = length(content)")
+            # Images are inserted as pending and completed once their files are written
+            if 'is_pending' not in columns:
+                cursor.execute("ALTER TABLE clipboard_history ADD COLUMN is_pending INTEGER DEFAULT 0 NOT NULL")
             # Create an index on the hash for faster lookups
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_content_hash ON clipboard_history(content_hash)")
-            
-            conn.commit()
+            # Keyset pagination walks this index newest-first
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_timestamp_id ON clipboard_history(timestamp, id)")
+            # Pruning walks this index oldest-first over non-favorites only
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_favorite_timestamp ON clipboard_history(is_favorite, timestamp, id)")
+
+            # Large text lives compressed here; the row keeps a searchable excerpt
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS content_blobs (
+                    entry_id INTEGER PRIMARY KEY REFERENCES clipboard_history(id) ON DELETE CASCADE,
+                    codec TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    raw_bytes INTEGER NOT NULL
+                )
+            """)
+
+            # AI tags by content hash, so duplicate text is never classified twice
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS tag_cache (
+                    content_hash TEXT PRIMARY KEY,
+                    tags TEXT NOT NULL,
+                    model TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            _init_counters(cursor)
+            _migrate_content_hashes(cursor)
+            released_images = _discard_pending_images(cursor)
+            _compress_large_entries(cursor)
+
+            _init_fts(cursor)
             logging.info(f"Database initialized successfully at {config.DB_PATH}")
+        _release_images(released_images)
+        _recent_cache.invalidate()
+        warm_recent_cache()
     except sqlite3.Error as e:
         logging.error(f"Database initialization failed: {e}")
         raise
 
-def add_entry(data_type: str, content: str, content_hash: str, preview: str | None = None, thumbnail_path: str | None = None):
+def _migrate_content_hashes(cursor):
+    """
+    Rehashes TEXT and FILES rows stored with the old unprefixed MD5 hashes so
+    they keep deduplicating against new captures. Legacy IMAGE hashes were taken
+    over decoded pixels and cannot be recomputed from the raw clipboard buffer,
+    so those rows simply keep their old hash.
+    """
+    rows = cursor.execute("""
+        SELECT id, content FROM clipboard_history
+        WHERE data_type IN ('TEXT', 'FILES') AND (content_hash IS NULL OR content_hash NOT LIKE ?)
+    """, (hashing.HASH_PREFIX + '%',)).fetchall()
+    if not rows:
+        return
+    cursor.executemany(
+        "UPDATE clipboard_history SET content_hash = ? WHERE id = ?",
+        [(hashing.content_hash(row['content'].encode('utf-8', errors='ignore')), row['id']) for row in rows]
+    )
+    logging.info(f"Migrated {len(rows)} content hashes to {hashing.HASH_PREFIX.rstrip(':')}.")
+
+def _compress_text_content(cursor, entry_id: int, content: str) -> str:
+    """
+    Stores `content` compressed in content_blobs and returns the excerpt to
+    keep in clipboard_history.content, which the preview, LIKE search and the
+    FTS index read. Only the leading TEXT_SEARCH_EXCERPT_LEN characters of a
+    compressed entry are searchable.
+    """
+    codec, data = compression.compress_text(content)
+    cursor.execute(
+        "INSERT OR REPLACE INTO content_blobs (entry_id, codec, data, raw_bytes) VALUES (?, ?, ?, ?)",
+        (entry_id, codec, data, len(content.encode('utf-8')))
+    )
+    return content[:config.TEXT_SEARCH_EXCERPT_LEN]
+
+def _compress_large_entries(cursor):
+    """Compresses TEXT rows stored before compression existed (or before the threshold was lowered)."""
+    rows = cursor.execute("""
+        SELECT id, content FROM clipboard_history
+        WHERE data_type = 'TEXT' AND content_length > ?
+          AND id NOT IN (SELECT entry_id FROM content_blobs)
+    """, (config.TEXT_COMPRESSION_THRESHOLD,)).fetchall()
+    for row in rows:
+        excerpt = _compress_text_content(cursor, row['id'], row['content'])
+        cursor.execute("UPDATE clipboard_history SET content = ? WHERE id = ?", (excerpt, row['id']))
+    if rows:
+        logging.info(f"Compressed {len(rows)} large text entries.")
+
+def _load_content(row) -> str:
+    """The full content of a row selected together with its content_blobs codec and data."""
+    if row['codec'] is None:
+        return row['content']
+    return compression.decompress_text(row['codec'], row['data'])
+
+def _discard_pending_images(cursor) -> tuple[list[Path], set[str]]:
+    """
+    Removes image rows whose encoding never finished (e.g. the app was closed
+    mid-save). Returns their images for _release_images() after committing.
+    """
+    rows = cursor.execute(f"SELECT {_DELETED_ROW_COLUMNS} FROM clipboard_history WHERE is_pending = 1").fetchall()
+    if not rows:
+        return [], set()
+    cursor.executemany("DELETE FROM clipboard_history WHERE id = ?", [(row['id'],) for row in rows])
+    logging.info(f"Discarded {len(rows)} unfinished image entries.")
+    return _collect_unreferenced_images(cursor, rows)
+
+def _init_counters(cursor):
+    """
+    Maintains the number of non-favorite rows in `history_counters` through
+    triggers, so the prune check in add_entry never has to COUNT(*) the table.
+    """
+    # Separate execute() calls: executescript() would commit in the middle of init_db's transaction
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS history_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS history_count_ai AFTER INSERT ON clipboard_history WHEN new.is_favorite = 0 BEGIN
+            UPDATE history_counters SET value = value + 1 WHERE name = 'non_favorite';
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS history_count_ad AFTER DELETE ON clipboard_history WHEN old.is_favorite = 0 BEGIN
+            UPDATE history_counters SET value = value - 1 WHERE name = 'non_favorite';
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS history_count_au AFTER UPDATE OF is_favorite ON clipboard_history
+        WHEN (old.is_favorite = 0) != (new.is_favorite = 0) BEGIN
+            UPDATE history_counters SET value = value + (CASE WHEN new.is_favorite = 0 THEN 1 ELSE -1 END)
+            WHERE name = 'non_favorite';
+        END
+    """)
+    # Resynchronize once per start in case the database was edited externally
+    cursor.execute("""
+        INSERT OR REPLACE INTO history_counters (name, value)
+        VALUES ('non_favorite', (SELECT COUNT(*) FROM clipboard_history WHERE is_favorite = 0))
+    """)
+
+@metrics.timed('db_prune')
+def _prune(cursor) -> list[sqlite3.Row]:
+    """
+    Deletes the oldest non-favorite entries once the history has grown
+    config.PRUNE_SLACK_RATIO past config.MAX_HISTORY_ITEMS, bringing it back to
+    the cap. Pruning in batches keeps the per-capture cost O(1) amortized.
+    Returns the deleted rows so their image files can be removed.
+    """
+    count = cursor.execute("SELECT value FROM history_counters WHERE name = 'non_favorite'").fetchone()[0]
+    cap = config.MAX_HISTORY_ITEMS
+    if count <= cap + int(cap * config.PRUNE_SLACK_RATIO):
+        return []
+    rows = cursor.execute(f"""
+        SELECT {_DELETED_ROW_COLUMNS} FROM clipboard_history
+        WHERE is_favorite = 0
+        ORDER BY timestamp ASC, id ASC
+        LIMIT ?
+    """, (count - cap,)).fetchall()
+    cursor.executemany("DELETE FROM clipboard_history WHERE id = ?", [(row['id'],) for row in rows])
+    logging.info(f"Pruned {len(rows)} old entries (cap: {cap}).")
+    return rows
+
+def _collect_unreferenced_images(cursor, rows) -> tuple[list[Path], set[str]]:
+    """
+    Called in the transaction that deleted `rows`: returns (legacy files, content
+    hashes) whose images are no longer referenced by any history row. Blob store
+    images and DIB sidecars are shared by every row with the same content hash,
+    so they are only released when the last such row is gone; legacy
+    per-capture files are released directly. Pass the result to
+    _release_images() after committing.
+    """
+    files = []
+    released_hashes = set()
+    for row in rows:
+        if row['data_type'] != 'IMAGE':
+            continue
+        if row['content_hash']:
+            released_hashes.add(row['content_hash'])  # Legacy rows can have a DIB sidecar too
+        if not blob_store.is_blob_path(row['content']):
+            files.extend(Path(p) for p in (row['content'], row['thumbnail_path']) if p)
+    return files, {h for h in released_hashes if _image_refs(cursor, h) == 0}
+
+def _image_refs(cursor, content_hash: str) -> int:
+    return cursor.execute(
+        "SELECT COUNT(*) FROM clipboard_history WHERE content_hash = ? AND data_type = 'IMAGE'", (content_hash,)
+    ).fetchone()[0]
+
+def _release_images(released: tuple[list[Path], set[str]], cursor=None):
+    """
+    Deletes what _collect_unreferenced_images() released, once the deleting
+    transaction has committed. Blob hashes are counted again, and their files
+    deleted, while holding the writer: a row inserted for the same image since
+    the commit keeps the blob. Pass `cursor` when already inside the writer.
+    """
+    files, hashes = released
+    _delete_files(files)
+    if not hashes:
+        return
+    if cursor is not None:
+        _delete_files([f for h in hashes if _image_refs(cursor, h) == 0 for f in blob_store.blob_files(h)])
+        return
+    try:
+        with _get_pool().writer() as conn:
+            _release_images(([], hashes), conn.cursor())
+    except sqlite3.Error as e:
+        logging.error(f"Failed to release unreferenced images: {e}")
+
+def _delete_files(paths):
+    """Deletes image files after the transaction that released them has committed."""
+    storage_root = Path(config.IMAGE_STORAGE_PATH).resolve()
+    for path in paths:
+        path = Path(path).resolve()
+        # Never touch files outside our own image storage
+        if not path.is_relative_to(storage_root):
+            logging.warning(f"Not deleting image outside storage: {path}")
+            continue
+        try:
+            path.unlink(missing_ok=True)
+        except OSError as e:
+            logging.error(f"Failed to delete image file {path}: {e}")
+
+def _init_fts(cursor):
+    """
+    Creates the FTS5 index and its sync triggers, backfilling existing rows
+    the first time. Leaves search on the LIKE path if FTS5 is unavailable.
+    """
+    global _fts_enabled
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'clipboard_fts'")
+    needs_backfill = cursor.fetchone() is None
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS clipboard_fts USING fts5(
+                preview, content,
+                content='clipboard_history', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        _fts_enabled = False
+        logging.warning(f"FTS5 is not available, falling back to LIKE search: {e}")
+        return
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS clipboard_fts_ai AFTER INSERT ON clipboard_history BEGIN
+            INSERT INTO clipboard_fts(rowid, preview, content) VALUES (new.id, new.preview, new.content);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS clipboard_fts_ad AFTER DELETE ON clipboard_history BEGIN
+            INSERT INTO clipboard_fts(clipboard_fts, rowid, preview, content) VALUES ('delete', old.id, old.preview, old.content);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS clipboard_fts_au AFTER UPDATE OF preview, content ON clipboard_history BEGIN
+            INSERT INTO clipboard_fts(clipboard_fts, rowid, preview, content) VALUES ('delete', old.id, old.preview, old.content);
+            INSERT INTO clipboard_fts(rowid, preview, content) VALUES (new.id, new.preview, new.content);
+        END
+    """)
+    if needs_backfill:
+        cursor.execute("INSERT INTO clipboard_fts(clipboard_fts) VALUES ('rebuild')")
+        logging.info("Backfilled full-text search index from existing history.")
+    _fts_enabled = True
+
+def _build_fts_query(search_query: str) -> str:
+    """
+    Turns free-form search box input into an FTS5 MATCH expression.
+    Quoted text becomes a phrase query, every other word a prefix query.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"?|(\S+)', search_query):
+        if phrase.strip():
+            terms.append('"' + phrase.replace('"', '""') + '"')
+        elif word:
+            terms.append('"' + word.replace('"', '""') + '"*')
+    return " ".join(terms)
+
+def _parse_highlight(marked: str | None) -> tuple[str | None, list[list[int]]]:
+    """
+    Strips highlight() markers and returns the plain text plus [start, end)
+    match ranges, measured in UTF-16 code units so they index JS strings directly.
+    """
+    if marked is None:
+        return None, []
+    plain, ranges, start, pos = [], [], None, 0
+    for ch in marked:
+        if ch == _HL_START:
+            start = pos
+        elif ch == _HL_END:
+            if start is not None:
+                ranges.append([start, pos])
+            start = None
+        else:
+            plain.append(ch)
+            pos += 2 if ord(ch) > 0xFFFF else 1
+    return "".join(plain), ranges
+
+def _filter_clauses(filter_type: str | None, column_prefix: str = "") -> tuple[list[str], list]:
+    """Builds the WHERE clauses and params for the type/favorite filter."""
+    if not filter_type or filter_type == "All Types":
+        return [], []
+    if filter_type == "Favorites ★":
+        return [f"{column_prefix}is_favorite = 1"], []
+    return [f"{column_prefix}data_type = ?"], [filter_type]
+
+@metrics.timed('db_add_entry')
+def add_entry(data_type: str, content: str, content_hash: str, preview: str | None = None, thumbnail_path: str | None = None,
+              is_pending: bool = False):
     if not content or not content.strip():
         return None
 
@@ -45,107 +449,341 @@ def add_entry(data_type: str, content: str, content_hash: str, preview: str | No
         preview = (content[:config.PREVIEW_MAX_LEN] + '...') if len(content) > config.PREVIEW_MAX_LEN else content
     
     try:
-        with sqlite3.connect(config.DB_PATH) as conn:
+        with _notifying_writer() as (conn, changes):
             cursor = conn.cursor()
             
             # First, delete any existing non-favorite entry with the same hash
-            cursor.execute("DELETE FROM clipboard_history WHERE content_hash = ? AND is_favorite = 0", (content_hash,))
-            if cursor.rowcount > 0:
+            cursor.execute(f"SELECT {_DELETED_ROW_COLUMNS} FROM clipboard_history WHERE content_hash = ? AND is_favorite = 0", (content_hash,))
+            replaced_rows = cursor.fetchall()
+            if replaced_rows:
+                cursor.execute("DELETE FROM clipboard_history WHERE content_hash = ? AND is_favorite = 0", (content_hash,))
                 logging.info(f"Removed {cursor.rowcount} old entry with same content hash to be replaced.")
 
-            # Then, insert the new entry
+            # Then, insert the new entry. Large text is compressed into content_blobs
+            # first, so the row (and the FTS index) only ever hold the excerpt.
+            compress = data_type == 'TEXT' and len(content) > config.TEXT_COMPRESSION_THRESHOLD
+            stored_content = content[:config.TEXT_SEARCH_EXCERPT_LEN] if compress else content
             cursor.execute(
-                "INSERT INTO clipboard_history (data_type, content, preview, thumbnail_path, content_hash) VALUES (?, ?, ?, ?, ?)",
-                (data_type, content, preview.strip(), thumbnail_path, content_hash)
+                "INSERT INTO clipboard_history (data_type, content, content_length, preview, thumbnail_path, content_hash, is_pending) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (data_type, stored_content, len(content), preview.strip(), thumbnail_path, content_hash, int(is_pending))
             )
             new_id = cursor.lastrowid
+            if compress:
+                _compress_text_content(cursor, new_id, content)
             
             # Prune old entries
-            cursor.execute("""
-                DELETE FROM clipboard_history
-                WHERE id IN (
-                    SELECT id FROM clipboard_history WHERE is_favorite = 0
-                    ORDER BY timestamp ASC
-                    LIMIT MAX(0, (SELECT COUNT(*) FROM clipboard_history WHERE is_favorite = 0) - ?))
-            """, (config.MAX_HISTORY_ITEMS,))
-            
-            conn.commit()
-            return new_id
+            pruned_rows = _prune(cursor)
+            released_images = _collect_unreferenced_images(cursor, replaced_rows + pruned_rows)
+
+            new_item = dict(cursor.execute(f"SELECT {_list_columns()} FROM clipboard_history WHERE id = ?", (new_id,)).fetchone())
+            changes.extend(('item_deleted', {'id': row['id']}) for row in replaced_rows)
+            changes.append(('item_added', {'item': new_item}))
+            if pruned_rows:
+                changes.append(('item_pruned', {'ids': [row['id'] for row in pruned_rows]}))
     except sqlite3.Error as e:
         logging.error(f"Failed to add entry to database: {e}")
         return None
 
+    _release_images(released_images)
+    return new_id
+
+def warm_recent_cache():
+    """Loads the newest rows into the in-memory cache used for the unfiltered first page."""
+    version = _recent_cache.version()
+    try:
+        with _get_pool().reader() as conn:
+            rows = _search_like(conn, _recent_cache.capacity + 1, None, "", {})
+    except sqlite3.Error as e:
+        logging.error(f"Failed to load recent history cache: {e}")
+        return
+    _recent_cache.load(rows, version, complete=len(rows) <= _recent_cache.capacity)
+
+def get_recent_cache_stats() -> dict:
+    return _recent_cache.stats()
+
 def get_history(limit: int = 50, filter_type: str | None = None, search_query: str | None = None):
     """
     Retrieves entries, with options to filter by type and search by query.
+    Equivalent to the first page of get_history_page().
     """
+    return get_history_page(None, limit, filter_type, search_query)['items']
+
+@contextmanager
+def _interruptible(conn, is_cancelled):
+    """Aborts queries on `conn` (with sqlite3.OperationalError) as soon as is_cancelled() returns True."""
+    if is_cancelled is None:
+        yield
+        return
+    conn.set_progress_handler(lambda: int(is_cancelled()), SEARCH_PROGRESS_STEPS)
     try:
-        with sqlite3.connect(config.DB_PATH) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            params = []
-            query = "SELECT id, preview, tags, data_type, content, thumbnail_path, is_favorite FROM clipboard_history"
-            
-            where_clauses = []
-            if filter_type and filter_type != "All Types":
-                if filter_type == "Favorites ★":
-                    where_clauses.append("is_favorite = 1")
-                else:
-                    where_clauses.append("data_type = ?")
-                    params.append(filter_type)
-            
-            if search_query:
-                # Search in both preview and content for better matching
-                where_clauses.append("(preview LIKE ? OR content LIKE ?)")
-                params.extend([f"%{search_query}%", f"%{search_query}%"])
+        yield
+    finally:
+        # The connection goes back to the pool
+        conn.set_progress_handler(None, 0)
 
-            if where_clauses:
-                query += " WHERE " + " AND ".join(where_clauses)
+@metrics.timed('db_history_page')
+def get_history_page(cursor: dict | None = None, page_size: int = 50, filter_type: str | None = None, search_query: str | None = None,
+                     is_cancelled=None) -> dict:
+    """
+    Retrieves one page of entries plus the cursor for the next page.
 
-            query += " ORDER BY timestamp DESC LIMIT ?"
-            params.append(limit)
-            
-            cursor.execute(query, params)
-            results = [dict(row) for row in cursor.fetchall()]
-            logging.info(f"Retrieved {len(results)} entries (filter: {filter_type}, search: '{search_query}').")
-            return results
-            
-    except sqlite3.Error as e:
+    Browsing pages by keyset on (timestamp, id), so every page is an index range
+    scan. Ranked full-text results are paged by offset instead, since their
+    order is not monotonic in any column. Searches use the FTS5 index when
+    available; matches in the preview are returned as `match_ranges` offsets.
+
+    If `is_cancelled` is given, the query is interrupted once it returns True
+    and the result is marked 'cancelled'.
+
+    :return: {'items': [...], 'next_cursor': dict or None when there are no more rows}
+    """
+    search_query = (search_query or "").strip()
+    cursor = cursor or {}
+    # The common case, opening the window on the unfiltered list, is served from memory
+    if not cursor and not search_query and filter_type in (None, "", "All Types") and page_size <= _recent_cache.capacity:
+        cached = _recent_cache.first_page(page_size)
+        if cached is None:
+            warm_recent_cache()
+            cached = _recent_cache.first_page(page_size, count=False)
+        if cached is not None:
+            return {'items': cached[0], 'next_cursor': cached[1]}
+    try:
+        with _get_pool().reader() as conn, _interruptible(conn, is_cancelled):
+            items = None
+            next_cursor = None
+            # A keyset cursor means earlier pages came from the LIKE path; stay on it.
+            if search_query and _fts_enabled and 'timestamp' not in cursor:
+                offset = int(cursor.get('offset', 0))
+                items = _search_fts(conn, page_size + 1, filter_type, search_query, offset, is_cancelled)
+                # unicode61 does not split CJK runs into words, so substring
+                # queries in those scripts still need the LIKE scan.
+                if not items and offset == 0 and not search_query.isascii():
+                    items = None
+                if items is not None and len(items) > page_size:
+                    next_cursor = {'offset': offset + page_size}
+            if items is None:
+                items = _search_like(conn, page_size + 1, filter_type, search_query, cursor)
+                if len(items) > page_size:
+                    last = items[page_size - 1]
+                    next_cursor = {'timestamp': last['timestamp'], 'id': last['id']}
+            items = items[:page_size]
+            logging.debug("Retrieved %d entries (filter: %s, search: '%s').", len(items), filter_type, search_query)
+            return {'items': items, 'next_cursor': next_cursor}
+
+    except (sqlite3.Error, ValueError, TypeError) as e:
+        if is_cancelled is not None and is_cancelled():
+            logging.debug("Search for '%s' cancelled by a newer one.", search_query)
+            return {'items': [], 'next_cursor': None, 'cancelled': True}
         logging.error(f"Failed to get history from database: {e}")
-        return []
+        return {'items': [], 'next_cursor': None}
+
+@metrics.timed('db_search_fts')
+def _search_fts(conn, limit: int, filter_type: str | None, search_query: str, offset: int = 0,
+                is_cancelled=None) -> list[dict] | None:
+    """
+    Runs a ranked full-text search. Returns None if the query cannot be
+    expressed in FTS5. A search interrupted through _interruptible() raises.
+    """
+    match_expr = _build_fts_query(search_query)
+    if not match_expr:
+        return None
+    where_clauses, params = _filter_clauses(filter_type, "h.")
+    where_clauses.insert(0, "clipboard_fts MATCH ?")
+    params.insert(0, match_expr)
+    query = f"""
+        SELECT {_list_columns("h.")},
+               highlight(clipboard_fts, 0, char(2), char(3)) AS preview_marked
+        FROM clipboard_fts JOIN clipboard_history h ON h.id = clipboard_fts.rowid
+        WHERE {" AND ".join(where_clauses)}
+        ORDER BY bm25(clipboard_fts) + ? * (julianday('now') - julianday(h.timestamp))
+        LIMIT ? OFFSET ?
+    """
+    params.extend([FTS_RECENCY_WEIGHT, limit, offset])
+    try:
+        rows = conn.execute(query, params).fetchall()
+    except sqlite3.OperationalError as e:
+        # Cancelled, not failed: falling back to LIKE would run the superseded search again
+        interrupted = getattr(e, 'sqlite_errorname', None) == 'SQLITE_INTERRUPT' or str(e) == 'interrupted'
+        if interrupted or (is_cancelled is not None and is_cancelled()):
+            raise
+        log_throttled(logging.WARNING, 'fts_query_failed', f"FTS query '{match_expr}' failed, using LIKE search: {e}")
+        return None
+    results = []
+    for row in rows:
+        item = dict(row)
+        _, item['match_ranges'] = _parse_highlight(item.pop('preview_marked'))
+        results.append(item)
+    return results
+
+@metrics.timed('db_search_like')
+def _search_like(conn, limit: int, filter_type: str | None, search_query: str, cursor: dict | None = None) -> list[dict]:
+    """
+    Newest-first listing, optionally filtered with the unindexed LIKE search
+    (used when FTS5 is unavailable or cannot answer the query).
+    """
+    where_clauses, params = _filter_clauses(filter_type)
+    query = f"SELECT {_list_columns()} FROM clipboard_history"
+
+    if search_query:
+        # Search in both preview and content for better matching
+        where_clauses.append("(preview LIKE ? OR content LIKE ?)")
+        params.extend([f"%{search_query}%", f"%{search_query}%"])
+
+    if cursor and 'timestamp' in cursor:
+        where_clauses.append("(timestamp, id) < (?, ?)")
+        params.extend([cursor['timestamp'], int(cursor['id'])])
+
+    if where_clauses:
+        query += " WHERE " + " AND ".join(where_clauses)
+
+    query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+    params.append(limit)
+
+    return [dict(row) for row in conn.execute(query, params).fetchall()]
 
 def get_full_entry(entry_id: int):
     try:
-        with sqlite3.connect(config.DB_PATH) as conn:
-            conn.row_factory = sqlite3.Row
+        with _get_pool().reader() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM clipboard_history WHERE id = ?", (entry_id,))
+            cursor.execute("""
+                SELECT h.*, b.codec, b.data FROM clipboard_history h
+                LEFT JOIN content_blobs b ON b.entry_id = h.id
+                WHERE h.id = ?
+            """, (entry_id,))
             row = cursor.fetchone()
-            return dict(row) if row else None
+            if not row:
+                return None
+            entry = dict(row)
+            entry['content'] = _load_content(row)
+            del entry['codec'], entry['data']
+            return entry
     except sqlite3.Error as e:
         logging.error(f"Failed to get full entry for id {entry_id}: {e}")
         return None
 
+def get_entry_content(entry_id: int, offset: int = 0, length: int | None = None):
+    """
+    Returns the stored content of an entry, optionally only the slice
+    [offset, offset + length) measured in characters. Negative values are
+    treated as 0, so compressed and plain rows return the same slice.
+    """
+    offset = max(0, offset)
+    length = max(0, length) if length is not None else None
+    try:
+        with _get_pool().reader() as conn:
+            # substr(x, start, -1) would count backwards, so "to the end" is the full length
+            row = conn.execute("""
+                SELECT substr(h.content, ? + 1, coalesce(?, h.content_length)) AS content, h.content_length, length(h.content) AS stored_length, b.codec, b.data
+                FROM clipboard_history h LEFT JOIN content_blobs b ON b.entry_id = h.id
+                WHERE h.id = ?
+            """, (offset, length, entry_id)).fetchone()
+            if not row:
+                return None
+            content = row['content']
+            if row['codec'] is not None and (length is None or offset + length > row['stored_length']):
+                # Slices beyond the stored excerpt need the whole entry decompressed
+                full = compression.decompress_text(row['codec'], row['data'])
+                content = full[offset:] if length is None else full[offset:offset + length]
+            return {'content': content, 'content_length': row['content_length']}
+    except sqlite3.Error as e:
+        logging.error(f"Failed to get content for entry id {entry_id}: {e}")
+        return None
+
 def update_entry_tags(entry_id: int, tags: list[str]):
     if not tags: return
     tags_str = ",".join(tags)
     try:
-        with sqlite3.connect(config.DB_PATH) as conn:
+        with _notifying_writer() as (conn, changes):
             cursor = conn.cursor()
             cursor.execute("UPDATE clipboard_history SET tags = ? WHERE id = ?", (tags_str, entry_id))
-            conn.commit()
+            if cursor.rowcount > 0:
+                changes.append(('item_updated', {'id': entry_id, 'tags': tags_str}))
     except sqlite3.Error as e:
         logging.error(f"Failed to update tags for entry id {entry_id}: {e}")
 
+def get_cached_tags(content_hashes: list[str]) -> dict[str, list[str]]:
+    """Returns the cached AI tags for the given content hashes that have them."""
+    hashes = list(set(content_hashes))
+    if not hashes:
+        return {}
+    try:
+        with _get_pool().reader() as conn:
+            placeholders = ", ".join("?" * len(hashes))
+            rows = conn.execute(f"SELECT content_hash, tags FROM tag_cache WHERE content_hash IN ({placeholders})", hashes).fetchall()
+            return {row['content_hash']: row['tags'].split(",") for row in rows}
+    except sqlite3.Error as e:
+        logging.error(f"Failed to read tag cache: {e}")
+        return {}
+
+def get_ai_tagged_texts(limit: int = 5000) -> list[tuple[str, list[str]]]:
+    """The most recent (text, tags) pairs classified by the LLM, for training the local model."""
+    try:
+        with _get_pool().reader() as conn:
+            rows = conn.execute("""
+                SELECT h.content, t.tags FROM tag_cache t
+                JOIN clipboard_history h ON h.content_hash = t.content_hash AND h.data_type = 'TEXT'
+                GROUP BY t.content_hash
+                ORDER BY t.created_at DESC
+                LIMIT ?
+            """, (limit,)).fetchall()
+            return [(row['content'], row['tags'].split(",")) for row in rows]
+    except sqlite3.Error as e:
+        logging.error(f"Failed to read tagged history: {e}")
+        return []
+
+def cache_tags(results: list[tuple[str, list[str]]], model: str | None = None):
+    """Stores AI tags by content hash."""
+    if not results:
+        return
+    try:
+        with _get_pool().writer() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO tag_cache (content_hash, tags, model) VALUES (?, ?, ?)",
+                [(content_hash, ",".join(tags), model) for content_hash, tags in results]
+            )
+    except sqlite3.Error as e:
+        logging.error(f"Failed to write tag cache: {e}")
+
+def complete_pending_image(entry_id: int, content: str, thumbnail_path: str, preview: str | None = None):
+    """
+    Marks a pending image entry as saved, optionally correcting its preview
+    (when an existing blob with another codec was reused). If the entry was deleted or pruned
+    while its files were being written and no other row shares the blob, the
+    now orphaned files are removed.
+    """
+    released_images = ([], set())
+    try:
+        with _notifying_writer() as (conn, changes):
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE clipboard_history SET content = ?, thumbnail_path = ?, preview = coalesce(?, preview), is_pending = 0 "
+                "WHERE id = ? AND is_pending = 1",
+                (content, thumbnail_path, preview, entry_id)
+            )
+            if cursor.rowcount > 0:
+                updated = {'id': entry_id, 'thumbnail_path': thumbnail_path, 'is_pending': 0}
+                if preview is not None:
+                    updated['preview'] = preview
+                changes.append(('item_updated', updated))
+            else:
+                orphan = {'data_type': 'IMAGE', 'content': content, 'thumbnail_path': thumbnail_path,
+                          'content_hash': blob_store.hash_for_path(content)}
+                released_images = _collect_unreferenced_images(cursor, [orphan])
+    except sqlite3.Error as e:
+        logging.error(f"Failed to complete image entry id {entry_id}: {e}")
+        return
+    _release_images(released_images)
+
 def toggle_favorite(entry_id: int):
     """Toggles the is_favorite status for a given entry_id."""
     try:
-        with sqlite3.connect(config.DB_PATH) as conn:
+        with _notifying_writer() as (conn, changes):
             cursor = conn.cursor()
             # Using `is_favorite = NOT is_favorite` is a neat SQL trick.
             cursor.execute("UPDATE clipboard_history SET is_favorite = NOT is_favorite WHERE id = ?", (entry_id,))
-            conn.commit()
+            row = cursor.execute("SELECT is_favorite FROM clipboard_history WHERE id = ?", (entry_id,)).fetchone()
+            if row:
+                changes.append(('item_updated', {'id': entry_id, 'is_favorite': row[0]}))
             logging.info(f"Toggled favorite status for entry id {entry_id}.")
     except sqlite3.Error as e:
         logging.error(f"Failed to toggle favorite for entry id {entry_id}: {e}")
@@ -153,10 +791,101 @@ def toggle_favorite(entry_id: int):
 def delete_entry(entry_id: int):
     """Deletes an entry from the database."""
     try:
-        with sqlite3.connect(config.DB_PATH) as conn:
+        with _notifying_writer() as (conn, changes):
             cursor = conn.cursor()
+            row = cursor.execute(f"SELECT {_DELETED_ROW_COLUMNS} FROM clipboard_history WHERE id = ?", (entry_id,)).fetchone()
             cursor.execute("DELETE FROM clipboard_history WHERE id = ?", (entry_id,))
-            conn.commit()
+            if row:
+                released_images = _collect_unreferenced_images(cursor, [row])
+                changes.append(('item_deleted', {'id': entry_id}))
             logging.info(f"Deleted entry id {entry_id}.")
     except sqlite3.Error as e:
         logging.error(f"Failed to delete entry id {entry_id}: {e}")
+        return
+    if row:
+        _release_images(released_images)
+
+def get_image_paths(digest: str) -> dict | None:
+    """The full-size and thumbnail paths of a completed image, by content hash digest (with or without prefix)."""
+    try:
+        with _get_pool().reader() as conn:
+            row = conn.execute("""
+                SELECT content, thumbnail_path FROM clipboard_history
+                WHERE content_hash IN (?, ?) AND data_type = 'IMAGE' AND is_pending = 0
+                LIMIT 1
+            """, (digest, hashing.HASH_PREFIX + digest)).fetchone()
+            return dict(row) if row else None
+    except sqlite3.Error as e:
+        logging.error(f"Failed to look up image {digest}: {e}")
+        return None
+
+def get_stored_image_paths() -> list[str]:
+    """The distinct full-size image files referenced by completed IMAGE rows."""
+    try:
+        with _get_pool().reader() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT content FROM clipboard_history WHERE data_type = 'IMAGE' AND is_pending = 0"
+            ).fetchall()
+            return [row['content'] for row in rows]
+    except sqlite3.Error as e:
+        logging.error(f"Failed to list stored images: {e}")
+        return []
+
+def replace_image_path(old_path: str, new_path: str, preview: str | None = None) -> bool:
+    """
+    Points every IMAGE row stored at `old_path` to `new_path` (after a
+    re-encode), updating the preview to the new format when one is given.
+    """
+    try:
+        with _notifying_writer() as (conn, changes):
+            cursor = conn.cursor()
+            ids = [row['id'] for row in cursor.execute(
+                "SELECT id FROM clipboard_history WHERE content = ? AND data_type = 'IMAGE'", (old_path,)
+            )]
+            cursor.executemany(
+                "UPDATE clipboard_history SET content = ?, preview = coalesce(?, preview) WHERE id = ?",
+                [(new_path, preview, entry_id) for entry_id in ids]
+            )
+            if preview is not None:
+                changes.extend(('item_updated', {'id': entry_id, 'preview': preview}) for entry_id in ids)
+    except sqlite3.Error as e:
+        logging.error(f"Failed to update image path {old_path}: {e}")
+        return False
+    return bool(ids)
+
+def verify_image_store(dry_run: bool = True) -> dict:
+    """
+    Cross-checks IMAGE rows against the files on disk. Reports rows whose files
+    are missing and removes (unless dry_run) files no row references.
+    """
+    with _get_pool().reader() as conn:
+        rows = conn.execute(
+            "SELECT content, thumbnail_path, content_hash, is_pending FROM clipboard_history WHERE data_type = 'IMAGE'"
+        ).fetchall()
+    # Every IMAGE row keeps the files stored under its hash, as in _release_images()
+    referenced_hashes = {row['content_hash'] for row in rows}
+    referenced_paths = {p for row in rows for p in (row['content'], row['thumbnail_path']) if p}
+    missing = [
+        p for row in rows if not row['is_pending']
+        for p in (row['content'], row['thumbnail_path']) if p and not Path(p).exists()
+    ]
+    report = blob_store.collect_garbage(referenced_hashes, referenced_paths, dry_run=dry_run)
+    report['missing_files'] = missing
+    return report
+
+def get_storage_stats() -> dict:
+    """Reports how much space text compression saves, in bytes of UTF-8."""
+    try:
+        with _get_pool().reader() as conn:
+            row = conn.execute("""
+                SELECT count(*) AS compressed_entries,
+                       coalesce(sum(b.raw_bytes), 0) AS raw_bytes,
+                       coalesce(sum(length(b.data) + length(CAST(h.content AS BLOB))), 0) AS stored_bytes
+                FROM content_blobs b JOIN clipboard_history h ON h.id = b.entry_id
+            """).fetchone()
+    except sqlite3.Error as e:
+        logging.error(f"Failed to get storage stats: {e}")
+        return None
+    stats = dict(row)
+    stats['bytes_saved'] = stats['raw_bytes'] - stats['stored_bytes']
+    return stats
@@ -0,0 +1,93 @@
+"""
+Size-bounded cache of raw DIB sidecar files for pasting images on Windows.
+
+Windows hands us the DIB when an image is captured, so it is kept next to the
+blob as images/dib/ab/<digest>.dib. Pasting an image with a cached DIB sets the
+bytes on the clipboard directly instead of decoding the stored image and
+re-encoding it to BMP. The cache holds at most DIB_CACHE_MAX_BYTES; the least
+recently used files (by mtime, refreshed on every hit) are evicted first.
+Set DIB_CACHE_MAX_BYTES to 0 to disable it.
+"""
+import os
+import logging
+import threading
+from pathlib import Path
+
+from . import config
+from . import blob_store
+
+_lock = threading.Lock()
+_total_bytes = None  # Scanned from disk on first use
+hits = 0
+misses = 0
+
+def _path(content_hash: str) -> Path:
+    digest = blob_store._digest(content_hash)
+    return blob_store.dib_dir() / digest[:2] / f"{digest}.dib"
+
+def _scan() -> int:
+    return sum(p.stat().st_size for p in blob_store.dib_dir().rglob("*.dib"))
+
+def read(content_hash: str | None) -> bytes | None:
+    """Returns the cached DIB for an image, or None on a miss."""
+    global hits, misses
+    if not content_hash or config.DIB_CACHE_MAX_BYTES <= 0:
+        return None
+    path = _path(content_hash)
+    try:
+        data = path.read_bytes()
+        os.utime(path)  # Mark as recently used
+    except OSError:
+        misses += 1
+        return None
+    hits += 1
+    return data
+
+def store(content_hash: str | None, dib) -> None:
+    """Caches a DIB (bytes-like) for an image, evicting old entries to stay within the size bound."""
+    global _total_bytes
+    size = len(dib)
+    if not content_hash or size > config.DIB_CACHE_MAX_BYTES:
+        return
+    path = _path(content_hash)
+    with _lock:
+        if _total_bytes is None:
+            _total_bytes = _scan()
+        if path.exists():
+            return
+        try:
+            blob_store.write_atomic(path, lambda tmp_path: tmp_path.write_bytes(dib))
+        except OSError as e:
+            logging.error(f"Failed to cache DIB for {content_hash}: {e}")
+            return
+        _total_bytes += size
+        if _total_bytes > config.DIB_CACHE_MAX_BYTES:
+            _evict()
+
+def _evict():
+    """
+    Removes least recently used files until the cache is back under its bound.
+    Recounts from disk first, since DIBs are also deleted along with their blob.
+    Called with _lock held.
+    """
+    global _total_bytes
+    files = []
+    for path in blob_store.dib_dir().rglob("*.dib"):
+        try:
+            files.append((path.stat(), path))
+        except OSError:
+            continue
+    _total_bytes = sum(st.st_size for st, _ in files)
+    for st, path in sorted(files, key=lambda f: f[0].st_mtime):
+        if _total_bytes <= config.DIB_CACHE_MAX_BYTES:
+            break
+        try:
+            path.unlink()
+            _total_bytes -= st.st_size
+        except OSError as e:
+            logging.warning(f"Failed to evict cached DIB {path}: {e}")
+
+def stats() -> dict:
+    with _lock:
+        total = _total_bytes if _total_bytes is not None else _scan()
+    return {'hits': hits, 'misses': misses, 'bytes': total, 'max_bytes': config.DIB_CACHE_MAX_BYTES}
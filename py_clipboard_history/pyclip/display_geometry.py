@@ -0,0 +1,101 @@
+"""
+Cached display geometry for placing the window when the hotkey is pressed.
+
+Enumerating monitors (screeninfo) and reading the DPI cost several
+milliseconds, which is most of a frame. Each show now checks only a cheap
+display token and re-enumerates only when it changes, the same approach
+change_token uses for the clipboard. On Windows the token is the monitor
+count, the virtual screen bounds and the system DPI, all read with
+GetSystemMetrics. Elsewhere there is no token, and the geometry is refreshed
+once it is older than the TTL.
+"""
+import time
+import ctypes
+import logging
+import threading
+
+SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN, SM_CXVIRTUALSCREEN, SM_CYVIRTUALSCREEN, SM_CMONITORS = 76, 77, 78, 79, 80
+LOGPIXELSX = 88
+
+def _system_dpi() -> int:
+    try:
+        user32 = ctypes.windll.user32
+    except AttributeError:
+        return 96  # Not on Windows
+    try:
+        return user32.GetDpiForSystem()  # Windows 10 1607+
+    except AttributeError:
+        hdc = user32.GetDC(0)
+        dpi = ctypes.windll.gdi32.GetDeviceCaps(hdc, LOGPIXELSX)
+        user32.ReleaseDC(0, hdc)
+        return dpi
+
+def display_token():
+    """A value that changes whenever monitors are added, removed, moved or rescaled; None if unavailable."""
+    try:
+        user32 = ctypes.windll.user32
+    except AttributeError:
+        return None
+    return (user32.GetSystemMetrics(SM_CMONITORS), user32.GetSystemMetrics(SM_XVIRTUALSCREEN),
+            user32.GetSystemMetrics(SM_YVIRTUALSCREEN), user32.GetSystemMetrics(SM_CXVIRTUALSCREEN),
+            user32.GetSystemMetrics(SM_CYVIRTUALSCREEN), _system_dpi())
+
+class DisplayGeometry:
+    """The DPI scale and monitor rectangles (physical pixels), cached until the display token changes."""
+    def __init__(self, ttl: float = 5.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._token = None
+        self._loaded_at = 0.0
+        self._scale = 1.0
+        self._monitors = None
+        self.refreshes = 0
+
+    def get(self) -> tuple[float, list[tuple[int, int, int, int]]]:
+        """Returns (scale, [(x, y, width, height), ...])."""
+        token = display_token()
+        with self._lock:
+            fresh = token == self._token if token is not None else time.monotonic() - self._loaded_at < self.ttl
+            if self._monitors is not None and fresh:
+                return self._scale, self._monitors
+        return self._refresh(token)
+
+    def _refresh(self, token) -> tuple[float, list[tuple[int, int, int, int]]]:
+        from screeninfo import get_monitors
+        try:
+            monitors = [(m.x, m.y, m.width, m.height) for m in get_monitors()]
+        except Exception as e:
+            logging.error(f"Failed to enumerate monitors: {e}")
+            monitors = []
+        scale = _system_dpi() / 96.0
+        with self._lock:
+            self._token, self._loaded_at = token, time.monotonic()
+            self._scale, self._monitors = scale, monitors
+            self.refreshes += 1
+        logging.info(f"Display geometry refreshed: {len(monitors)} monitor(s), scale {scale:.2f}.")
+        return scale, monitors
+
+    def invalidate(self):
+        with self._lock:
+            self._monitors = None
+
+def place_window(mouse_x: int, mouse_y: int, width: int, height: int, scale: float,
+                 monitors: list[tuple[int, int, int, int]]) -> tuple[int, int]:
+    """
+    Returns the logical (x, y) for a window of logical size width x height,
+    centered horizontally on the mouse with its top at the mouse, kept inside
+    the monitor under the mouse.
+
+    The mouse position and monitors are physical pixels while pywebview's
+    move() takes logical ones, so bounds are checked in physical space and
+    only the result is converted.
+    """
+    physical_width, physical_height = width * scale, height * scale
+    monitor = next((m for m in monitors if m[0] <= mouse_x < m[0] + m[2] and m[1] <= mouse_y < m[1] + m[3]),
+                   monitors[0] if monitors else None)
+    x, y = mouse_x - physical_width / 2, mouse_y
+    if monitor:
+        left, top, monitor_width, monitor_height = monitor
+        x = max(left, min(x, left + monitor_width - physical_width))
+        y = max(top, min(y, top + monitor_height - physical_height))
+    return int(x / scale), int(y / scale)
@@ -0,0 +1,209 @@
+"""
+Focus-loss detection for auto-hiding the window.
+
+The app arms a watcher when it shows the window and disarms it on hide; the
+watcher calls on_focus_lost at most once per arm. Sources, best first:
+
+- WinEventFocusWatcher: a SetWinEventHook(EVENT_SYSTEM_FOREGROUND) hook on its
+  own message-loop thread, so focus loss arrives as an event with no polling.
+- PollingFocusWatcher: asks an is_focused() probe, starting at
+  FOCUS_POLL_MIN_SECONDS after each show and backing off to
+  FOCUS_POLL_MAX_SECONDS while the window keeps focus. The probe is any
+  callable, so a fake one drives it in tests.
+- FocusWatcher itself has no source: it relies on the frontend's window blur
+  event (Api.notify_window_blur), which is all that is available off Windows.
+"""
+import sys
+import logging
+import threading
+
+from . import config
+from .log_setup import log_throttled
+
+class FocusWatcher:
+    """Event-only watcher; focus loss is reported through notify_focus_lost()."""
+    uses_blur_events = True  # Whether the frontend's blur event counts as focus loss
+
+    def __init__(self, on_focus_lost):
+        self.on_focus_lost = on_focus_lost
+        self._lock = threading.Lock()
+        self._armed = False
+        self.focus_lost_count = 0
+
+    def arm(self):
+        """Starts watching; called when the window is shown."""
+        with self._lock:
+            self._armed = True
+        self._on_arm()
+
+    def disarm(self):
+        """Stops watching; called when the window is hidden."""
+        with self._lock:
+            self._armed = False
+        self._on_disarm()
+
+    def notify_focus_lost(self, source: str):
+        with self._lock:
+            if not self._armed:
+                return
+            self._armed = False
+            self.focus_lost_count += 1
+        logging.info(f"Window lost focus ({source}), hiding...")
+        self.on_focus_lost()
+
+    def close(self):
+        self.disarm()
+
+    def _on_arm(self):
+        pass
+
+    def _on_disarm(self):
+        pass
+
+class PollingFocusWatcher(FocusWatcher):
+    """
+    Polls is_focused() (True, False, or None when unknown) on one long-lived
+    thread, with an interval that grows from min_interval to max_interval
+    while the window stays focused.
+    """
+    uses_blur_events = False
+
+    def __init__(self, on_focus_lost, is_focused, min_interval: float = 0.05, max_interval: float = 0.5):
+        super().__init__(on_focus_lost)
+        self.is_focused = is_focused
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._condition = threading.Condition(self._lock)
+        self._interval = min_interval
+        self._thread = None
+        self._closed = False
+        self.polls = 0
+
+    def _on_arm(self):
+        with self._condition:
+            self._interval = self.min_interval
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll_loop, name="focus-poll", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _on_disarm(self):
+        with self._condition:
+            self._condition.notify()
+
+    def _poll_loop(self):
+        while True:
+            with self._condition:
+                while not self._armed and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                interval = self._interval
+                self._condition.wait(interval)  # Woken early by disarm() and close()
+                if not self._armed or self._closed:
+                    continue
+                self._interval = min(self.max_interval, interval * 1.5)
+                self.polls += 1
+            try:
+                focused = self.is_focused()
+            except Exception as e:
+                log_throttled(logging.ERROR, 'focus_poll_failed', f"Focus check failed: {e}")
+                focused = None
+            if focused is False:
+                self.notify_focus_lost('poll')
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._armed = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+
+class WinEventFocusWatcher(FocusWatcher):
+    """Foreground-change hook (EVENT_SYSTEM_FOREGROUND); get_hwnd returns the app window's handle."""
+    uses_blur_events = False
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WM_QUIT = 0x0012
+
+    def __init__(self, on_focus_lost, get_hwnd):
+        super().__init__(on_focus_lost)
+        self.get_hwnd = get_hwnd
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+        self._hooked = False
+        self._callback = None  # Keeps the ctypes callback alive while the hook exists
+
+    def start_hook(self, timeout: float = 2.0) -> bool:
+        """Installs the hook on a dedicated thread; returns False if it could not be installed."""
+        self._thread = threading.Thread(target=self._hook_loop, name="focus-hook", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout)
+        return self._hooked
+
+    def _hook_loop(self):
+        import ctypes
+        from ctypes import wintypes
+        user32 = ctypes.WinDLL('user32', use_last_error=True)
+        proc_type = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND, wintypes.LONG,
+                                       wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        user32.SetWinEventHook.argtypes = [wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, proc_type,
+                                           wintypes.DWORD, wintypes.DWORD, wintypes.DWORD]
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+
+        def on_event(hook, event, hwnd, id_object, id_child, event_thread, event_time):
+            window_hwnd = self.get_hwnd()
+            if window_hwnd and hwnd and hwnd != window_hwnd:
+                self.notify_focus_lost('foreground change')
+
+        self._callback = proc_type(on_event)
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        hook = user32.SetWinEventHook(self.EVENT_SYSTEM_FOREGROUND, self.EVENT_SYSTEM_FOREGROUND, None,
+                                      self._callback, 0, 0, self.WINEVENT_OUTOFCONTEXT)
+        self._hooked = bool(hook)
+        self._ready.set()
+        if not hook:
+            logging.error(f"SetWinEventHook failed (error {ctypes.get_last_error()}).")
+            return
+        # Out-of-context hooks are delivered through this thread's message loop
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        user32.UnhookWinEvent(hook)
+
+    def close(self):
+        super().close()
+        if self._hooked and self._thread_id:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+            self._thread.join(timeout=1.0)
+
+def windows_foreground_probe(get_hwnd):
+    """An is_focused() probe comparing the foreground window with get_hwnd()."""
+    import ctypes
+    user32 = ctypes.windll.user32
+
+    def is_focused():
+        hwnd = get_hwnd()
+        if not hwnd:
+            return None
+        return user32.GetForegroundWindow() == hwnd
+    return is_focused
+
+def create_focus_watcher(on_focus_lost, get_hwnd) -> FocusWatcher:
+    """The best watcher for this platform: the foreground hook, then polling, then blur events only."""
+    if sys.platform != 'win32':
+        return FocusWatcher(on_focus_lost)
+    watcher = WinEventFocusWatcher(on_focus_lost, get_hwnd)
+    try:
+        if watcher.start_hook():
+            return watcher
+    except Exception as e:
+        logging.error(f"Could not install the foreground hook: {e}")
+    logging.warning("Falling back to polling for focus loss.")
+    return PollingFocusWatcher(on_focus_lost, windows_foreground_probe(get_hwnd),
+                               config.FOCUS_POLL_MIN_SECONDS, config.FOCUS_POLL_MAX_SECONDS)
@@ -0,0 +1,28 @@
+import hashlib
+
+# Hashes are stored as "<algorithm prefix><hex digest>". Rows written before
+# the prefix existed hold bare MD5 digests; see database._migrate_content_hashes.
+HASH_PREFIX = "b2:"
+
+def content_hash(data) -> str:
+    """
+    Hashes a bytes-like object with BLAKE2b (128-bit digest).
+    Accepts memoryviews, so large clipboard buffers are hashed without a copy.
+    """
+    return HASH_PREFIX + hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def hash_clip_data(clip_data: dict) -> str | None:
+    """Hashes a clipboard read result ({'type', 'data'}); None if there is nothing to hash."""
+    item_type = clip_data.get('type')
+    if item_type == 'TEXT':
+        data = clip_data.get('data', '').encode('utf-8', errors='ignore')
+    elif item_type == 'IMAGE':
+        # The raw clipboard buffer (DIB/PNG bytes); hashing never decodes the image
+        data = memoryview(clip_data['data'].raw)
+    elif item_type == 'FILES':
+        data = "\n".join(clip_data.get('data', [])).encode('utf-8', errors='ignore')
+    else:
+        return None
+    if not data:
+        return None
+    return content_hash(data)
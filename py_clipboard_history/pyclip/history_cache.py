@@ -0,0 +1,91 @@
+import threading
+
+class RecentHistoryCache:
+    """
+    The newest list rows (newest first), kept in memory as tuples in `columns`
+    order, so opening the window on the unfiltered list needs no query.
+
+    It is write-through: database._notify() applies every change event to it
+    after the write commits and before the next write starts, so events arrive
+    in commit order. A load that raced with a change is discarded, so
+    the cache never holds rows older than an event it has already seen.
+    """
+    __slots__ = ('columns', 'capacity', '_rows', '_complete', '_loaded', '_version', '_lock', '_id_index',
+                 'hits', 'misses')
+
+    def __init__(self, columns: tuple[str, ...], capacity: int = 200):
+        self.columns = columns
+        self.capacity = capacity
+        self._id_index = columns.index('id')
+        self._rows = []
+        self._complete = False  # True if _rows holds every row in the table
+        self._loaded = False
+        self._version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self) -> int:
+        with self._lock:
+            return self._version
+
+    def load(self, rows: list[dict], version: int, complete: bool):
+        """Fills the cache from a query started at `version` (see version())."""
+        with self._lock:
+            if version != self._version:
+                return  # A change landed while the rows were being read
+            self._rows = [tuple(row[c] for c in self.columns) for row in rows[:self.capacity]]
+            self._complete = complete
+            self._loaded = True
+
+    def first_page(self, page_size: int, count: bool = True) -> tuple[list[dict], dict | None] | None:
+        """Returns (items, next_cursor) for the first unfiltered page, or None on a miss."""
+        with self._lock:
+            if not self._loaded or (len(self._rows) < page_size and not self._complete):
+                self.misses += count
+                return None
+            self.hits += count
+            rows = self._rows[:page_size]
+            has_more = len(self._rows) > page_size or not self._complete
+        items = [dict(zip(self.columns, row)) for row in rows]
+        next_cursor = None
+        if has_more and items:
+            next_cursor = {'timestamp': items[-1]['timestamp'], 'id': items[-1]['id']}
+        return items, next_cursor
+
+    def apply(self, event_type: str, payload: dict):
+        """Applies a database change event."""
+        with self._lock:
+            self._version += 1
+            if not self._loaded:
+                return
+            id_index = self._id_index
+            if event_type == 'item_added':
+                item = payload['item']
+                self._rows = [row for row in self._rows if row[id_index] != item['id']]
+                self._rows.insert(0, tuple(item[c] for c in self.columns))
+                if len(self._rows) > self.capacity:
+                    del self._rows[self.capacity:]
+                    self._complete = False
+            elif event_type in ('item_deleted', 'item_pruned'):
+                ids = set(payload['ids']) if 'ids' in payload else {payload['id']}
+                self._rows = [row for row in self._rows if row[id_index] not in ids]
+            elif event_type == 'item_updated':
+                for i, row in enumerate(self._rows):
+                    if row[id_index] == payload['id']:
+                        self._rows[i] = tuple(payload.get(c, value) for c, value in zip(self.columns, row))
+                        break
+            else:
+                # Unknown change: drop everything and reload on the next read
+                self._loaded = False
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._loaded = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'rows': len(self._rows), 'capacity': self.capacity,
+                    'hit_rate': round(self.hits / total, 3) if total else None}
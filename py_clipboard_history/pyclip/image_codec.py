@@ -0,0 +1,193 @@
+"""
+Storage codecs for full-size captured images.
+
+    png   PNG with a tunable zlib level (1 is several times faster than Pillow's default 6)
+    webp  lossless WebP, usually much smaller than PNG for screenshots
+    qoi   QOI; needs a Pillow build that can write it (Pillow's writer is pure Python and slow,
+          so benchmark before choosing it)
+
+"auto" picks IMAGE_CODEC_SMALL or IMAGE_CODEC_LARGE by pixel count. Thumbnails
+are always PNG so the webview can display them whatever the storage codec.
+
+    python -m pyclip.image_codec reencode [--codec webp] [--dry-run]
+    python -m pyclip.image_codec bench <dir with sample screenshots>
+"""
+import io
+import sys
+import time
+import logging
+import argparse
+from pathlib import Path
+
+from . import config
+from . import blob_store
+
+# codec name -> (file extension, Pillow format)
+CODECS = {
+    'png': ('png', 'PNG'),
+    'webp': ('webp', 'WEBP'),
+    'qoi': ('qoi', 'QOI'),
+}
+
+def is_available(codec: str) -> bool:
+    """True if the installed Pillow can write `codec`."""
+    from PIL import Image, features
+    if codec == 'webp':
+        return features.check('webp')
+    if codec == 'qoi':
+        Image.init()
+        return 'QOI' in Image.SAVE
+    return codec == 'png'
+
+def choose_codec(width: int, height: int) -> str:
+    """Picks the storage codec for an image of the given size, falling back to PNG."""
+    codec = config.IMAGE_CODEC
+    if codec == 'auto':
+        codec = config.IMAGE_CODEC_LARGE if width * height > config.IMAGE_CODEC_LARGE_PIXELS else config.IMAGE_CODEC_SMALL
+    if codec not in CODECS or not is_available(codec):
+        return 'png'
+    return codec
+
+def extension(codec: str) -> str:
+    return CODECS[codec][0]
+
+def preview(width: int, height: int, codec: str) -> str:
+    """The list preview of an image entry stored with `codec`."""
+    return f"[Image] {width}x{height} {codec.upper()}"
+
+def codec_for_path(path) -> str | None:
+    """The codec a stored image was written with, judged by its extension."""
+    suffix = Path(path).suffix.lstrip('.').lower()
+    return next((name for name, (ext, _) in CODECS.items() if ext == suffix), None)
+
+def save_image(image, path, codec: str):
+    """Writes `image` to `path` (a file name or file object) with the given codec."""
+    if codec == 'png':
+        image.save(path, 'PNG', compress_level=config.PNG_COMPRESS_LEVEL)
+    elif codec == 'webp':
+        # Lossless WebP: "quality" is the encoder effort, not a quality loss
+        image.save(path, 'WEBP', lossless=True, quality=config.WEBP_LOSSLESS_EFFORT, method=4)
+    elif codec == 'qoi':
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        image.save(path, 'QOI')
+    else:
+        raise ValueError(f"Unknown image codec: {codec}")
+
+def read_as_png(path) -> bytes:
+    """Returns a stored image as PNG bytes, re-encoding it if it was stored in another format."""
+    path = Path(path)
+    if codec_for_path(path) == 'png':
+        return path.read_bytes()
+    from PIL import Image
+    with Image.open(path) as image, io.BytesIO() as buffer:
+        image.save(buffer, 'PNG', compress_level=config.PNG_COMPRESS_LEVEL)
+        return buffer.getvalue()
+
+def reencode_stored_images(codec: str | None = None, dry_run: bool = False) -> dict:
+    """
+    Re-encodes stored full-size images whose format differs from the codec
+    choose_codec() (or `codec`) would pick now, and points their rows at the
+    new files. Changes are notified in this process only: run it while the app
+    is closed, or the app's list keeps showing the old previews until restarted.
+    """
+    from PIL import Image
+    from . import database
+
+    report = {'reencoded': 0, 'failed': 0, 'bytes_before': 0, 'bytes_after': 0}
+    for old_path in database.get_stored_image_paths():
+        old_path = Path(old_path)
+        if not old_path.exists():
+            continue
+        try:
+            with Image.open(old_path) as image:
+                image.load()
+                target = codec or choose_codec(*image.size)
+                if codec_for_path(old_path) == target:
+                    continue
+                new_path = old_path.with_suffix('.' + extension(target))
+                new_preview = preview(*image.size, target)
+                old_size = old_path.stat().st_size
+                if dry_run:
+                    report['bytes_before'] += old_size
+                    report['reencoded'] += 1
+                    continue
+                blob_store.write_atomic(new_path, lambda path: save_image(image, path, target))
+        except Exception as e:
+            logging.error(f"Failed to re-encode {old_path}: {e}")
+            report['failed'] += 1
+            continue
+        if database.replace_image_path(str(old_path), str(new_path), new_preview):
+            old_path.unlink(missing_ok=True)
+            report['bytes_before'] += old_size
+            report['bytes_after'] += new_path.stat().st_size
+            report['reencoded'] += 1
+        else:
+            new_path.unlink(missing_ok=True)
+            report['failed'] += 1
+    logging.info(f"Re-encoded {report['reencoded']} images{' (dry run)' if dry_run else ''}, {report['failed']} failed.")
+    return report
+
+def benchmark(sample_dir, codecs=None, repeat: int = 3) -> list[dict]:
+    """Encodes every image in `sample_dir` with each codec; reports the best encode time and the size."""
+    from PIL import Image
+
+    samples = []
+    for path in sorted(Path(sample_dir).iterdir()):
+        try:
+            with Image.open(path) as image:
+                image.load()
+                samples.append(image.copy())
+        except Exception:
+            continue
+
+    results = []
+    for codec in codecs or list(CODECS):
+        if not is_available(codec):
+            logging.warning(f"Skipping {codec}: not supported by this Pillow build.")
+            continue
+        total_seconds, total_bytes = 0.0, 0
+        for image in samples:
+            best = None
+            for _ in range(repeat):
+                with io.BytesIO() as buffer:
+                    start = time.perf_counter()
+                    save_image(image, buffer, codec)
+                    elapsed = time.perf_counter() - start
+                    size = buffer.tell()
+                best = elapsed if best is None else min(best, elapsed)
+            total_seconds += best
+            total_bytes += size
+        results.append({'codec': codec, 'images': len(samples), 'encode_ms': round(total_seconds * 1000, 1),
+                        'bytes': total_bytes})
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pyclip.image_codec",
+                                     description="Re-encode stored images or benchmark the storage codecs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    reencode_parser = subparsers.add_parser("reencode", help="re-encode stored images with the configured codec (close the app first)")
+    reencode_parser.add_argument("--codec", choices=list(CODECS), help="force this codec instead of choosing by size")
+    reencode_parser.add_argument("--dry-run", action="store_true", help="only count the images that would change")
+    bench_parser = subparsers.add_parser("bench", help="compare encode time and size per codec")
+    bench_parser.add_argument("sample_dir", help="directory of sample screenshots")
+    bench_parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "bench":
+        print(f"{'codec':<6} {'images':>6} {'encode ms':>10} {'bytes':>12}")
+        for row in benchmark(args.sample_dir, repeat=args.repeat):
+            print(f"{row['codec']:<6} {row['images']:>6} {row['encode_ms']:>10} {row['bytes']:>12}")
+        return 0
+
+    from . import database
+    database.init_db()
+    report = reencode_stored_images(args.codec, dry_run=args.dry_run)
+    print(f"Re-encoded: {report['reencoded']}  failed: {report['failed']}  "
+          f"bytes: {report['bytes_before']} -> {report['bytes_after']}")
+    database.close_connections()
+    return 1 if report['failed'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import logging
+import threading
+from collections import deque
+
+from . import config
+from . import database
+from . import blob_store
+from . import image_codec
+from . import dib_cache
+from . import metrics
+from .log_setup import log_throttled
+
+class ImagePersistencePipeline:
+    """
+    Encodes captured images to disk on a small pool of worker threads, so the
+    clipboard monitor never waits on thumbnailing or PNG encoding.
+
+    The history row is inserted by the caller as pending; a worker decodes the
+    image, writes the thumbnail and full-size blob, then marks the row complete.
+    The queue is bounded: when it is full the oldest waiting job is dropped and
+    its pending row deleted, so a burst of screenshots cannot pile up unbounded.
+    """
+    def __init__(self, max_workers: int = 2, max_pending: int = 8):
+        self.max_pending = max_pending
+        self._jobs = deque()
+        self._condition = threading.Condition()
+        self._running = True
+        self.dropped_count = 0
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"image-worker-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, entry_id: int, content_hash: str, clipboard_image, codec: str = 'png'):
+        """Queues an image for encoding; drops the oldest queued job if the queue is full."""
+        dropped = None
+        with self._condition:
+            if len(self._jobs) >= self.max_pending:
+                dropped = self._jobs.popleft()
+                self.dropped_count += 1
+            self._jobs.append((entry_id, content_hash, clipboard_image, codec))
+            self._condition.notify()
+        if dropped:
+            log_throttled(logging.WARNING, 'image_queue_full', f"Image queue full, dropping pending image entry id {dropped[0]}.")
+            database.delete_entry(dropped[0])
+
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._jobs)
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                while self._running and not self._jobs:
+                    self._condition.wait()
+                if not self._jobs:
+                    return
+                job = self._jobs.popleft()
+            self._process(*job)
+
+    def _process(self, entry_id: int, content_hash: str, clipboard_image, codec: str):
+        full_size_path, thumb_path = blob_store.blob_paths(content_hash, image_codec.extension(codec))
+        if blob_store.exists(content_hash):
+            # Seen before (the old row may be a favorite or pruned): reuse the stored blob.
+            # The pending row already references the hash, so the blob can't be released now.
+            stored_path = blob_store.find_blob(content_hash)
+            stored_codec = image_codec.codec_for_path(stored_path) or codec
+            preview = None
+            if stored_codec != codec:
+                width, height = clipboard_image.dimensions()
+                preview = image_codec.preview(width, height, stored_codec)
+            database.complete_pending_image(entry_id, str(stored_path), str(thumb_path), preview)
+            return
+        from PIL import Image
+        try:
+            with metrics.timer('image_decode'):
+                image = clipboard_image.decode()
+            with metrics.timer('image_thumbnail'):
+                thumb_image = image.copy()
+                thumb_image.thumbnail(config.THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+                blob_store.write_atomic(thumb_path, lambda path: thumb_image.save(path, 'PNG'))
+            with metrics.timer(f'image_encode_{codec}'):
+                blob_store.write_atomic(full_size_path, lambda path: image_codec.save_image(image, path, codec))
+        except Exception:
+            logging.error(f"Failed to save image and thumbnail for entry id {entry_id}.", exc_info=True)
+            database.delete_entry(entry_id)
+            return
+        if clipboard_image.format == 'DIB':
+            # Keep the buffer Windows gave us, so pasting this image back needs no re-encode
+            dib_cache.store(content_hash, clipboard_image.raw)
+        database.complete_pending_image(entry_id, str(full_size_path), str(thumb_path))
+
+    def stop(self, timeout: float = 5.0):
+        """Finishes the jobs already queued, then stops the workers."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=timeout)
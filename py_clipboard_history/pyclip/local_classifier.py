@@ -0,0 +1,201 @@
+"""
+Local tagging stage that runs before the LLM.
+
+Obvious clips (URLs, emails, paths, hex colors, JSON, stack traces, numbers)
+are tagged by rules. Everything else goes through an optional naive Bayes
+model trained from the history the LLM already tagged (stored as JSON next to
+the database). Only clips neither stage is confident about are escalated.
+
+    python -m pyclip.local_classifier train
+"""
+import re
+import sys
+import json
+import math
+import logging
+import threading
+from collections import Counter
+
+from . import config
+
+_URL = re.compile(r"(https?|ftp)://[^\s/$.?#][^\s]*", re.IGNORECASE)
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(\.[\w-]+)+")
+_WINDOWS_PATH = re.compile(r"([a-zA-Z]:\\|\\\\)[^\n<>:\"|?*]*")
+_UNIX_PATH = re.compile(r"~?(?:/[^\s/:*?\"<>|]+)+/?")
+_HEX_COLOR = re.compile(r"#([0-9a-fA-F]{3}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})")
+_NUMBER = re.compile(r"[-+]?(\d{1,3}([, ]\d{3})+|\d+)(\.\d+)?")  # Not IP addresses or dotted dates
+_PY_TRACEBACK = re.compile(r"^Traceback \(most recent call last\):", re.MULTILINE)
+_JS_STACK = re.compile(r"^[ \t]+at [^()\n]+\([^()\n]+:\d+:\d+\)$", re.MULTILINE)
+_JAVA_STACK = re.compile(r"^[ \t]+at [\w$.]+\([\w$]+\.java:\d+\)$", re.MULTILINE)
+_LOG_LINE = re.compile(r"^\S*\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}.*\b(DEBUG|INFO|WARN|WARNING|ERROR|CRITICAL)\b", re.MULTILINE)
+
+# Rules look at most this many characters; longer clips are only scanned for
+# stack traces and log lines in their first part, and never parsed as JSON.
+RULES_MAX_CHARS = 20000
+
+_TOKEN = re.compile(r"[A-Za-z_][A-Za-z0-9_]{0,29}|[{}()\[\];:=<>#$@/\\|&*+\-\"'`]")
+
+def classify_rules(text: str) -> list[str] | None:
+    """Tags a clip by pattern, or returns None if no rule is certain."""
+    stripped = text.strip()
+    if not stripped:
+        return None
+    complete = len(stripped) <= RULES_MAX_CHARS
+    if not complete:
+        stripped = stripped[:RULES_MAX_CHARS]
+    single_line = "\n" not in stripped
+    if single_line and complete:
+        if _URL.fullmatch(stripped):
+            return ["URL"]
+        if _EMAIL.fullmatch(stripped):
+            return ["Email"]
+        if _HEX_COLOR.fullmatch(stripped):
+            return ["Color"]
+        if _WINDOWS_PATH.fullmatch(stripped) or (_UNIX_PATH.fullmatch(stripped) and stripped.count("/") > 1):
+            return ["Path"]
+        if _NUMBER.fullmatch(stripped):
+            return ["Number"]
+    if _PY_TRACEBACK.search(stripped):
+        return ["Log", "Python"]
+    if _JAVA_STACK.search(stripped):
+        return ["Log", "Code"]
+    if _JS_STACK.search(stripped):
+        return ["Log", "JavaScript"]
+    if complete and stripped[0] in "{[" and stripped[-1] in "}]":
+        try:
+            json.loads(stripped)
+            return ["JSON"]
+        except ValueError:
+            pass
+    if len(_LOG_LINE.findall(stripped)) >= 2:
+        return ["Log"]
+    return None
+
+def _tokens(text: str) -> list[str]:
+    return [token.lower() for token in _TOKEN.findall(text[:2500])]
+
+class NaiveBayesModel:
+    """
+    Multinomial naive Bayes over word and symbol tokens, predicting the tag
+    set a clip was given as one label.
+    """
+    def __init__(self, label_docs=None, token_counts=None, vocabulary_size: int = 0):
+        self.label_docs = label_docs or {}  # label -> number of training clips
+        self.token_counts = token_counts or {}  # label -> {token: count}
+        self.vocabulary_size = vocabulary_size
+        self._totals = {label: sum(counts.values()) for label, counts in self.token_counts.items()}
+
+    @classmethod
+    def train(cls, samples: list[tuple[str, list[str]]]) -> "NaiveBayesModel":
+        label_docs, token_counts, vocabulary = Counter(), {}, set()
+        for text, tags in samples:
+            label = ",".join(sorted(tags))
+            tokens = _tokens(text)
+            label_docs[label] += 1
+            token_counts.setdefault(label, Counter()).update(tokens)
+            vocabulary.update(tokens)
+        return cls(dict(label_docs), {label: dict(counts) for label, counts in token_counts.items()}, len(vocabulary))
+
+    def predict(self, text: str) -> tuple[list[str], float] | None:
+        """Returns (tags, posterior probability) for the most likely tag set."""
+        total_docs = sum(self.label_docs.values())
+        tokens = _tokens(text)
+        if not total_docs or not tokens:
+            return None
+        scores = {}
+        for label, docs in self.label_docs.items():
+            counts, denominator = self.token_counts[label], self._totals[label] + self.vocabulary_size + 1
+            score = math.log(docs / total_docs)
+            for token in tokens:
+                score += math.log((counts.get(token, 0) + 1) / denominator)
+            scores[label] = score
+        best = max(scores, key=scores.get)
+        # Posterior of the best label via log-sum-exp
+        top = scores[best]
+        probability = 1.0 / sum(math.exp(score - top) for score in scores.values())
+        return best.split(","), probability
+
+    def to_dict(self) -> dict:
+        return {'label_docs': self.label_docs, 'token_counts': self.token_counts, 'vocabulary_size': self.vocabulary_size}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "NaiveBayesModel":
+        return cls(data['label_docs'], data['token_counts'], data['vocabulary_size'])
+
+def train_from_history() -> NaiveBayesModel | None:
+    """Trains the model from LLM-tagged history and saves it to LOCAL_MODEL_PATH."""
+    from . import database
+
+    samples = database.get_ai_tagged_texts(config.LOCAL_MODEL_MAX_SAMPLES)
+    if len(samples) < config.LOCAL_MODEL_MIN_SAMPLES:
+        logging.info(f"Not training the local tag model: {len(samples)} tagged clips, need {config.LOCAL_MODEL_MIN_SAMPLES}.")
+        return None
+    model = NaiveBayesModel.train(samples)
+    tmp_path = config.LOCAL_MODEL_PATH.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(model.to_dict()), encoding="utf-8")
+    tmp_path.replace(config.LOCAL_MODEL_PATH)
+    logging.info(f"Trained local tag model on {len(samples)} clips ({len(model.label_docs)} tag sets).")
+    return model
+
+def load_model() -> NaiveBayesModel | None:
+    try:
+        return NaiveBayesModel.from_dict(json.loads(config.LOCAL_MODEL_PATH.read_text(encoding="utf-8")))
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError) as e:
+        logging.warning(f"Ignoring unreadable local tag model: {e}")
+        return None
+
+class LocalClassifier:
+    """Rules, then the trained model; keeps hit counts for stats()."""
+    def __init__(self, min_confidence: float = 0.9, use_model: bool = True):
+        self.min_confidence = min_confidence
+        self.model = load_model() if use_model else None
+        self._lock = threading.Lock()
+        self.rule_hits = 0
+        self.model_hits = 0
+        self.escalations = 0
+
+    def classify(self, text: str) -> list[str] | None:
+        """Returns tags if the local stages are confident, otherwise None (escalate to the LLM)."""
+        tags = classify_rules(text)
+        if tags:
+            with self._lock:
+                self.rule_hits += 1
+            return tags
+        model = self.model
+        prediction = model.predict(text) if model else None
+        tags = [tag for tag in prediction[0] if tag in config.ALLOWED_TAGS] if prediction else None
+        if tags and prediction[1] >= self.min_confidence:
+            with self._lock:
+                self.model_hits += 1
+            return tags
+        with self._lock:
+            self.escalations += 1
+        return None
+
+    def retrain(self):
+        model = train_from_history()
+        if model:
+            self.model = model
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.rule_hits + self.model_hits + self.escalations
+            return {'rule_hits': self.rule_hits, 'model_hits': self.model_hits, 'escalations': self.escalations,
+                    'hit_rate': round((self.rule_hits + self.model_hits) / total, 3) if total else None,
+                    'model_loaded': self.model is not None}
+
+def main(argv=None):
+    from . import database
+    logging.basicConfig(level=logging.INFO)
+    if (argv if argv is not None else sys.argv[1:]) != ["train"]:
+        print("usage: python -m pyclip.local_classifier train")
+        return 2
+    database.init_db()
+    model = train_from_history()
+    database.close_connections()
+    return 0 if model else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
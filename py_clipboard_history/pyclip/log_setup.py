@@ -0,0 +1,115 @@
+"""
+Non-blocking logging pipeline.
+
+Every record goes through a QueueHandler into an in-memory queue; a single
+QueueListener thread owns the rotating file and console handlers, so disk and
+console I/O never run on the capture, search or bridge threads. LOG_FORMAT
+"json" writes one JSON object per line instead of the text format.
+
+Hot paths that can repeat many times a second use log_throttled(), which
+emits a message at most once per LOG_THROTTLE_SECONDS per key and reports how
+many were suppressed in between.
+"""
+import copy
+import json
+import time
+import queue
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from . import config
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - [%(module)s.%(funcName)s] - %(message)s'
+
+_listener = None
+_throttle_lock = threading.Lock()
+_throttled = {}  # key -> [last emitted (monotonic), suppressed count]
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve args and the traceback on the calling thread (they may not survive
+        # the hand-off), but keep them apart so JsonFormatter can emit separate fields
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers and grep-free analysis."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f".{int(record.msecs):03d}",
+            'level': record.levelname,
+            'logger': record.name,
+            'where': f"{record.module}.{record.funcName}",
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+def setup_logging(level: int | str | None = None, structured: bool | None = None) -> QueueListener:
+    """
+    Routes the root logger through a queue to a background listener writing
+    to LOG_FILE_PATH (rotated at 5 MB) and the console.
+    """
+    global _listener
+    shutdown_logging()
+    config.LOG_FILE_PATH.parent.mkdir(exist_ok=True)
+    structured = config.LOG_FORMAT == "json" if structured is None else structured
+    formatter = JsonFormatter() if structured else logging.Formatter(TEXT_FORMAT)
+
+    file_handler = RotatingFileHandler(
+        config.LOG_FILE_PATH,
+        maxBytes=5 * 1024 * 1024,  # 5 MB
+        backupCount=1,
+        encoding='utf-8'
+    )
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger()
+    logger.setLevel(level or config.LOG_LEVEL)
+    if logger.hasHandlers():
+        logger.handlers.clear()
+    logger.addHandler(_QueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def shutdown_logging():
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+def log_throttled(level: int, key: str, message: str, interval: float | None = None):
+    """Logs `message` unless a message with the same key was logged in the last `interval` seconds."""
+    logger = logging.getLogger()
+    if not logger.isEnabledFor(level):
+        return
+    interval = config.LOG_THROTTLE_SECONDS if interval is None else interval
+    now = time.monotonic()
+    with _throttle_lock:
+        state = _throttled.get(key)
+        if state is not None and now - state[0] < interval:
+            state[1] += 1
+            return
+        suppressed = state[1] if state else 0
+        _throttled[key] = [now, 0]
+    if suppressed:
+        message = f"{message} ({suppressed} similar messages suppressed)"
+    logger.log(level, message, stacklevel=2)
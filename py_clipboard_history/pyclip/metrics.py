@@ -0,0 +1,174 @@
+"""
+Lightweight in-process timers, histograms and counters for the hot paths.
+
+    with metrics.timer("clipboard_read"): ...
+    @metrics.timed("api_get_history_page")
+    metrics.increment("captures")
+
+Durations go into fixed Prometheus-style buckets plus a window of recent
+samples for percentiles. snapshot() feeds Api.get_metrics(); prometheus_text()
+is the text exposition format, also written to METRICS_DUMP_PATH. With
+METRICS_ENABLED off, timer() hands back a shared no-op context and nothing
+is recorded.
+"""
+import time
+import threading
+import functools
+from collections import deque
+
+from . import config
+
+# Latest samples kept per metric; percentiles are computed over this window
+WINDOW = 500
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+enabled = config.METRICS_ENABLED
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+class _Histogram:
+    __slots__ = ('bucket_counts', 'count', 'sum', 'recent')
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=WINDOW)
+
+    def add(self, seconds: float):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _Timer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+def observe(name: str, seconds: float):
+    """Records one duration sample for `name`."""
+    if not enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = _Histogram()
+        histogram.add(seconds)
+
+def increment(name: str, value: int = 1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def timer(name: str):
+    """Context manager timing its block into the `name` histogram."""
+    return _Timer(name) if enabled else _NULL_TIMER
+
+def timed(name: str):
+    """Decorator timing every call of the function into the `name` histogram."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def _percentile(samples: list[float], p: float) -> float:
+    return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2)
+
+def summary(name: str) -> dict:
+    """Count and p50/p95/max in milliseconds over the recent samples of `name`."""
+    with _lock:
+        histogram = _histograms.get(name)
+        samples = sorted(histogram.recent) if histogram else []
+    if not samples:
+        return {'count': 0, 'p50_ms': None, 'p95_ms': None, 'max_ms': None}
+    return {'count': len(samples), 'p50_ms': _percentile(samples, 0.5), 'p95_ms': _percentile(samples, 0.95),
+            'max_ms': round(samples[-1] * 1000, 2)}
+
+def snapshot() -> dict:
+    """Every metric: timers with totals and recent percentiles, plus counters."""
+    with _lock:
+        names = list(_histograms)
+        totals = {name: (h.count, h.sum) for name, h in _histograms.items()}
+        counters = dict(_counters)
+    timers = {}
+    for name in names:
+        count, total = totals[name]
+        timers[name] = {**summary(name), 'total_count': count, 'total_ms': round(total * 1000, 2)}
+    return {'enabled': enabled, 'timers': timers, 'counters': counters}
+
+def prometheus_text() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        histograms = {name: (list(h.bucket_counts), h.count, h.sum) for name, h in _histograms.items()}
+        counters = dict(_counters)
+    for name, (bucket_counts, count, total) in sorted(histograms.items()):
+        metric = f"pyclip_{name}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS, bucket_counts):
+            cumulative += bucket_count
+            lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{le="+Inf"}} {count}')
+        lines.append(f"{metric}_sum {total:.6f}")
+        lines.append(f"{metric}_count {count}")
+    for name, value in sorted(counters.items()):
+        lines.append(f"# TYPE pyclip_{name}_total counter")
+        lines.append(f"pyclip_{name}_total {value}")
+    return "\n".join(lines) + "\n"
+
+def dump(path=None):
+    """Writes prometheus_text() to `path` (default METRICS_DUMP_PATH), e.g. for a node_exporter textfile collector."""
+    path = path or config.METRICS_DUMP_PATH
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(prometheus_text(), encoding="utf-8")
+    tmp_path.replace(path)
+
+def start_periodic_dump(stop_event: threading.Event, interval: float | None = None):
+    """Rewrites the text dump every `interval` seconds until stop_event is set."""
+    interval = interval or config.METRICS_DUMP_INTERVAL_SECONDS
+
+    def loop():
+        while not stop_event.wait(interval):
+            try:
+                dump()
+            except OSError:
+                pass  # Best effort; the next interval tries again
+    if enabled and interval > 0:
+        threading.Thread(target=loop, name="metrics-dump", daemon=True).start()
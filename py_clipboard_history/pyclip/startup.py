@@ -0,0 +1,118 @@
+"""
+Startup timeline and import-time report.
+
+main.py imports this module first and marks each startup phase with mark();
+report() (also Api.get_startup_report) gives the elapsed time of every phase
+and whether the hotkey was ready within STARTUP_TARGET_SECONDS.
+
+    python -m pyclip.startup [--top N]
+
+runs the app's startup imports under `python -X importtime` in a subprocess
+and lists the modules that cost the most, against the same target.
+"""
+import sys
+import time
+import logging
+import threading
+from pathlib import Path
+
+from . import config
+
+# Modules main.py imports before the hotkey is live, in import order
+STARTUP_MODULES = ("pyclip.app", "pyclip.api")
+# Imported after the hotkey is live, to create the window; reported outside the target
+WINDOW_MODULES = ("webview",)
+
+_T0 = time.perf_counter()
+_lock = threading.Lock()
+_phases = []  # (name, seconds since _T0)
+
+def mark(name: str):
+    """Records that startup phase `name` finished now."""
+    with _lock:
+        _phases.append((name, time.perf_counter() - _T0))
+
+def report() -> dict:
+    with _lock:
+        phases = list(_phases)
+    elapsed = dict(phases)
+    hotkey_ready = elapsed.get('hotkey_ready')
+    return {
+        'phases': [{'name': name, 'ms': round(seconds * 1000, 1)} for name, seconds in phases],
+        'hotkey_ready_ms': round(hotkey_ready * 1000, 1) if hotkey_ready is not None else None,
+        'target_ms': config.STARTUP_TARGET_SECONDS * 1000,
+        'within_target': hotkey_ready <= config.STARTUP_TARGET_SECONDS if hotkey_ready is not None else None,
+    }
+
+def log_summary():
+    summary = report()
+    phases = ", ".join(f"{phase['name']} {phase['ms']:.0f}ms" for phase in summary['phases'])
+    level = logging.INFO if summary['within_target'] is not False else logging.WARNING
+    logging.log(level, f"Startup: {phases} (hotkey target {summary['target_ms']:.0f}ms)")
+
+def import_times(modules=STARTUP_MODULES) -> tuple[list[tuple[str, int, int, int]], list[str]]:
+    """
+    Imports `modules` in a fresh interpreter with -X importtime.
+    Returns ([(module, self_us, cumulative_us, depth)], [modules that failed to import]).
+    """
+    import subprocess
+    # __import__ rather than importlib.import_module, which -X importtime does not report
+    script = (f"for name in {list(modules)!r}:\n"
+              "    try:\n"
+              "        __import__(name)\n"
+              "    except Exception:\n"
+              "        print(name)\n")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", script],
+                          capture_output=True, text=True, cwd=Path(__file__).parent.parent)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows, proc.stdout.split()
+
+def group_totals(rows, modules) -> dict[str, int]:
+    """
+    Splits import_times() rows by the module in `modules` (in import order)
+    that caused them: each gets the microseconds of the top-level imports up to
+    its own, so interpreter startup counts toward the first one.
+    """
+    totals = dict.fromkeys(modules, 0)
+    pending = 0
+    for name, _, cumulative_us, depth in rows:
+        if depth:
+            continue
+        pending += cumulative_us
+        if name in totals:
+            totals[name] += pending
+            pending = 0
+    return totals
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m pyclip.startup", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--top", type=int, default=20, help="number of slowest modules to list")
+    args = parser.parse_args(argv)
+
+    rows, failed = import_times(STARTUP_MODULES + WINDOW_MODULES)
+    totals = group_totals(rows, STARTUP_MODULES + WINDOW_MODULES)
+    total_us = sum(totals[name] for name in STARTUP_MODULES)
+    window_us = sum(totals[name] for name in WINDOW_MODULES)
+    print(f"{'self ms':>9} {'cumul. ms':>10}  module")
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:10.1f}  {name}")
+    print("\nTop-level imports:")
+    for name, _, cumulative_us, depth in sorted(rows, key=lambda row: row[2], reverse=True):
+        if depth == 0 and cumulative_us >= 1000:
+            print(f"{cumulative_us / 1000:10.1f}  {name}")
+    print(f"\nImport time before the hotkey: {total_us / 1000:.1f} ms "
+          f"(hotkey-ready target {config.STARTUP_TARGET_SECONDS * 1000:.0f} ms)")
+    print(f"Imported after the hotkey ({', '.join(WINDOW_MODULES)}): {window_us / 1000:.1f} ms")
+    if failed:
+        print(f"Could not import: {', '.join(failed)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+import time
+import random
+import logging
+import threading
+from collections import deque
+
+from . import config
+from . import database
+from . import ai_classifier
+from . import metrics
+from .log_setup import log_throttled
+
+class TokenBucket:
+    """Allows `rate_per_minute` requests on average, with bursts of up to `burst`; a rate of 0 means no limit."""
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate = max(0.0, rate_per_minute) / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    def acquire(self, stop_event: threading.Event) -> bool:
+        """Waits for a token; returns False if stop_event is set first."""
+        if not self.rate:
+            return not stop_event.is_set()
+        while not stop_event.is_set():
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            stop_event.wait((1 - self._tokens) / self.rate)
+        return False
+
+class TaggingQueue:
+    """
+    Tags text clips with the configured AI provider on a single worker thread.
+
+    Clips are queued (bounded; the oldest is dropped when full) and tried on
+    the worker thread with the local classifier (rules and a model trained from
+    earlier LLM results) as they arrive. Only clips it is unsure about are grouped into
+    batches of up to AI_TAGGING_BATCH_SIZE snippets per request, rate limited
+    by a token bucket and retried with exponential backoff. Tags are cached
+    by content hash in the database, so text that was classified before never
+    reaches the API again. Pointing the `ai_base_url` setting at a local stub
+    server exercises the whole path offline.
+    """
+    def __init__(self, get_settings, max_pending: int = 64, batch_size: int = 8, batch_wait: float = 2.0,
+                 rate_per_minute: float = 20, burst: int = 3, max_retries: int = 4, local_classifier=None):
+        self._get_settings = get_settings
+        self.local_classifier = local_classifier
+        self._results_since_training = 0
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_retries = max_retries
+        self._bucket = TokenBucket(rate_per_minute, burst)
+        self._jobs = deque()
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self.dropped_count = 0
+        self.cache_hits = 0
+        self.requests = 0
+        self._worker = threading.Thread(target=self._worker_loop, name="ai-tagging", daemon=True)
+        self._worker.start()
+
+    def submit(self, entry_id: int, content_hash: str, text: str):
+        """Queues a clip for tagging; drops the oldest queued clip if the queue is full."""
+        with self._condition:
+            if len(self._jobs) >= self.max_pending:
+                dropped = self._jobs.popleft()
+                self.dropped_count += 1
+                log_throttled(logging.WARNING, 'tagging_queue_full', f"AI tagging queue full, skipping entry id {dropped[0]}.")
+            self._jobs.append((entry_id, content_hash, text))
+            self._condition.notify()
+
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._jobs)
+
+    def _next_batch(self) -> list[tuple]:
+        """
+        Tags queued clips locally as they arrive and collects the rest: blocks
+        for the first clip the local classifier can't tag, then waits up to
+        batch_wait for the batch to fill.
+        """
+        batch, deadline = [], None
+        while len(batch) < self.batch_size:
+            with self._condition:
+                while not self._jobs and not self._stop.is_set():
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        return batch
+                    self._condition.wait(remaining)
+                if self._stop.is_set():
+                    return batch
+                job = self._jobs.popleft()
+            if not self._tag_locally(*job):
+                batch.append(job)
+                if deadline is None:
+                    deadline = time.monotonic() + self.batch_wait
+        return batch
+
+    def _tag_locally(self, entry_id: int, content_hash: str, text: str) -> bool:
+        """Tags a clip with the local classifier; returns False if it has to go to the LLM."""
+        if not self.local_classifier:
+            return False
+        try:
+            with metrics.timer('ai_local_classify'):
+                tags = self.local_classifier.classify(text)
+        except Exception:
+            logging.error(f"Local classification failed for entry id {entry_id}.", exc_info=True)
+            return False
+        if tags:
+            database.update_entry_tags(entry_id, tags)
+        return bool(tags)
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                try:
+                    self._process(batch)
+                except Exception:
+                    logging.error("AI tagging batch failed.", exc_info=True)
+
+    def _process(self, batch: list[tuple]):
+        # Duplicates within the batch and previously classified text come from the cache
+        cached = database.get_cached_tags([content_hash for _, content_hash, _ in batch])
+        to_classify = {}
+        for entry_id, content_hash, text in batch:
+            if content_hash in cached:
+                self.cache_hits += 1
+                database.update_entry_tags(entry_id, cached[content_hash])
+            else:
+                to_classify.setdefault(content_hash, (text, []))[1].append(entry_id)
+        if not to_classify:
+            return
+
+        settings = self._get_settings()
+        if not settings.get('enable_ai_tagging') or not ai_classifier.is_configured(settings):
+            log_throttled(logging.WARNING, 'tagging_not_configured', "AI classification skipped: tagging is disabled or not configured.")
+            return
+        hashes = list(to_classify)
+        results = self._classify_with_retries([to_classify[h][0] for h in hashes], settings)
+        if results is None:
+            return
+
+        new_cache = []
+        for content_hash, tags in zip(hashes, results):
+            if not tags:
+                continue
+            new_cache.append((content_hash, tags))
+            for entry_id in to_classify[content_hash][1]:
+                database.update_entry_tags(entry_id, tags)
+        database.cache_tags(new_cache, settings.get('ai_model_name'))
+
+        self._results_since_training += len(new_cache)
+        if self.local_classifier and self._results_since_training >= config.LOCAL_MODEL_RETRAIN_EVERY:
+            self._results_since_training = 0
+            self.local_classifier.retrain()
+
+    def _classify_with_retries(self, texts: list[str], settings: dict) -> list[list[str]] | None:
+        for attempt in range(self.max_retries + 1):
+            if not self._bucket.acquire(self._stop):
+                return None
+            self.requests += 1
+            try:
+                with metrics.timer('ai_classify_batch'):
+                    return ai_classifier.classify_batch(texts, settings)
+            except Exception as e:
+                metrics.increment('ai_classify_errors')
+                if attempt == self.max_retries or not ai_classifier.is_retryable(e):
+                    logging.error(f"AI classification failed after {attempt + 1} attempts: {e}")
+                    return None
+                delay = min(60.0, 2 ** attempt) * random.uniform(0.5, 1.5)
+                logging.warning(f"AI classification failed ({e}), retrying in {delay:.1f}s.")
+                if self._stop.wait(delay):
+                    return None
+        return None
+
+    def stats(self) -> dict:
+        stats = {'pending': self.pending_count(), 'dropped': self.dropped_count,
+                 'cache_hits': self.cache_hits, 'requests': self.requests}
+        if self.local_classifier:
+            stats['local'] = self.local_classifier.stats()
+        return stats
+
+    def stop(self, timeout: float = 2.0):
+        """Stops the worker; clips still queued are left untagged."""
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        self._worker.join(timeout=timeout)
@@ -0,0 +1,153 @@
+import io
+import re
+import secrets
+import logging
+import threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from . import config
+from . import database
+
+class ThumbnailServer:
+    """
+    Serves image thumbnails to the webview over a loopback HTTP server.
+
+    URLs are content-addressed (<base_url>/<content hash digest>?size=N), so
+    responses are sent as immutable with an ETag and the webview caches them
+    across list rebuilds. Sized variants are generated lazily from the stored
+    thumbnail (or the full image for sizes above it) and kept in an LRU byte
+    cache bounded by max_bytes. The random path token keeps other local
+    processes from enumerating thumbnails.
+    """
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self._token = secrets.token_urlsafe(16)
+        self._server = None
+        self.base_url = None
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass  # Every thumbnail request would otherwise go to the app log
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        port = self._server.server_address[1]
+        self.base_url = f"http://127.0.0.1:{port}/{self._token}"
+        threading.Thread(target=self._server.serve_forever, name="thumbnail-server", daemon=True).start()
+        logging.info(f"Thumbnail server listening on 127.0.0.1:{port}")
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @staticmethod
+    def variant_size(requested: int) -> int:
+        """Rounds a requested size up to one of the configured variant sizes."""
+        sizes = sorted(config.THUMBNAIL_VARIANT_SIZES)
+        return next((size for size in sizes if size >= requested), sizes[-1])
+
+    def _handle(self, request):
+        url = urlparse(request.path)
+        match = re.fullmatch(rf"/{re.escape(self._token)}/([0-9a-f]{{8,64}})", url.path)
+        if not match:
+            request.send_error(404)
+            return
+        digest = match.group(1)
+        try:
+            size = self.variant_size(int(parse_qs(url.query).get('size', ['0'])[0]))
+        except ValueError:
+            request.send_error(400)
+            return
+
+        etag = f'"{digest}-{size}"'
+        if request.headers.get('If-None-Match') == etag:
+            request.send_response(304)
+            request.send_header('ETag', etag)
+            request.end_headers()
+            return
+
+        data = self.get_variant(digest, size)
+        if data is None:
+            request.send_error(404)
+            return
+        request.send_response(200)
+        request.send_header('Content-Type', 'image/png')
+        request.send_header('Content-Length', str(len(data)))
+        request.send_header('ETag', etag)
+        request.send_header('Cache-Control', 'public, max-age=31536000, immutable')
+        request.end_headers()
+        request.wfile.write(data)
+
+    def get_variant(self, digest: str, size: int) -> bytes | None:
+        """Returns the PNG bytes of a thumbnail variant, from the cache or generated on a miss."""
+        key = (digest, size)
+        with self._lock:
+            data = self._cache.get(key)
+            if data is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        data = self._render(digest, size)
+        if data is not None:
+            self._put(key, data)
+        return data
+
+    def _render(self, digest: str, size: int) -> bytes | None:
+        paths = database.get_image_paths(digest)
+        if not paths:
+            return None
+        thumbnail_path, full_path = paths['thumbnail_path'], paths['content']
+        stored_size = max(config.THUMBNAIL_SIZE)
+        if size == stored_size and thumbnail_path:
+            # The stored thumbnail is already this variant
+            try:
+                with open(thumbnail_path, 'rb') as f:
+                    return f.read()
+            except OSError:
+                pass
+
+        from PIL import Image
+        # Smaller variants are downscaled from the stored thumbnail, larger ones from the full image
+        source = thumbnail_path if thumbnail_path and size <= stored_size else full_path
+        try:
+            with Image.open(source) as image, io.BytesIO() as buffer:
+                image.thumbnail((size, size), Image.Resampling.LANCZOS)
+                image.save(buffer, 'PNG')
+                return buffer.getvalue()
+        except Exception as e:
+            logging.error(f"Failed to render {size}px thumbnail from {source}: {e}")
+            return None
+
+    def _put(self, key, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = data
+            self._cache_bytes += len(data)
+            while self._cache_bytes > self.max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._cache),
+                    'bytes': self._cache_bytes, 'max_bytes': self.max_bytes}
@@ -0,0 +1,101 @@
+import json
+import logging
+import threading
+
+from . import metrics
+from .log_setup import log_throttled
+
+class UiEventChannel:
+    """
+    Pushes small list deltas to the frontend instead of asking it to reload.
+
+    Events are buffered for `flush_delay` seconds and then sent in a single
+    `window.app.applyEvents([...])` call, so a burst of captures results in
+    one bridge round-trip and one re-render.
+    """
+    def __init__(self, flush_delay: float = 0.1):
+        self.flush_delay = flush_delay
+        self._window = None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def set_window(self, window):
+        self._window = window
+
+    def publish(self, event_type: str, payload: dict):
+        """Queues an event; matches the database change listener signature."""
+        with self._lock:
+            self._pending.append({'type': event_type, **payload})
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Sends all pending events to the frontend now."""
+        with self._lock:
+            events = _coalesce(self._pending)
+            self._pending = []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not events or not self._window:
+            return
+        try:
+            with metrics.timer('ui_push_events'):
+                self._window.evaluate_js(f'if(window.app) window.app.applyEvents({json.dumps(events)});')
+        except Exception as e:
+            log_throttled(logging.ERROR, 'ui_push_failed', f"Failed to push {len(events)} events to frontend: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending = []
+
+def _coalesce(events: list[dict]) -> list[dict]:
+    """
+    Collapses a burst of events into the smallest equivalent list: updates are
+    folded into an item added in the same batch, repeated updates are merged,
+    and an item added then removed in the same batch is dropped entirely.
+    """
+    result = []
+    added = {}    # id -> item_added event in result
+    updated = {}  # id -> item_updated event in result
+
+    def remove(item_id):
+        if item_id in added:
+            result.remove(added.pop(item_id))
+            return False
+        if item_id in updated:
+            result.remove(updated.pop(item_id))
+        return True
+
+    for event in events:
+        event_type = event['type']
+        if event_type == 'item_added':
+            item_id = event['item']['id']
+            added[item_id] = {'type': 'item_added', 'item': dict(event['item'])}
+            result.append(added[item_id])
+        elif event_type == 'item_updated':
+            item_id = event['id']
+            fields = {k: v for k, v in event.items() if k not in ('type', 'id')}
+            if item_id in added:
+                added[item_id]['item'].update(fields)
+            elif item_id in updated:
+                updated[item_id].update(fields)
+            else:
+                updated[item_id] = dict(event)
+                result.append(updated[item_id])
+        elif event_type == 'item_deleted':
+            if remove(event['id']):
+                result.append(event)
+        elif event_type == 'item_pruned':
+            ids = [item_id for item_id in event['ids'] if remove(item_id)]
+            if ids:
+                result.append({'type': 'item_pruned', 'ids': ids})
+        else:
+            result.append(event)
+    return result
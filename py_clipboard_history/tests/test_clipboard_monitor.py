@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from pyclip import config
+from pyclip.change_token import ChangeTokenSource
+from pyclip.clipboard_fake import FakeClipboardBackend
+from pyclip.clipboard_monitor import ClipboardMonitor
+
+POLL_INTERVAL = 0.1
+
+class FailingTokenSource(ChangeTokenSource):
+    def current_token(self):
+        raise OSError("token unavailable")
+
+@pytest.fixture
+def monitor_factory(monkeypatch):
+    monkeypatch.setattr(config, 'CHANGE_POLL_INTERVAL_SECONDS', POLL_INTERVAL)
+    monitors = []
+
+    def start(backend, token_source=None):
+        captured = []
+        monitor = ClipboardMonitor(lambda item: captured.append((time.monotonic(), item)), backend, token_source)
+        monitor.start()
+        monitors.append(monitor)
+        return captured
+    yield start
+    for monitor in monitors:
+        monitor.stop()
+        monitor.join(timeout=2)
+
+def test_unchanged_token_does_not_read(monitor_factory, wait_until):
+    backend = FakeClipboardBackend()
+    backend.set_text("first")
+    captured = monitor_factory(backend)
+    assert wait_until(lambda: captured)
+    reads = backend.read_count
+
+    time.sleep(POLL_INTERVAL * 5)
+    assert backend.read_count == reads
+    assert len(captured) == 1
+
+def test_token_change_is_captured_within_one_interval(monitor_factory, wait_until):
+    backend = FakeClipboardBackend()
+    captured = monitor_factory(backend)
+    time.sleep(POLL_INTERVAL * 2)
+
+    changed_at = time.monotonic()
+    backend.set_text("copied")
+    assert wait_until(lambda: captured, timeout=1.0)
+    captured_at, item = captured[0]
+    assert item['data'] == {'type': 'TEXT', 'data': 'copied'}
+    assert captured_at - changed_at <= POLL_INTERVAL * 1.5  # One interval, plus scheduling slack
+
+def test_failing_token_source_falls_back_to_interval_reads(monitor_factory, monkeypatch, wait_until):
+    monkeypatch.setattr(config, 'POLLING_INTERVAL_SECONDS', 0.1)
+    backend = FakeClipboardBackend()
+    captured = monitor_factory(backend, FailingTokenSource())
+
+    time.sleep(0.55)
+    # One full read per POLLING_INTERVAL_SECONDS: neither stalled nor spinning
+    assert 3 <= backend.read_count <= 7
+
+    backend.set_text("still captured")
+    assert wait_until(lambda: captured, timeout=1.0)
+    assert captured[0][1]['data']['data'] == "still captured"
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from pyclip.focus_watcher import PollingFocusWatcher
+
+MIN_INTERVAL, MAX_INTERVAL = 0.02, 0.1
+
+class FakeProbe:
+    """An is_focused() probe returning `focused`, recording when it was called."""
+    def __init__(self, focused=True):
+        self.focused = focused
+        self.calls = []
+
+    def __call__(self):
+        self.calls.append(time.monotonic())
+        return self.focused
+
+@pytest.fixture
+def watcher_factory():
+    watchers = []
+
+    def make(probe):
+        lost = []
+        watcher = PollingFocusWatcher(lambda: lost.append(time.monotonic()), probe, MIN_INTERVAL, MAX_INTERVAL)
+        watchers.append(watcher)
+        return watcher, lost
+    yield make
+    for watcher in watchers:
+        watcher.close()
+
+def test_polls_only_while_armed(watcher_factory, wait_until):
+    probe = FakeProbe(focused=True)
+    watcher, lost = watcher_factory(probe)
+    time.sleep(MAX_INTERVAL)
+    assert probe.calls == []
+
+    watcher.arm()
+    assert wait_until(lambda: len(probe.calls) >= 2)
+    watcher.disarm()
+    time.sleep(MIN_INTERVAL)  # A poll already past its wait may still finish
+    calls = len(probe.calls)
+    time.sleep(MAX_INTERVAL * 3)
+    assert len(probe.calls) == calls
+
+    watcher.arm()
+    assert wait_until(lambda: len(probe.calls) > calls)
+    assert lost == []
+
+def test_focus_lost_is_reported_once_per_arm(watcher_factory, wait_until):
+    probe = FakeProbe(focused=False)
+    watcher, lost = watcher_factory(probe)
+
+    watcher.arm()
+    assert wait_until(lambda: lost)
+    time.sleep(MAX_INTERVAL * 3)
+    assert len(lost) == 1
+    assert watcher.focus_lost_count == 1
+
+    watcher.arm()
+    assert wait_until(lambda: len(lost) == 2)
+    time.sleep(MAX_INTERVAL * 3)
+    assert len(lost) == 2
+
+def test_poll_interval_backs_off_from_min_to_max(watcher_factory, wait_until):
+    probe = FakeProbe(focused=True)
+    watcher, _ = watcher_factory(probe)
+
+    armed_at = time.monotonic()
+    watcher.arm()
+    assert wait_until(lambda: len(probe.calls) >= 10, timeout=3.0)
+    gaps = [b - a for a, b in zip([armed_at] + probe.calls, probe.calls)]
+    assert gaps[0] < MAX_INTERVAL / 2  # The first poll comes after about MIN_INTERVAL
+    assert gaps[-1] >= MAX_INTERVAL * 0.9  # Later polls are MAX_INTERVAL apart
+    assert all(gap <= MAX_INTERVAL * 2 for gap in gaps)  # And never slower than that
+    assert watcher._interval == MAX_INTERVAL
+
+    # Showing the window again starts over at the minimum interval
+    watcher.disarm()
+    calls = len(probe.calls)
+    rearmed_at = time.monotonic()
+    watcher.arm()
+    assert wait_until(lambda: len(probe.calls) > calls)
+    assert probe.calls[calls] - rearmed_at < MAX_INTERVAL / 2
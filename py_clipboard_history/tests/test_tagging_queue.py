@@ -0,0 +1,155 @@
+import re
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+pytest.importorskip("openai")
+
+from pyclip import database, tagging_queue
+from pyclip.tagging_queue import TaggingQueue, TokenBucket
+
+class StubLLM:
+    """
+    An OpenAI-compatible chat completions endpoint on 127.0.0.1. Answers every
+    numbered snippet with `tags`, after first replying with each status in `failures`.
+    """
+    def __init__(self, tags: str = "Code", failures=()):
+        self.tags = tags
+        self.failures = list(failures)
+        self.requests = []  # (monotonic time, prompt)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                prompt = body['messages'][0]['content']
+                stub.requests.append((time.monotonic(), prompt))
+                if stub.failures:
+                    self._reply(stub.failures.pop(0), {'error': {'message': 'try again', 'type': 'stub'}})
+                    return
+                count = len(re.findall(r"^\[\d+\]$", prompt, re.MULTILINE))
+                answer = "\n".join(f"{i}: {stub.tags}" for i in range(1, count + 1))
+                self._reply(200, {
+                    'id': 'stub', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': answer}}],
+                })
+
+            def _reply(self, status: int, payload: dict):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def settings(self) -> dict:
+        return {'enable_ai_tagging': True, 'ai_provider': 'OpenAI', 'ai_api_key': 'test', 'ai_model_name': 'stub',
+                'ai_base_url': f"http://127.0.0.1:{self._server.server_port}/v1"}
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+@pytest.fixture
+def stub():
+    stub = StubLLM()
+    yield stub
+    stub.close()
+
+@pytest.fixture
+def make_queue(stub):
+    queues = []
+
+    def make(**kwargs):
+        kwargs.setdefault('batch_wait', 0.2)
+        queue = TaggingQueue(lambda: stub.settings, **kwargs)
+        queues.append(queue)
+        return queue
+    yield make
+    for queue in queues:
+        queue.stop()
+
+def _add(text: str) -> tuple[int, str]:
+    content_hash = f"test:{text}"
+    return database.add_entry('TEXT', text, content_hash), content_hash
+
+def _tags(entry_id: int) -> str | None:
+    return database.get_full_entry(entry_id)['tags']
+
+def test_clips_are_batched_into_one_request(storage, stub, make_queue, wait_until):
+    queue = make_queue(batch_size=8)
+    entries = [_add(text) for text in ("def f(): pass", "SELECT 1", "let x = 2")]
+    for entry_id, content_hash in entries:
+        queue.submit(entry_id, content_hash, database.get_entry_content(entry_id)['content'])
+
+    assert wait_until(lambda: all(_tags(entry_id) for entry_id, _ in entries))
+    assert len(stub.requests) == 1
+    assert all(f"[{i}]" in stub.requests[0][1] for i in (1, 2, 3))
+    assert [_tags(entry_id) for entry_id, _ in entries] == ["Code"] * 3
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_retryable_errors_are_retried_with_backoff(storage, stub, make_queue, wait_until, monkeypatch, status):
+    monkeypatch.setattr(tagging_queue.random, 'uniform', lambda a, b: 0.05)  # Delays of 0.05s, then 0.1s
+    stub.failures = [status, status]
+    queue = make_queue(max_retries=3)
+    entry_id, content_hash = _add("some text to tag")
+    queue.submit(entry_id, content_hash, "some text to tag")
+
+    assert wait_until(lambda: _tags(entry_id) == "Code")
+    times = [t for t, _ in stub.requests]
+    assert len(times) == 3
+    assert times[1] - times[0] >= 0.05
+    assert times[2] - times[1] >= 0.1
+
+def test_gives_up_after_max_retries(storage, stub, make_queue, wait_until, monkeypatch):
+    monkeypatch.setattr(tagging_queue.random, 'uniform', lambda a, b: 0.01)
+    stub.failures = [503] * 5
+    queue = make_queue(max_retries=2)
+    entry_id, content_hash = _add("never tagged")
+    queue.submit(entry_id, content_hash, "never tagged")
+
+    assert wait_until(lambda: len(stub.requests) == 3)
+    time.sleep(0.2)
+    assert len(stub.requests) == 3
+    assert _tags(entry_id) is None
+
+def test_zero_rate_means_no_limit(storage, stub, make_queue, wait_until):
+    stop = threading.Event()
+    bucket = TokenBucket(0, burst=1)
+    assert all(bucket.acquire(stop) for _ in range(100))
+    stop.set()
+    assert not bucket.acquire(stop)
+
+    queue = make_queue(batch_size=1, batch_wait=0, rate_per_minute=0, burst=1)
+    entries = [_add(f"clip number {i}") for i in range(4)]
+    for entry_id, content_hash in entries:
+        queue.submit(entry_id, content_hash, f"text {entry_id}")
+
+    assert wait_until(lambda: all(_tags(entry_id) for entry_id, _ in entries), timeout=3.0)
+    assert len(stub.requests) == 4
+
+def test_duplicate_text_is_served_from_tag_cache(storage, stub, make_queue, wait_until):
+    queue = make_queue()
+    first_id, content_hash = _add("duplicate text")
+    queue.submit(first_id, content_hash, "duplicate text")
+    assert wait_until(lambda: _tags(first_id) == "Code")
+
+    # Copying the same text again replaces the row; its tags come from tag_cache
+    second_id, _ = _add("duplicate text")
+    assert _tags(second_id) is None
+    queue.submit(second_id, content_hash, "duplicate text")
+
+    assert wait_until(lambda: _tags(second_id) == "Code")
+    assert len(stub.requests) == 1
+    assert queue.stats()['cache_hits'] == 1